@@ -1,15 +1,64 @@
 from flask import Flask, render_template, request, jsonify, session
-from main import GameSession, BIBLIOTHEQUE_CARTES, MODIFICATEURS_PARTIE, BONUS_FAMILLES, Carte
+from main import (GameSession, BIBLIOTHEQUE_CARTES, MODIFICATEURS_PARTIE, BONUS_FAMILLES, Carte, step,
+                  ActionInvalide, Acheter, Recevoir, Vendre, Retirer, Deplacer, Fusionner, FinTour,
+                  charger_profil_poids, proba_fusion_pool)
 from models import db, PlayerAccount, SavedGame, GameStats
+from session_store import create_session_store, SessionConcurrenteError
+from recommendation_cache import create_recommendation_cache, cle_recommandations
+from composition_plateau import composition_optimale
+from planificateur import decrire_action, planifier_session
+from table_familles import table_partagee
 import uuid
 import json
+import math
+import time
 from datetime import datetime
 
 app = Flask(__name__)
 app.secret_key = 'clash_royale_merge_tactics_secret_key'
 
-# Stockage des sessions de jeu
-game_sessions = {}
+# Stockage des sessions de jeu (mémoire par défaut, SQLite partagé entre workers)
+game_sessions = create_session_store()
+# Recommandations déjà calculées, partagées entre sessions (clé : empreinte de l'état)
+recommendation_cache = create_recommendation_cache()
+# Table des familles chargée au démarrage (projetée en mémoire) plutôt qu'à la première recommandation
+table_partagee()
+# Poids du score des nouvelles parties : dernier profil réglé par reglage_poids.py, sinon les poids par défaut
+profil_poids = charger_profil_poids()
+
+# Recommandations progressives : délai accepté et marge gardée pour construire la réponse
+DELAI_RECOMMANDATIONS_MAX_MS = 5000
+MARGE_DELAI_MS = 5
+TOURS_PLANIFICATION = 4
+
+@app.after_request
+def commit_game_sessions(response):
+    """Écrire les sessions modifiées avant de répondre (backends partagés)"""
+    if response.status_code >= 500:
+        game_sessions.discard()  # État possiblement à moitié modifié
+        return response
+    try:
+        game_sessions.commit()
+    except SessionConcurrenteError:
+        return app.make_response(session_concurrente(None))
+    return response
+
+@app.teardown_request
+def discard_game_sessions(exc):
+    game_sessions.discard()
+
+@app.errorhandler(SessionConcurrenteError)
+def session_concurrente(error):
+    """Action concurrente sur la même partie : le client peut réessayer"""
+    return jsonify({'success': False, 'error': 'Partie occupée par une autre action, réessayez'}), 409
+
+@app.route('/api/server_stats')
+def server_stats():
+    """Compteurs du stockage des sessions (cache, verrous, contention) et du cache de recommandations"""
+    return jsonify({'success': True, 'sessions': game_sessions.get_stats(),
+                    'recommandations': recommendation_cache.get_stats(),
+                    'profil_poids': profil_poids and {'version': profil_poids.get('version'),
+                                                      'weights': profil_poids['weights']}})
 
 @app.route('/')
 def index():
@@ -103,13 +152,7 @@ def new_game():
         niveau = data.get('niveau_initial', 1)
         
         if carte_nom in BIBLIOTHEQUE_CARTES:
-            carte_base = BIBLIOTHEQUE_CARTES[carte_nom]
-            from main import Carte
-            carte = Carte(carte_base.nom, carte_base.cout, carte_base.traits, niveau)
-            game_session.etat.main.append(carte)
-            
-            # Mise à jour historique
-            game_session.etat.historique_pool[carte.nom] = 1
+            step(game_session, Recevoir(carte_nom, niveau, "main"))
     
     # Configurer l'élixir initial
     if 'elixir_initial' in data:
@@ -128,33 +171,18 @@ def new_game():
 @app.route('/api/game_state/<session_id>')
 def get_game_state_by_id(session_id):
     """Retourne l'état du jeu pour une session donnée"""
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
     
-    game_session = game_sessions[session_id]
-    
     # Calculer la limite de cartes sur le plateau
     max_cartes_plateau = game_session.calculer_max_cartes_plateau()
     
     # Calculer les bonus de familles
-    game_session.calculer_bonus_familles()
-    
-    # Compter les cartes par famille pour l'affichage
     # IMPORTANT: Dans Merge Tactics, deux cartes identiques (même nom) comptent comme 1 seule unité pour les bonus
-    compteur_familles = {}
-    toutes_cartes = game_session.etat.main + game_session.etat.bench
-    
-    # Grouper d'abord par nom de carte (peu importe le niveau)
-    cartes_uniques = {}
-    for carte in toutes_cartes:
-        cartes_uniques[carte.nom] = carte  # Garde seulement une instance de chaque nom
-    
-    # Maintenant compter les familles basées sur les cartes uniques
-    for nom_carte, carte in cartes_uniques.items():
-        for trait in carte.traits:
-            if trait not in compteur_familles:
-                compteur_familles[trait] = 0
-            compteur_familles[trait] += 1
+    # Les bonus et les nombres affichés viennent des mêmes compteurs du plateau
+    game_session.calculer_bonus_familles()
+    compteur_familles = game_session.etat.main.familles()
     
     # Formater les cartes pour l'affichage
     plateau = []
@@ -215,16 +243,85 @@ def get_game_state_by_id(session_id):
         }
     })
 
+def carte_json(carte):
+    return {
+        'nom': carte.nom,
+        'cout_elixir': carte.cout,
+        'famille': carte.traits[0] if carte.traits else 'Neutre',
+        'niveau': carte.niveau,
+        'traits': carte.traits
+    }
+
+def evenement_du_type(evenements, type_evenement):
+    return next((e for e in evenements if e.type == type_evenement), None)
+
+def message_evenements(evenements):
+    return " ".join(e.message for e in evenements)
+
+def evenements_json(evenements):
+    return [{'type': e.type, 'message': e.message} for e in evenements]
+
+@app.route('/api/optimal_board', methods=['POST'])
+def optimal_board():
+    """Meilleure répartition plateau / banc des cartes possédées (familles + niveaux)"""
+    data = request.json
+    session_id = data.get('session_id')
+    
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
+        return jsonify({'success': False, 'error': 'Session non trouvée'})
+    
+    try:
+        poids_niveau = float(data.get('poids_niveau', 1.0))
+    except (TypeError, ValueError):
+        poids_niveau = math.nan
+    if not math.isfinite(poids_niveau):
+        return jsonify({'success': False, 'error': 'poids_niveau invalide'})
+    
+    max_cartes_plateau = game_session.calculer_max_cartes_plateau()
+    etat = game_session.etat
+    composition = composition_optimale(etat.main, etat.bench, max_cartes_plateau,
+                                       poids_familles=game_session.weights.get('familles', 1.0),
+                                       poids_niveau=poids_niveau)
+    
+    return jsonify({
+        'success': True,
+        'plateau': [carte_json(c) for c in composition.plateau],
+        'banc': [carte_json(c) for c in composition.banc],
+        'vers_plateau': [carte_json(c) for c in composition.plateau if not any(c is x for x in etat.main)],
+        'vers_banc': [carte_json(c) for c in composition.banc if not any(c is x for x in etat.bench)],
+        'changements': composition.changements,
+        'score': composition.score,
+        'score_familles': composition.score_familles,
+        'score_niveaux': composition.score_niveaux,
+        'paliers': composition.paliers,
+        'max_cartes_plateau': max_cartes_plateau
+    })
+
 @app.route('/api/recommendations', methods=['POST'])
 def get_recommendations():
-    """Calcule les recommandations pour les choix donnés"""
+    """Calcule les recommandations pour les choix donnés
+    
+    Avec `deadline_ms`, l'évaluation s'approfondit (glouton, puis planification
+    sur plusieurs tours) jusqu'au délai, et la profondeur atteinte est renvoyée.
+    """
+    debut = time.perf_counter()
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    deadline_ms = data.get('deadline_ms')
+    if deadline_ms is not None:
+        try:
+            deadline_ms = float(deadline_ms)
+        except (TypeError, ValueError):
+            deadline_ms = math.nan
+        if math.isnan(deadline_ms):
+            return jsonify({'success': False, 'error': 'deadline_ms invalide'})
+        deadline_ms = min(max(deadline_ms, 0.0), DELAI_RECOMMANDATIONS_MAX_MS)
+    
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     choix_data = data.get('choix', [])
     
     # Convertir en objets Carte
@@ -238,6 +335,11 @@ def get_recommendations():
     if not options:
         return jsonify({'success': False, 'error': 'Aucune option valide'})
     
+    cle_cache = cle_recommandations(game_session, options, deadline_ms)
+    reponse = recommendation_cache.get(cle_cache)
+    if reponse is not None:
+        return jsonify(dict(reponse, temps_ms=(time.perf_counter() - debut) * 1000))
+    
     # Vérifier l'élixir disponible
     elixir_actuel = game_session.etat.elixir
     
@@ -245,17 +347,17 @@ def get_recommendations():
     recommendations = []
     cartes_abordables = []
     cartes_cheres = []
+    evaluation = game_session.evaluer_etat()
     
     for i, carte in enumerate(options):
-        # Score basé sur la logique existante
-        score = game_session.score_familles(carte)
-        score += (5 - carte.cout) * 0.5  # Préférer les cartes moins chères
-        score += len([t for t in carte.traits if t in ['Ace', 'Noble']]) * 2  # Bonus pour certains traits
+        # Même pipeline de score que le CLI
+        detail = evaluation.detail(carte)
+        score = detail['total']
         
         peut_acheter = carte.cout <= elixir_actuel
         
         if peut_acheter:
-            raison = f"Recommandé - Synergie: {score:.1f}"
+            raison = f"Recommandé - Score: {score:.1f} (familles: {detail['familles']:.1f})"
             details = f"💰 Coût: {carte.cout} élixir | 🎯 Traits: {', '.join(carte.traits)}"
             recommendation_type = "achetable"
         else:
@@ -270,11 +372,14 @@ def get_recommendations():
             'carte': carte.nom,
             'niveau': carte.niveau,
             'score': score,
+            'composantes': detail,
             'raison': raison,
             'details': details,
             'peut_acheter': peut_acheter,
             'type': recommendation_type,
-            'cout': carte.cout
+            'cout': carte.cout,
+            # Chance de fusionner la carte posée sur le plateau dans les prochaines boutiques
+            'proba_fusion': proba_fusion_pool(carte, game_session.etat)
         }
         
         if peut_acheter:
@@ -296,14 +401,34 @@ def get_recommendations():
     elif len(cartes_abordables) < len(options):
         conseil_general = f"💡 {len(cartes_abordables)} cartes abordables maintenant, {len(cartes_cheres)} nécessitent plus d'élixir."
     
-    return jsonify({
+    reponse = {
         'success': True,
         'recommendations': recommendations,
         'cartes_abordables': cartes_abordables,
         'cartes_cheres': cartes_cheres,
         'elixir_actuel': elixir_actuel,
-        'conseil_general': conseil_general
-    })
+        'conseil_general': conseil_general,
+        'profondeur_atteinte': 0
+    }
+    
+    # Approfondissement jusqu'au délai : la planification s'arrête d'elle-même à l'échéance
+    if deadline_ms is not None:
+        restant_ms = deadline_ms - (time.perf_counter() - debut) * 1000 - MARGE_DELAI_MS
+        plan = planifier_session(game_session, options, tours=TOURS_PLANIFICATION, delai_ms=max(0.0, restant_ms))
+        achats = [(action[1], action[2]) for action in plan.actions_du_tour() if action[0] == "acheter"]
+        for recommendation in recommendations:
+            recommendation['plan_recommande'] = bool(achats) and (recommendation['carte'], recommendation['niveau']) == achats[0]
+        reponse.update({
+            'profondeur_atteinte': plan.profondeur,
+            'plan': [decrire_action(action) for action in plan.actions],
+            'plan_interrompu': plan.interrompu,
+            'deadline_ms': deadline_ms
+        })
+    
+    # Un plan coupé par le délai dépend de la charge du moment : recalculé à la prochaine demande
+    if not reponse.get('plan_interrompu'):
+        recommendation_cache.put(cle_cache, reponse)
+    return jsonify(dict(reponse, temps_ms=(time.perf_counter() - debut) * 1000))
 
 @app.route('/api/buy_card', methods=['POST'])
 def buy_card():
@@ -311,124 +436,27 @@ def buy_card():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     carte_nom = data.get('carte')
     niveau = data.get('niveau', 1)
     
-    if not carte_nom or carte_nom not in BIBLIOTHEQUE_CARTES:
-        return jsonify({'success': False, 'error': 'Carte non trouvée'})
-    
-    carte_base = BIBLIOTHEQUE_CARTES[carte_nom]
-    carte = Carte(carte_base.nom, carte_base.cout, carte_base.traits, niveau)
-    
-    # Vérifier si on peut se permettre la carte
-    if carte.cout > game_session.etat.elixir:
-        return jsonify({'success': False, 'error': 'Pas assez d\'élixir'})
-    
-    # Déduire l'élixir immédiatement
-    game_session.etat.elixir -= carte.cout
-    
-    # Ajouter la carte au banc d'abord
-    game_session.etat.bench.append(carte)
-    
-    # LOGIQUE DE FUSION AMÉLIORÉE ET SÉCURISÉE
-    fusion_effectuee = False
-    fusions_totales = 0
-    elixir_gagne = 0
-    message_fusion = ""
-    
-    def effectuer_fusions_recursives():
-        """Effectue toutes les fusions possibles de manière sécurisée"""
-        nonlocal fusion_effectuee, fusions_totales, elixir_gagne, message_fusion
-        
-        max_iterations = 10  # Limite de sécurité pour éviter les boucles infinies
-        iteration = 0
-        
-        while iteration < max_iterations:
-            iteration += 1
-            fusion_trouvee = False
-            
-            # Compter les cartes par nom et niveau dans le banc SEULEMENT
-            compteur_cartes = {}
-            for carte in game_session.etat.bench[:]:  # Copie de la liste pour éviter les modifications en cours
-                key = f"{carte.nom}_{carte.niveau}"
-                if key not in compteur_cartes:
-                    compteur_cartes[key] = []
-                compteur_cartes[key].append(carte)
-            
-            # Chercher une fusion possible (3+ cartes identiques)
-            for key, cartes_groupe in compteur_cartes.items():
-                if len(cartes_groupe) >= 3:
-                    # Prendre les 3 premières cartes identiques
-                    cartes_a_fusionner = cartes_groupe[:3]
-                    nom_carte = cartes_a_fusionner[0].nom
-                    niveau_carte = cartes_a_fusionner[0].niveau
-                    cout_carte = cartes_a_fusionner[0].cout
-                    traits_carte = cartes_a_fusionner[0].traits.copy()
-                    
-                    # Vérifier qu'on peut fusionner (niveau < 5)
-                    if niveau_carte >= 5:
-                        continue
-                    
-                    # Retirer exactement ces 3 cartes du banc
-                    for carte_a_retirer in cartes_a_fusionner:
-                        if carte_a_retirer in game_session.etat.bench:
-                            game_session.etat.bench.remove(carte_a_retirer)
-                    
-                    # Créer la carte fusionnée (niveau +1)
-                    carte_fusionnee = Carte(nom_carte, cout_carte, traits_carte, niveau_carte + 1)
-                    game_session.etat.bench.append(carte_fusionnee)
-                    
-                    # Marquer la fusion
-                    fusion_effectuee = True
-                    fusion_trouvee = True
-                    fusions_totales += 1
-                    elixir_gagne += 1
-                    
-                    if fusions_totales == 1:
-                        message_fusion = f" → Fusion {nom_carte} niv.{niveau_carte + 1}!"
-                    else:
-                        message_fusion += f" → {nom_carte} niv.{niveau_carte + 1}!"
-                    
-                    break  # Une seule fusion par itération pour la stabilité
-            
-            # Si aucune fusion trouvée, arrêter
-            if not fusion_trouvee:
-                break
-    
-    # Effectuer les fusions
-    effectuer_fusions_recursives()
-    
-    # Ajouter l'élixir gagné des fusions
-    game_session.etat.elixir += elixir_gagne
-    
-    # Appliquer bonus du leader pour fusion
-    if fusion_effectuee and game_session.leader_choisi:
-        bonus_elixir = game_session.appliquer_bonus_leader("merge", f"({carte.nom} fusionné {fusions_totales} fois)")
-        if bonus_elixir > 0:
-            game_session.etat.elixir += bonus_elixir
-            elixir_gagne += bonus_elixir
-            message_fusion += f" +{bonus_elixir} élixir (Leader)"
-    
-    if fusion_effectuee:
-        message_fusion += f" +{elixir_gagne} élixir total"
-    
-    # Mise à jour historique
-    if carte.nom in game_session.etat.historique_pool:
-        game_session.etat.historique_pool[carte.nom] += 1
-    else:
-        game_session.etat.historique_pool[carte.nom] = 1
+    # Achat sur le banc, puis fusions en cascade
+    try:
+        _, evenements = step(game_session, Acheter(carte_nom, niveau, "bench"))
+    except ActionInvalide as erreur:
+        return jsonify({'success': False, 'error': str(erreur)})
+    fusion = evenement_du_type(evenements, "fusion")
     
     return jsonify({
         'success': True,
-        'message': f'{carte_nom} niveau {niveau} acheté{message_fusion}',
+        'message': message_evenements(evenements),
         'elixir_restant': game_session.etat.elixir,
-        'fusion_effectuee': fusion_effectuee,
-        'fusions_totales': fusions_totales,
-        'elixir_gagne': elixir_gagne
+        'fusion_effectuee': fusion is not None,
+        'fusions_totales': fusion.details['nombre'] if fusion else 0,
+        'elixir_gagne': fusion.details['elixir_gagne'] if fusion else 0,
+        'evenements': evenements_json(evenements)
     })
 
 @app.route('/api/manual_merge', methods=['POST'])
@@ -437,108 +465,22 @@ def manual_merge():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     carte_nom = data.get('carte')
     niveau = data.get('niveau', 1)
     
-    # Vérifier qu'il y a au moins 3 cartes identiques dans le banc
-    cartes_identiques = [c for c in game_session.etat.bench if c.nom == carte_nom and c.niveau == niveau]
-    
-    if len(cartes_identiques) < 3:
-        return jsonify({'success': False, 'error': f'Pas assez de cartes identiques pour fusionner (besoin de 3, trouvé {len(cartes_identiques)})'})
-    
-    if niveau >= 5:
-        return jsonify({'success': False, 'error': 'Impossible de fusionner au-delà du niveau 5'})
-    
-    # Supprimer exactement 3 cartes identiques du banc
-    cartes_supprimees = 0
-    for i in range(len(game_session.etat.bench) - 1, -1, -1):
-        if cartes_supprimees >= 3:
-            break
-        if game_session.etat.bench[i].nom == carte_nom and game_session.etat.bench[i].niveau == niveau:
-            game_session.etat.bench.pop(i)
-            cartes_supprimees += 1
-    
-    # Créer la carte fusionnée
-    carte_base = BIBLIOTHEQUE_CARTES[carte_nom]
-    carte_fusionnee = Carte(carte_base.nom, carte_base.cout, carte_base.traits, niveau + 1)
-    game_session.etat.bench.append(carte_fusionnee)
-    
-    # Gain d'élixir pour fusion
-    elixir_gagne = 1
-    game_session.etat.elixir += elixir_gagne
-    
-    # Appliquer bonus du leader
-    if game_session.leader_choisi:
-        bonus_elixir = game_session.appliquer_bonus_leader("merge", f"({carte_nom} fusionné manuellement)")
-        if bonus_elixir > 0:
-            game_session.etat.elixir += bonus_elixir
-            elixir_gagne += bonus_elixir
+    # La fusion demandée et celles qu'elle déclenche
+    try:
+        _, evenements = step(game_session, Fusionner(carte_nom, niveau))
+    except ActionInvalide as erreur:
+        return jsonify({'success': False, 'error': str(erreur)})
+    fusion = evenement_du_type(evenements, "fusion")
+    elixir_gagne = fusion.details['elixir_gagne']
+    fusions_recursives = fusion.details['nombre'] - 1
     
     message = f"Fusion réussie ! 3x {carte_nom} niv.{niveau} → 1x {carte_nom} niv.{niveau + 1} (+{elixir_gagne} élixir)"
-    
-    # Effectuer les fusions récursives supplémentaires de manière sécurisée
-    fusions_recursives = 0
-    
-    def effectuer_fusions_post_manuelle():
-        nonlocal fusions_recursives, elixir_gagne
-        
-        max_iterations = 10  # Limite de sécurité
-        iteration = 0
-        
-        while iteration < max_iterations:
-            iteration += 1
-            fusion_trouvee = False
-            
-            # Compter les cartes par nom et niveau dans le banc SEULEMENT
-            compteur_cartes = {}
-            for carte in game_session.etat.bench[:]:  # Copie pour éviter modifications en cours
-                key = f"{carte.nom}_{carte.niveau}"
-                if key not in compteur_cartes:
-                    compteur_cartes[key] = []
-                compteur_cartes[key].append(carte)
-            
-            # Chercher une fusion possible (3+ cartes identiques)
-            for key, cartes_groupe in compteur_cartes.items():
-                if len(cartes_groupe) >= 3:
-                    # Prendre les 3 premières cartes identiques
-                    cartes_a_fusionner = cartes_groupe[:3]
-                    nom_carte = cartes_a_fusionner[0].nom
-                    niveau_carte = cartes_a_fusionner[0].niveau
-                    cout_carte = cartes_a_fusionner[0].cout
-                    traits_carte = cartes_a_fusionner[0].traits.copy()
-                    
-                    # Vérifier qu'on peut fusionner (niveau < 5)
-                    if niveau_carte >= 5:
-                        continue
-                    
-                    # Retirer exactement ces 3 cartes du banc
-                    for carte_a_retirer in cartes_a_fusionner:
-                        if carte_a_retirer in game_session.etat.bench:
-                            game_session.etat.bench.remove(carte_a_retirer)
-                    
-                    # Créer la carte fusionnée (niveau +1)
-                    carte_fusionnee_auto = Carte(nom_carte, cout_carte, traits_carte, niveau_carte + 1)
-                    game_session.etat.bench.append(carte_fusionnee_auto)
-                    
-                    # Marquer la fusion
-                    fusion_trouvee = True
-                    fusions_recursives += 1
-                    elixir_gagne += 1
-                    game_session.etat.elixir += 1
-                    
-                    break  # Une seule fusion par itération
-            
-            # Si aucune fusion trouvée, arrêter
-            if not fusion_trouvee:
-                break
-    
-    # Effectuer les fusions automatiques supplémentaires
-    effectuer_fusions_post_manuelle()
-    
     if fusions_recursives > 0:
         message += f" + {fusions_recursives} fusion(s) automatique(s)!"
     
@@ -556,42 +498,23 @@ def delete_card():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     carte_nom = data.get('carte')
     niveau = data.get('niveau', 1)
-    location = data.get('location', 'banc')  # 'banc' ou 'plateau'
-    
-    carte_trouvee = None
-    
-    # Chercher dans le banc ou plateau selon location
-    if location == 'banc':
-        for i, carte in enumerate(game_session.etat.bench):
-            if carte.nom == carte_nom and carte.niveau == niveau:
-                carte_trouvee = game_session.etat.bench.pop(i)
-                break
-    else:  # plateau
-        for i, carte in enumerate(game_session.etat.main):
-            if carte.nom == carte_nom and carte.niveau == niveau:
-                carte_trouvee = game_session.etat.main.pop(i)
-                break
-    
-    if not carte_trouvee:
-        return jsonify({'success': False, 'error': 'Carte non trouvée'})
+    zone = 'bench' if data.get('location', 'banc') == 'banc' else 'main'  # 'banc' ou 'plateau'
     
-    # Récupérer l'élixir : prix de la carte - 1 (minimum 1)
-    elixir_recupere = max(1, carte_trouvee.cout - 1)
-    game_session.etat.elixir += elixir_recupere
-    
-    message = f'{carte_nom} niveau {niveau} supprimé pour {elixir_recupere} élixir'
+    try:
+        _, evenements = step(game_session, Retirer(carte_nom, niveau, zone))
+    except ActionInvalide as erreur:
+        return jsonify({'success': False, 'error': str(erreur)})
     
     return jsonify({
         'success': True,
-        'message': message,
+        'message': message_evenements(evenements),
         'elixir_restant': game_session.etat.elixir,
-        'elixir_recupere': elixir_recupere
+        'elixir_recupere': evenement_du_type(evenements, "suppression").details['elixir']
     })
 
 @app.route('/api/move_card', methods=['POST'])
@@ -600,10 +523,9 @@ def move_card():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     carte_nom = data.get('carte')
     niveau = data.get('niveau', 1)
     from_location = data.get('from')  # 'banc' ou 'plateau'
@@ -612,45 +534,14 @@ def move_card():
     if from_location == to_location:
         return jsonify({'success': False, 'error': 'Impossible de déplacer vers la même zone'})
     
-    carte_trouvee = None
-    
-    # Chercher et retirer de la source
-    if from_location == 'banc':
-        for i, carte in enumerate(game_session.etat.bench):
-            if carte.nom == carte_nom and carte.niveau == niveau:
-                carte_trouvee = game_session.etat.bench.pop(i)
-                break
-    else:  # plateau
-        for i, carte in enumerate(game_session.etat.main):
-            if carte.nom == carte_nom and carte.niveau == niveau:
-                carte_trouvee = game_session.etat.main.pop(i)
-                break
-    
-    if not carte_trouvee:
-        return jsonify({'success': False, 'error': 'Carte non trouvée'})
-    
-    # Vérifier les limites avant d'ajouter à la destination
-    max_cartes_plateau = game_session.calculer_max_cartes_plateau()
-    
-    if to_location == 'plateau' and len(game_session.etat.main) >= max_cartes_plateau:
-        # Remettre la carte à sa place d'origine
-        if from_location == 'banc':
-            game_session.etat.bench.append(carte_trouvee)
-        else:
-            game_session.etat.main.append(carte_trouvee)
-        return jsonify({'success': False, 'error': f'Plateau plein (max {max_cartes_plateau} cartes)'})
-    
-    # Ajouter à la destination
-    if to_location == 'banc':
-        game_session.etat.bench.append(carte_trouvee)
-        message = f'{carte_nom} niveau {niveau} déplacé vers le banc'
-    else:  # plateau
-        game_session.etat.main.append(carte_trouvee)
-        message = f'{carte_nom} niveau {niveau} déplacé vers le plateau'
+    try:
+        _, evenements = step(game_session, Deplacer(carte_nom, niveau, 'bench' if to_location == 'banc' else 'main'))
+    except ActionInvalide as erreur:
+        return jsonify({'success': False, 'error': str(erreur)})
     
     return jsonify({
         'success': True,
-        'message': message
+        'message': message_evenements(evenements)
     })
 
 @app.route('/api/sell_card', methods=['POST'])
@@ -659,45 +550,21 @@ def sell_card():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     carte_nom = data.get('carte')
     niveau = data.get('niveau', 1)
-    location = data.get('location', 'banc')  # 'banc' ou 'plateau'
-    
-    carte_trouvee = None
-    
-    # Chercher dans le banc ou plateau selon location
-    if location == 'banc':
-        for i, carte in enumerate(game_session.etat.bench):
-            if carte.nom == carte_nom and carte.niveau == niveau:
-                carte_trouvee = game_session.etat.bench.pop(i)
-                break
-    else:  # plateau
-        for i, carte in enumerate(game_session.etat.main):
-            if carte.nom == carte_nom and carte.niveau == niveau:
-                carte_trouvee = game_session.etat.main.pop(i)
-                break
-    
-    if not carte_trouvee:
-        return jsonify({'success': False, 'error': 'Carte non trouvée'})
-    
-    # Élixir de base pour la vente (généralement 1 élixir)
-    elixir_vente = max(1, carte_trouvee.cout // 2)
-    game_session.etat.elixir += elixir_vente
+    zone = 'bench' if data.get('location', 'banc') == 'banc' else 'main'  # 'banc' ou 'plateau'
     
-    message = f'{carte_nom} niveau {niveau} vendu pour {elixir_vente} élixir'
-    
-    # Appliquer bonus du leader pour défaite/vente
-    bonus_elixir = game_session.appliquer_bonus_leader("defeat", f"({carte_nom} vendu)")
-    if bonus_elixir > 0:
-        message += f" +{bonus_elixir} élixir (Leader)"
+    try:
+        _, evenements = step(game_session, Vendre(carte_nom, niveau, zone))
+    except ActionInvalide as erreur:
+        return jsonify({'success': False, 'error': str(erreur)})
     
     return jsonify({
         'success': True,
-        'message': message,
+        'message': message_evenements(evenements),
         'elixir_restant': game_session.etat.elixir
     })
 
@@ -707,47 +574,28 @@ def make_choice():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     carte_nom = data.get('carte')
     niveau = data.get('niveau', 1)
     
-    questions = []
-    
+    evenements = []
     if carte_nom and carte_nom in BIBLIOTHEQUE_CARTES:
-        carte_base = BIBLIOTHEQUE_CARTES[carte_nom]
-        from main import Carte
-        carte = Carte(carte_base.nom, carte_base.cout, carte_base.traits, niveau)
-        
-        # Vérifier si on peut se permettre la carte
-        if carte.cout <= game_session.etat.elixir:
-            # Ajouter la carte
-            game_session.etat.main.append(carte)
-            game_session.etat.elixir -= carte.cout
-            
-            # Mise à jour historique
-            if carte.nom in game_session.etat.historique_pool:
-                game_session.etat.historique_pool[carte.nom] += 1
-            else:
-                game_session.etat.historique_pool[carte.nom] = 1
-        else:
-            return jsonify({'success': False, 'error': 'Pas assez d\'élixir'})
+        # La carte est posée directement sur le plateau
+        try:
+            _, evenements = step(game_session, Acheter(carte_nom, niveau, "main"))
+        except ActionInvalide as erreur:
+            return jsonify({'success': False, 'error': str(erreur)})
     
-    # Avancer le tour
-    game_session.tour += 1
-    
-    # Ajouter l'élixir du tour suivant
-    game_session.etat.elixir += game_session.elixir_par_tour
-    
-    # Générer questions post-tour
-    questions = game_session.poser_question_modificateur("post_tour")
+    # Avancer le tour (élixir du tour suivant compris)
+    evenements += step(game_session, FinTour())[1]
     
     return jsonify({
         'success': True,
-        'questions': questions,
-        'message': f'{carte_nom} niveau {niveau} ajouté !' if carte_nom else 'Tour passé'
+        'questions': [],
+        'message': f'{carte_nom} niveau {niveau} ajouté !' if carte_nom else 'Tour passé',
+        'evenements': evenements_json(evenements)
     })
 
 @app.route('/api/battle_result', methods=['POST'])
@@ -756,10 +604,9 @@ def battle_result():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     victoire = data.get('victoire', False)  # True pour victoire, False pour défaite
     troupes_adverses_restantes = data.get('troupes_adverses_restantes', 0)  # Nombre de troupes adverses restantes
     
@@ -784,114 +631,35 @@ def move_to_field():
     data = request.json
     session_id = data.get('session_id')
     
-    if session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({'success': False, 'error': 'Session non trouvée'})
-    
-    game_session = game_sessions[session_id]
     carte_nom = data.get('carte')
     niveau = data.get('niveau', 1)
     
     if not carte_nom:
         return jsonify({'success': False, 'error': 'Carte non spécifiée'})
     
-    # Calculer la limite de cartes sur le plateau
-    max_cartes_plateau = game_session.calculer_max_cartes_plateau()
-    
-    # Chercher la carte dans le banc
-    carte_trouvee = None
-    for i, carte in enumerate(game_session.etat.bench):
-        if carte.nom == carte_nom and carte.niveau == niveau:
-            carte_trouvee = game_session.etat.bench.pop(i)
-            break
-    
-    if not carte_trouvee:
-        return jsonify({'success': False, 'error': 'Carte non trouvée dans le banc'})
-    
-    # Vérifier s'il y a possibilité de fusion avant de vérifier la limite
-    cartes_identiques_plateau = [c for c in game_session.etat.main if c.nom == carte_nom and c.niveau == niveau]
-    
-    # Vérifier la limite du plateau seulement si pas de fusion possible
-    if len(game_session.etat.main) >= max_cartes_plateau and len(cartes_identiques_plateau) == 0:
-        # Remettre la carte dans le banc
-        game_session.etat.bench.append(carte_trouvee)
-        return jsonify({
-            'success': False, 
-            'error': f'Plateau plein ! Limite : {max_cartes_plateau} cartes (Tour {game_session.tour})'
-        })
-    
-    # Vérifier s'il y a des fusions possibles sur le plateau
-    fusion_effectuee = False
-    elixir_gagne = 0
-    message = f'{carte_nom} niveau {niveau} déplacé vers le plateau !'
-    
-    # Vérifier d'abord s'il y a déjà des cartes identiques sur le plateau (AVANT d'ajouter)
-    cartes_identiques_plateau = [c for c in game_session.etat.main if c.nom == carte_nom and c.niveau == niveau]
-    
-    if len(cartes_identiques_plateau) >= 2:
-        # Fusion avec 3 cartes (2 sur plateau + 1 du banc)
-        # Retirer 2 cartes du plateau
-        for _ in range(2):
-            for i, c in enumerate(game_session.etat.main):
-                if c.nom == carte_nom and c.niveau == niveau:
-                    game_session.etat.main.pop(i)
-                    break
-        
-        # La carte du banc + les 2 du plateau = fusion
-        # Créer la carte fusionnée
-        from main import Carte
-        carte_base = BIBLIOTHEQUE_CARTES[carte_nom]
-        carte_fusionnee = Carte(carte_base.nom, carte_base.cout, carte_base.traits, niveau + 1)
-        game_session.etat.main.append(carte_fusionnee)
-        
-        fusion_effectuee = True
-        
-        # Gain de base pour fusion : +1 élixir
-        game_session.etat.elixir += 1
-        elixir_gagne = 1
-        message = f'{carte_nom} niveau {niveau} fusionné avec le plateau → niveau {niveau + 1}! +1 élixir'
-        
-        # Appliquer bonus du leader pour fusion
-        bonus_elixir = game_session.appliquer_bonus_leader("merge", f"({carte_nom} fusionné)")
-        if bonus_elixir > 0:
-            elixir_gagne += bonus_elixir
-            message += f" +{bonus_elixir} élixir (Leader)"
-            
-    elif len(cartes_identiques_plateau) == 1:
-        # Fusion avec 2 cartes (1 sur plateau + 1 du banc)
-        # Retirer 1 carte du plateau
-        for i, c in enumerate(game_session.etat.main):
-            if c.nom == carte_nom and c.niveau == niveau:
-                game_session.etat.main.pop(i)
-                break
-        
-        # La carte du banc + celle du plateau = fusion
-        # Créer la carte fusionnée
-        from main import Carte
-        carte_base = BIBLIOTHEQUE_CARTES[carte_nom]
-        carte_fusionnee = Carte(carte_base.nom, carte_base.cout, carte_base.traits, niveau + 1)
-        game_session.etat.main.append(carte_fusionnee)
-        
-        fusion_effectuee = True
-        
-        # Gain de base pour fusion : +1 élixir
-        game_session.etat.elixir += 1
-        elixir_gagne = 1
-        message = f'{carte_nom} niveau {niveau} fusionné avec le plateau → niveau {niveau + 1}! +1 élixir'
-        
-        # Appliquer bonus du leader pour fusion
-        bonus_elixir = game_session.appliquer_bonus_leader("merge", f"({carte_nom} fusionné)")
-        if bonus_elixir > 0:
-            elixir_gagne += bonus_elixir
-            message += f" +{bonus_elixir} élixir (Leader)"
+    # Poser la carte (limite du plateau sauf fusion) puis fusionner les cartes identiques du plateau
+    try:
+        _, evenements = step(game_session, Deplacer(carte_nom, niveau, "main"))
+    except ActionInvalide as erreur:
+        return jsonify({'success': False, 'error': str(erreur)})
+    fusion = evenement_du_type(evenements, "fusion")
+    
+    if fusion:
+        niveau_final = max(niveau_obtenu for nom, niveau_obtenu in fusion.details['fusions'] if nom == carte_nom)
+        message = f'{carte_nom} niveau {niveau} fusionné avec le plateau → niveau {niveau_final}! +{fusion.details["nombre"]} élixir'
+        if fusion.details['bonus_leader'] > 0:
+            message += f" +{fusion.details['bonus_leader']} élixir (Leader)"
     else:
-        # Pas de fusion, simplement ajouter la carte au plateau
-        game_session.etat.main.append(carte_trouvee)
+        message = f'{carte_nom} niveau {niveau} déplacé vers le plateau !'
     
     return jsonify({
         'success': True,
         'message': message,
-        'fusion_effectuee': fusion_effectuee,
-        'elixir_gagne': elixir_gagne
+        'fusion_effectuee': fusion is not None,
+        'elixir_gagne': fusion.details['elixir_gagne'] if fusion else 0
     })
 
 # ===== GESTION DES COMPTES =====
@@ -1013,7 +781,8 @@ def save_game():
         })
     
     session_id = session.get('game_id')
-    if not session_id or session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({
             'success': False,
             'error': 'Aucune partie active trouvée'
@@ -1022,7 +791,6 @@ def save_game():
     data = request.json
     game_name = data.get('game_name', '')
     
-    game_session = game_sessions[session_id]
     save_id = db.save_game(username, game_session, game_name)
     
     return jsonify({
@@ -1091,7 +859,7 @@ def load_game(save_id):
 
 @app.route('/api/saves')
 def get_saves():
-    """Récupérer toutes les sauvegardes de l'utilisateur"""
+    """Récupérer une page des sauvegardes de l'utilisateur (métadonnées seulement)"""
     username = session.get('username')
     if not username:
         return jsonify({
@@ -1099,12 +867,20 @@ def get_saves():
             'error': 'Connexion requise'
         })
     
-    saves = db.get_user_saves(username)
-    saves_data = [save.to_dict() for save in saves]
+    # Pagination par curseur : seules les métadonnées sont lues, jamais les game_state
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        saves_data, next_cursor = db.list_save_summaries(username, limit, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Paramètres de pagination invalides'
+        })
     
     return jsonify({
         'success': True,
-        'saves': saves_data
+        'saves': saves_data,
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/delete_save/<save_id>', methods=['DELETE'])
@@ -1139,14 +915,13 @@ def update_save(save_id):
         })
     
     session_id = session.get('game_id')
-    if not session_id or session_id not in game_sessions:
+    game_session = game_sessions.get(session_id)
+    if game_session is None:
         return jsonify({
             'success': False,
             'error': 'Aucune partie active trouvée'
         })
     
-    game_session = game_sessions[session_id]
-    
     if db.update_save(save_id, game_session, username):
         return jsonify({
             'success': True,
@@ -0,0 +1,63 @@
+"""
+Benchmark du choix de composition du plateau : séparation et évaluation vs énumération
+
+L'énumération essaie toutes les combinaisons (nom, niveau) qui tiennent sur le
+plateau ; la séparation et évaluation coupe les branches dont la borne ne
+dépasse pas la meilleure composition trouvée.
+
+Utilisation : python benchmarks/bench_composition.py [répétitions]
+"""
+
+import itertools
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BIBLIOTHEQUE_CARTES, BITS_NOMS, Carte
+from composition_plateau import composition_optimale
+from table_familles import table_partagee
+
+
+def composition_enumeree(cartes, taille_max):
+    table = table_partagee()
+    paires = sorted({(c.nom, c.niveau) for c in cartes})
+    meilleur = float('-inf')
+    for taille in range(min(taille_max, len(paires)) + 1):
+        for choix in itertools.combinations(paires, taille):
+            masque = 0
+            for nom, _ in choix:
+                masque |= BITS_NOMS[nom]
+            meilleur = max(meilleur, table.score(masque) + sum(n for _, n in choix))
+    return meilleur
+
+
+def cartes_aleatoires(rng, nombre):
+    noms = rng.sample(list(BIBLIOTHEQUE_CARTES), min(nombre, len(BIBLIOTHEQUE_CARTES)))
+    return [Carte(nom, BIBLIOTHEQUE_CARTES[nom].cout, BIBLIOTHEQUE_CARTES[nom].traits, rng.randint(1, 3))
+            for nom in noms]
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = random.Random(17)
+    table_partagee()
+    
+    print(f"{'Plateau + banc':<18}{'énumération ms':>16}{'B&B ms':>10}{'nœuds':>8}{'gain':>8}")
+    for taille_plateau, taille_banc in ((4, 5), (6, 5), (7, 5), (7, 13)):
+        cartes = cartes_aleatoires(rng, taille_plateau + taille_banc)
+        plateau, banc = cartes[:taille_plateau], cartes[taille_plateau:]
+        composition = composition_optimale(plateau, banc, 7)
+        assert abs(composition.score - composition_enumeree(cartes, 7)) < 1e-9
+        
+        enumeration = timeit.timeit(lambda: composition_enumeree(cartes, 7), number=max(1, repetitions // 10))
+        enumeration = enumeration / max(1, repetitions // 10) * 1e3
+        bb = timeit.timeit(lambda: composition_optimale(plateau, banc, 7), number=repetitions) / repetitions * 1e3
+        print(f"{f'{taille_plateau} + {taille_banc}':<18}{enumeration:>16.2f}{bb:>10.2f}"
+              f"{composition.noeuds:>8}{enumeration / bb:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Microbenchmark du moteur de fusion : ancienne boucle vs resoudre_fusions
+
+L'ancienne implémentation (reprise telle quelle des endpoints) reconstruit un
+dictionnaire "nom_niveau" à chaque fusion et s'arrête après 10 itérations ;
+resoudre_fusions compte une fois par (nom, niveau) et propage la cascade.
+
+Utilisation : python benchmarks/bench_fusions.py [répétitions]
+"""
+
+import os
+import random
+import sys
+import timeit
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BIBLIOTHEQUE_CARTES, Carte, resoudre_fusions
+
+
+def fusions_anciennes(bench):
+    """Boucle de fusion historique de /api/buy_card"""
+    fusions = 0
+    max_iterations = 10
+    iteration = 0
+    while iteration < max_iterations:
+        iteration += 1
+        fusion_trouvee = False
+        compteur_cartes = {}
+        for carte in bench[:]:
+            compteur_cartes.setdefault(f"{carte.nom}_{carte.niveau}", []).append(carte)
+        for cartes_groupe in compteur_cartes.values():
+            if len(cartes_groupe) >= 3:
+                cartes_a_fusionner = cartes_groupe[:3]
+                base = cartes_a_fusionner[0]
+                if base.niveau >= 5:
+                    continue
+                for carte_a_retirer in cartes_a_fusionner:
+                    if carte_a_retirer in bench:
+                        bench.remove(carte_a_retirer)
+                bench.append(Carte(base.nom, base.cout, base.traits.copy(), base.niveau + 1))
+                fusion_trouvee = True
+                fusions += 1
+                break
+        if not fusion_trouvee:
+            break
+    return fusions
+
+
+def carte(nom, niveau=1):
+    base = BIBLIOTHEQUE_CARTES[nom]
+    return Carte(base.nom, base.cout, base.traits, niveau)
+
+
+def scenarios():
+    rng = random.Random(42)
+    noms = list(BIBLIOTHEQUE_CARTES)
+    # Achat qui déclenche une cascade complète 1 → 5 (2 cartes par niveau)
+    cascade = [carte("Chevalier", n) for n in range(1, 5) for _ in range(2)] + [carte("Chevalier")]
+    yield "cascade 1→5 (9 cartes)", cascade
+    for taille in (10, 30, 100):
+        banc = [carte(rng.choice(noms[:6]), rng.randint(1, 2)) for _ in range(taille)]
+        yield f"banc aléatoire ({taille} cartes)", banc
+    # Sans aucune fusion possible : coût du simple contrôle
+    yield "aucune fusion (20 cartes)", [carte(nom) for nom in noms[:10] for _ in range(2)]
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'Scénario':<30}{'ancien µs':>12}{'nouveau µs':>12}{'gain':>8}  cartes identiques ?")
+    for nom, banc in scenarios():
+        ancien_banc, nouveau_banc = list(banc), list(banc)
+        fusions_anciennes(ancien_banc)
+        resoudre_fusions(nouveau_banc)
+        identiques = (Counter((c.nom, c.niveau) for c in ancien_banc)
+                      == Counter((c.nom, c.niveau) for c in nouveau_banc))
+        
+        ancien = timeit.timeit(lambda: fusions_anciennes(list(banc)), number=repetitions) / repetitions * 1e6
+        nouveau = timeit.timeit(lambda: resoudre_fusions(list(banc)), number=repetitions) / repetitions * 1e6
+        print(f"{nom:<30}{ancien:>12.1f}{nouveau:>12.1f}{ancien / nouveau:>7.1f}x  {'oui' if identiques else 'NON (limite de 10 itérations)'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark du moteur de jeu sans entrées/sorties : tours et actions simulés par seconde
+
+Politique aléatoire : jusqu'à trois achats par tour, une vente quand le banc
+déborde, pose sur le plateau quand il reste de la place, puis fin de tour
+(victoire une fois sur deux). Une nouvelle partie commence à chaque élimination.
+
+Utilisation : python benchmarks/bench_moteur.py [tours]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BIBLIOTHEQUE_CARTES, GameSession, Acheter, Deplacer, FinTour, Vendre, step
+
+NOMS = list(BIBLIOTHEQUE_CARTES)
+
+
+def nouvelle_partie(rng):
+    game_session = GameSession()
+    game_session.leader_choisi = game_session.leaders_disponibles[rng.choice(["Impératrice", "Roi Royal"])]
+    return game_session
+
+
+def simuler(tours, graine=0):
+    rng = random.Random(graine)
+    game_session = nouvelle_partie(rng)
+    actions = evenements = parties = 0
+    for _ in range(tours):
+        for _ in range(3):
+            nom = rng.choice(NOMS)
+            if BIBLIOTHEQUE_CARTES[nom].cout <= game_session.etat.elixir:
+                evenements += len(step(game_session, Acheter(nom))[1])
+                actions += 1
+        banc = game_session.etat.bench
+        if len(banc) > 5:
+            carte = banc[0]
+            evenements += len(step(game_session, Vendre(carte.nom, carte.niveau))[1])
+            actions += 1
+        if banc and len(game_session.etat.main) < game_session.etat.max_cartes_plateau:
+            carte = banc[-1]
+            evenements += len(step(game_session, Deplacer(carte.nom, carte.niveau, "main"))[1])
+            actions += 1
+        evenements += len(step(game_session, FinTour(victoire=rng.random() < 0.5,
+                                                     troupes_adverses_restantes=rng.randint(0, 1)))[1])
+        actions += 1
+        if game_session.etat.hp <= 0:
+            parties += 1
+            game_session = nouvelle_partie(rng)
+    return actions, evenements, parties
+
+
+def main():
+    tours = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    debut = time.perf_counter()
+    actions, evenements, parties = simuler(tours)
+    duree = time.perf_counter() - debut
+    print(f"{tours} tours ({parties} parties terminées) en {duree:.2f} s")
+    print(f"{'tours/s':<12}{tours / duree:>12.0f}")
+    print(f"{'actions/s':<12}{actions / duree:>12.0f}")
+    print(f"{'événements/s':<12}{evenements / duree:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark des stockages de sessions : mémoire vs SQLite partagé
+
+Simule le cycle d'une requête (lecture de la session, achat d'une carte,
+écriture en fin de requête) puis, pour SQLite, le même cycle réparti sur
+plusieurs processus comme derrière un serveur pre-fork.
+
+Utilisation : python benchmarks/bench_sessions.py [requêtes] [processus]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import GameSession, BIBLIOTHEQUE_CARTES, Carte
+from session_store import MemorySessionStore, SQLiteSessionStore, serialiser_session
+
+NB_SESSIONS = 200
+
+
+def creer_session() -> GameSession:
+    game_session = GameSession()
+    game_session.bibliotheque_cartes = BIBLIOTHEQUE_CARTES
+    game_session.leader_choisi = game_session.leaders_disponibles["Roi Royal"]
+    for nom in list(BIBLIOTHEQUE_CARTES)[:6]:
+        carte = BIBLIOTHEQUE_CARTES[nom]
+        game_session.etat.main.append(Carte(carte.nom, carte.cout, carte.traits, 2))
+    return game_session
+
+
+def cycle_requete(store, session_id, i: int):
+    game_session = store.get(session_id)
+    game_session.etat.elixir = i % 10
+    game_session.tour = i % 20 + 1
+    store.commit()
+
+
+def mesurer(store, session_ids, nb_requetes: int) -> float:
+    debut = time.perf_counter()
+    for i in range(nb_requetes):
+        cycle_requete(store, session_ids[i % len(session_ids)], i)
+    return time.perf_counter() - debut
+
+
+def worker_sqlite(db_path, session_ids, nb_requetes: int) -> float:
+    return mesurer(SQLiteSessionStore(db_path), session_ids, nb_requetes)
+
+
+def main():
+    nb_requetes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    nb_processus = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    
+    session_ids = [str(uuid.uuid4()) for _ in range(NB_SESSIONS)]
+    
+    memoire = MemorySessionStore(max_sessions=NB_SESSIONS)
+    with tempfile.TemporaryDirectory() as dossier:
+        db_path = os.path.join(dossier, "sessions.sqlite3")
+        sqlite = SQLiteSessionStore(db_path)
+        for session_id in session_ids:
+            memoire.put(session_id, creer_session())
+            sqlite.put(session_id, creer_session())
+        sqlite.commit()
+        
+        print(f"📏 Session sérialisée : {len(serialiser_session(creer_session()).encode())} octets")
+        print(f"{'Backend':<28}{'Requêtes/s':>12}{'µs/requête':>12}")
+        
+        for nom, store in (("mémoire", memoire), ("sqlite (1 processus)", sqlite)):
+            duree = mesurer(store, session_ids, nb_requetes)
+            print(f"{nom:<28}{nb_requetes / duree:>12.0f}{duree / nb_requetes * 1e6:>12.1f}")
+        
+        # Même charge répartie sur plusieurs processus partageant la base (démarrage du pool inclus)
+        debut = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=nb_processus) as executor:
+            par_processus = nb_requetes // nb_processus
+            list(executor.map(worker_sqlite, [db_path] * nb_processus,
+                              [session_ids] * nb_processus, [par_processus] * nb_processus))
+        duree = time.perf_counter() - debut
+        total = par_processus * nb_processus
+        print(f"{f'sqlite ({nb_processus} processus)':<28}{total / duree:>12.0f}{duree / total * 1e6:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark de la simulation des boutiques : débit selon le nombre de processus
+
+Les tirages sont découpés en lots de graines fixes ; les estimations sont
+identiques quel que soit le nombre de processus, seul le débit change.
+
+Utilisation : python benchmarks/bench_simulation.py [tirages] [processus max]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import COUTS_CARTES
+from simulation_boutique import simuler
+
+
+def main():
+    rollouts = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    max_processus = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    historique = {nom: 3 for nom, _ in COUTS_CARTES[:5]}
+    
+    print(f"{rollouts} tirages, {os.cpu_count()} cœurs disponibles")
+    print(f"{'processus':<12}{'tirages/s':>12}{'accélération':>14}")
+    reference = None
+    estimation_reference = None
+    processus = 1
+    while True:
+        estimation = simuler(COUTS_CARTES, historique, rollouts=rollouts, processus=processus)
+        estimation_reference = estimation_reference or estimation
+        assert estimation.apparitions == estimation_reference.apparitions
+        
+        debit = rollouts / estimation.secondes
+        reference = reference or debit
+        print(f"{processus:<12}{debit:>12.0f}{debit / reference:>13.2f}x")
+        if processus >= max_processus:
+            break
+        processus = min(processus * 2, max_processus)
+
+
+if __name__ == '__main__':
+    main()
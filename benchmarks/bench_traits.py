@@ -0,0 +1,119 @@
+"""
+Benchmark du chemin de recommandation : traits en chaînes vs masques de bits
+
+Les anciennes fonctions (reprises telles quelles) parcourent les listes de
+traits avec `trait in c.traits` ; les nouvelles utilisent les masques de
+familles des cartes et les compteurs tenus par le plateau.
+
+Utilisation : python benchmarks/bench_traits.py [répétitions]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BIBLIOTHEQUE_CARTES, BONUS_FAMILLES, Carte, GameSession, masque_traits, score_traits
+
+# Traits favorisés par l'ancienne formule de /api/recommandations
+MASQUE_TRAITS_BONUS = masque_traits(['Ace', 'Noble'])
+
+
+def score_traits_ancien(carte, main, weights):
+    score = 0
+    for trait in carte.traits:
+        count = sum(trait in c.traits for c in main)
+        score += weights['traits'] * count
+    return score
+
+
+def score_familles_ancien(main, carte):
+    score = 0
+    familles_count = {}
+    for carte_existante in main:
+        for trait in carte_existante.traits:
+            if trait in BONUS_FAMILLES:
+                familles_count[trait] = familles_count.get(trait, 0) + 1
+    for trait in carte.traits:
+        if trait in BONUS_FAMILLES:
+            familles_count[trait] = familles_count.get(trait, 0) + 1
+    for famille, count in familles_count.items():
+        if famille in ["Assassin", "Guetteur", "Vengeuse", "Lanceur"]:
+            if count == 3:
+                score += 5.0
+            elif count == 2:
+                score += 3.0
+            elif count > 3:
+                score += 1.5
+        elif famille in ["Noble", "Clan", "Gobelin", "Revenant", "Ace", "Colosse", "Bagarreur"]:
+            if count == 2:
+                score += 4.0
+            elif count == 4:
+                score += 6.0
+            elif count == 3:
+                score += 2.0
+            elif count > 4:
+                score += 1.0
+    return score
+
+
+def recommandations_anciennes(game_session, options):
+    scores = []
+    for carte in options:
+        score = score_familles_ancien(game_session.etat.main, carte)
+        score += (5 - carte.cout) * 0.5
+        score += len([t for t in carte.traits if t in ['Ace', 'Noble']]) * 2
+        score += score_traits_ancien(carte, game_session.etat.main + game_session.etat.bench, game_session.weights)
+        scores.append(score)
+    return scores
+
+
+def recommandations_nouvelles(game_session, options, masque_bonus):
+    scores = []
+    for carte in options:
+        score = game_session.score_familles(carte)
+        score += (5 - carte.cout) * 0.5
+        score += (carte.masque & masque_bonus).bit_count() * 2
+        score += score_traits(carte, game_session.etat.main + game_session.etat.bench, game_session.weights)
+        scores.append(score)
+    return scores
+
+
+def etat_aleatoire(rng, taille_plateau, taille_banc):
+    noms = list(BIBLIOTHEQUE_CARTES)
+    game_session = GameSession()
+    for zone, taille in ((game_session.etat.main, taille_plateau), (game_session.etat.bench, taille_banc)):
+        for _ in range(taille):
+            base = BIBLIOTHEQUE_CARTES[rng.choice(noms)]
+            zone.append(Carte(base.nom, base.cout, base.traits, rng.randint(1, 3)))
+    options = []
+    for _ in range(3):
+        base = BIBLIOTHEQUE_CARTES[rng.choice(noms)]
+        options.append(Carte(base.nom, base.cout, base.traits, 1))
+    return game_session, options
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(7)
+    
+    # Les deux versions doivent donner exactement les mêmes scores
+    for _ in range(500):
+        game_session, options = etat_aleatoire(rng, rng.randint(0, 7), rng.randint(0, 5))
+        assert recommandations_anciennes(game_session, options) == \
+            recommandations_nouvelles(game_session, options, MASQUE_TRAITS_BONUS)
+    
+    print(f"{'Plateau + banc':<18}{'ancien µs':>12}{'masques µs':>12}{'gain':>8}")
+    for taille_plateau, taille_banc in ((2, 2), (6, 5), (7, 10)):
+        game_session, options = etat_aleatoire(rng, taille_plateau, taille_banc)
+        ancien = timeit.timeit(lambda: recommandations_anciennes(game_session, options),
+                               number=repetitions) / repetitions * 1e6
+        nouveau = timeit.timeit(lambda: recommandations_nouvelles(game_session, options, MASQUE_TRAITS_BONUS),
+                                number=repetitions) / repetitions * 1e6
+        print(f"{f'{taille_plateau} + {taille_banc}':<18}{ancien:>12.1f}{nouveau:>12.1f}{ancien / nouveau:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
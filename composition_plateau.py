@@ -0,0 +1,133 @@
+"""
+Choix des cartes à mettre sur le plateau parmi celles possédées (plateau + banc)
+
+Séparation exacte plateau / banc par séparation et évaluation sur les masques
+de noms : la valeur d'une composition est le score de synergie de ses noms
+distincts (table_familles) plus la somme des niveaux (étoiles) posés.
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Dict, List
+
+from main import BITS_NOMS, INDICES_MASQUE, MASQUES_CARTES, NB_FAMILLES, SCORE_SYNERGIE, Carte
+from table_familles import MAX_NOMS_TABLE, table_partagee
+
+# Pour la borne : meilleur gain moyen par nom ajouté à une famille qui en a déjà c (0..7),
+# quel que soit le nombre de noms ajoutés ensuite (gain de t noms <= t × gain moyen)
+GAIN_MOYEN_FAMILLE = [[max(0.0, max((ligne[min(c + t, 5)] - ligne[min(c, 5)]) / t
+                                    for t in range(1, MAX_NOMS_TABLE + 1)))
+                       for c in range(MAX_NOMS_TABLE + 1)] for ligne in SCORE_SYNERGIE]
+
+
+@dataclass
+class CompositionPlateau:
+    plateau: List[Carte]
+    banc: List[Carte]
+    score: float
+    score_familles: float
+    score_niveaux: float
+    paliers: Dict[str, int]
+    noeuds: int = 0  # compositions examinées
+    changements: bool = False  # le plateau proposé diffère du plateau actuel
+
+
+def composition_optimale(plateau: List[Carte], banc: List[Carte], taille_max: int,
+                         poids_familles: float = 1.0, poids_niveau: float = 1.0) -> CompositionPlateau:
+    """Meilleure répartition des cartes possédées avec au plus `taille_max` cartes sur le plateau
+    
+    Deux cartes identiques (nom, niveau) ne sont jamais posées ensemble (elles
+    fusionneraient) ; à valeur égale, le plateau actuel est conservé.
+    """
+    table = table_partagee()
+    taille_max = min(taille_max, MAX_NOMS_TABLE)
+    possedees = list(plateau) + list(banc)
+    
+    # Niveaux distincts disponibles par nom (du plus haut au plus bas)
+    niveaux = {}
+    for carte in possedees:
+        if carte.nom in BITS_NOMS and MASQUES_CARTES[carte.nom] == carte.masque:
+            niveaux.setdefault(carte.nom, set()).add(carte.niveau)
+    noms = sorted(niveaux, key=lambda nom: -max(niveaux[nom]))
+    niveaux = [sorted(niveaux[nom], reverse=True) for nom in noms]
+    masques = [MASQUES_CARTES[nom] for nom in noms]
+    n = len(noms)
+    
+    # Niveaux des copies supplémentaires (même nom, autre niveau) à partir du i-ème nom
+    supplements_suffixe = [[] for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        supplements_suffixe[i] = sorted(supplements_suffixe[i + 1] + niveaux[i][1:], reverse=True)[:taille_max]
+    
+    # Plateau actuel comme première solution (conservé en cas d'égalité)
+    meilleur = None
+    actuel = {(c.nom, c.niveau) for c in plateau}
+    if len(actuel) == len(plateau) <= taille_max and all(nom in noms for nom, _ in actuel):
+        masque_actuel = 0
+        for nom, _ in actuel:
+            masque_actuel |= BITS_NOMS[nom]
+        meilleur_score = (poids_familles * table.score(masque_actuel)
+                          + poids_niveau * sum(niveau for _, niveau in actuel))
+        meilleur = [(c.nom, c.niveau) for c in plateau]
+    else:
+        meilleur_score = float('-inf')
+    
+    noeuds = 0
+    choix = []  # indices des noms posés
+    familles = [0] * NB_FAMILLES
+    
+    def explorer(i: int, masque_noms: int, niveaux_poses: int, supplements: List[int]):
+        nonlocal meilleur_score, meilleur, noeuds
+        noeuds += 1
+        places = taille_max - len(choix)
+        # Noms posés (un exemplaire au meilleur niveau), places restantes complétées par des copies
+        base = poids_familles * table.score(masque_noms) + poids_niveau * niveaux_poses
+        score = base + poids_niveau * sum(heapq.nlargest(places, supplements))
+        if score > meilleur_score + 1e-9:
+            meilleur_score = score
+            meilleur = [(noms[j], niveau) for j in choix for niveau in niveaux[j][:1]]
+            meilleur += [(noms[j], niveau) for j, niveau in heapq.nlargest(
+                places, ((j, niveau) for j in choix for niveau in niveaux[j][1:]), key=lambda x: x[1])]
+        if places == 0 or i == n:
+            return
+        
+        # Borne : chaque place restante reçoit soit un nouveau nom (son niveau + le
+        # gain moyen maximal de ses familles), soit une copie supplémentaire
+        gains = [poids_familles * sum(GAIN_MOYEN_FAMILLE[f][familles[f]] for f in INDICES_MASQUE[masques[j]])
+                 + poids_niveau * niveaux[j][0] for j in range(i, n)]
+        gains += [poids_niveau * niveau for niveau in supplements + supplements_suffixe[i]]
+        if base + sum(heapq.nlargest(places, gains)) <= meilleur_score + 1e-9:
+            return
+        
+        for j in range(i, n):
+            choix.append(j)
+            for f in INDICES_MASQUE[masques[j]]:
+                familles[f] += 1
+            explorer(j + 1, masque_noms | BITS_NOMS[noms[j]], niveaux_poses + niveaux[j][0],
+                     supplements + niveaux[j][1:])
+            for f in INDICES_MASQUE[masques[j]]:
+                familles[f] -= 1
+            choix.pop()
+    
+    explorer(0, 0, 0, [])
+    
+    # Cartes réelles : garder en priorité celles déjà sur le plateau
+    restantes = {}
+    for carte in possedees:
+        restantes.setdefault((carte.nom, carte.niveau), []).append(carte)
+    nouveau_plateau = [restantes[cle].pop(0) for cle in (meilleur or [])]
+    nouveau_banc = [carte for carte in possedees if not any(carte is c for c in nouveau_plateau)]
+    
+    masque_final = 0
+    for carte in nouveau_plateau:
+        masque_final |= BITS_NOMS[carte.nom]
+    niveaux_final = sum(carte.niveau for carte in nouveau_plateau)
+    return CompositionPlateau(
+        plateau=nouveau_plateau,
+        banc=nouveau_banc,
+        score=poids_familles * table.score(masque_final) + poids_niveau * niveaux_final,
+        score_familles=table.score(masque_final),
+        score_niveaux=niveaux_final,
+        paliers=table.paliers(masque_final),
+        noeuds=noeuds,
+        changements=sorted((c.nom, c.niveau) for c in nouveau_plateau) != sorted((c.nom, c.niveau) for c in plateau),
+    )
@@ -1,8 +1,39 @@
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from collections.abc import MutableSequence
+from dataclasses import dataclass, field
+from functools import cached_property
+from itertools import islice
+from typing import Any, Callable, List, Dict, Optional, Tuple
 import json
 import os
 
+from probabilites_pool import HORIZON_TOURS, disponibilites_table, table_pool
+
+try:
+    import numpy as np
+except ImportError:  # Le scoreur vectorisé est optionnel : repli sur les fonctions scalaires
+    np = None
+
+# Familles (traits) : un bit par famille, dans l'ordre de BONUS_FAMILLES
+FAMILLES = ("Noble", "Clan", "Gobelin", "Revenant", "Ace", "Colosse",
+            "Assassin", "Guetteur", "Bagarreur", "Vengeuse", "Lanceur")
+NB_FAMILLES = len(FAMILLES)
+BITS_FAMILLES = {famille: 1 << i for i, famille in enumerate(FAMILLES)}
+# Indices des familles présentes dans chaque masque possible (2048 entrées)
+INDICES_MASQUE = [tuple(i for i in range(NB_FAMILLES) if masque >> i & 1) for masque in range(1 << NB_FAMILLES)]
+
+_masques_traits = {}
+
+def masque_traits(traits) -> int:
+    """Masque de bits des familles d'une liste de traits (traits inconnus ignorés)"""
+    cle = tuple(traits)
+    masque = _masques_traits.get(cle)
+    if masque is None:
+        masque = 0
+        for trait in cle:
+            masque |= BITS_FAMILLES.get(trait, 0)
+        _masques_traits[cle] = masque
+    return masque
+
 @dataclass
 class Carte:
     nom: str
@@ -12,6 +43,265 @@ class Carte:
     
     def __str__(self):
         return f"{self.nom} (Coût: {self.cout}, Traits: {', '.join(self.traits)}, Niveau: {self.niveau})"
+    
+    @cached_property
+    def masque(self) -> int:
+        return masque_traits(self.traits)
+
+class ZoneCartes(MutableSequence):
+    """Liste ordonnée de cartes (banc ou plateau) indexée par (nom, niveau)
+    
+    Se comporte comme une liste, mais chaque carte occupe un emplacement
+    numéroté dans un dict ordonné : l'index (nom, niveau) -> emplacements
+    reste à jour à chaque modification, et compter / trouver / retirer une
+    carte par (nom, niveau) se fait en O(1) sans décaler la liste.
+    Les familles sont comptées de la même façon, par nom distinct (deux cartes
+    identiques = 1 unité), avec les paliers de bonus actifs qui en découlent.
+    Les cartes ne doivent pas être modifiées en place : les remplacer.
+    """
+    
+    def __init__(self, cartes=()):
+        self._cartes = {}  # emplacement -> carte, dans l'ordre de gauche à droite
+        self._index = {}   # (nom, niveau) -> {emplacement: None}, dans le même ordre
+        self._noms = {}    # nom -> [nombre de cartes, masque des familles], compteur de références
+        self._familles = [0] * NB_FAMILLES  # noms distincts par famille
+        self._cartes_familles = [0] * NB_FAMILLES  # cartes par famille, doublons compris
+        self._synergie = 0.0  # somme des SCORE_SYNERGIE sur _cartes_familles
+        self._paliers = {}   # famille -> palier de bonus actif
+        self._masque_noms = 0  # bits (BITS_NOMS) des noms présents
+        self._noms_hors_table = 0  # noms absents du catalogue (ou traits modifiés)
+        self._prochain = 0
+        for carte in cartes:
+            self.append(carte)
+    
+    # --- Index (nom, niveau) ---
+    
+    def compter(self, nom: str, niveau: int) -> int:
+        return len(self._index.get((nom, niveau), ()))
+    
+    def trouver(self, nom: str, niveau: int, depuis_droite: bool = False) -> Optional[Carte]:
+        emplacements = self._index.get((nom, niveau))
+        if not emplacements:
+            return None
+        emplacement = next(reversed(emplacements)) if depuis_droite else next(iter(emplacements))
+        return self._cartes[emplacement]
+    
+    def retirer(self, nom: str, niveau: int, depuis_droite: bool = False) -> Optional[Carte]:
+        """Retirer la première carte (nom, niveau) en partant de la gauche, ou de la droite"""
+        emplacements = self._index.get((nom, niveau))
+        if not emplacements:
+            return None
+        emplacement = next(reversed(emplacements)) if depuis_droite else next(iter(emplacements))
+        return self._liberer(emplacement)
+    
+    def comptes(self) -> Dict[Tuple[str, int], int]:
+        """Nombre de cartes par (nom, niveau)"""
+        return {cle: len(emplacements) for cle, emplacements in self._index.items()}
+    
+    def familles(self) -> Dict[str, int]:
+        """Nombre de noms distincts par famille"""
+        return {FAMILLES[i]: nombre for i, nombre in enumerate(self._familles) if nombre}
+    
+    def compteurs_familles(self, distinctes: bool = True) -> List[int]:
+        """Copie du tableau des compteurs par famille (indices de FAMILLES)"""
+        return list(self._familles if distinctes else self._cartes_familles)
+    
+    def score_synergie(self, masque: int = 0) -> float:
+        """Score de synergie des familles si une carte de ce masque était ajoutée
+        
+        Seules les familles du masque changent : O(nombre de bits).
+        """
+        score = self._synergie
+        for i in INDICES_MASQUE[masque]:
+            nombre = self._cartes_familles[i]
+            score += SCORE_SYNERGIE[i][min(nombre + 1, 5)] - SCORE_SYNERGIE[i][min(nombre, 5)]
+        return score
+    
+    def _compter_cartes_familles(self, masque: int, delta: int):
+        cartes_familles = self._cartes_familles
+        for i in INDICES_MASQUE[masque]:
+            nombre = cartes_familles[i]
+            apres = nombre + delta
+            cartes_familles[i] = apres
+            if nombre < 5 or apres < 5:  # Au-delà de 5 cartes le score ne change plus
+                scores = SCORE_SYNERGIE[i]
+                self._synergie += scores[apres if apres < 5 else 5] - scores[nombre if nombre < 5 else 5]
+    
+    def masque_noms(self) -> Optional[int]:
+        """Masque des noms distincts présents (None si un nom n'est pas dans le catalogue)"""
+        return None if self._noms_hors_table else self._masque_noms
+    
+    def noms_distincts(self) -> bool:
+        """Aucun nom en double dans la zone"""
+        return len(self._cartes) == len(self._noms)
+    
+    def paliers_familles(self) -> Dict[str, int]:
+        """Paliers de bonus de familles atteints (famille -> 2, 3 ou 4)"""
+        return dict(self._paliers)
+    
+    def _compter_familles(self, masque: int, delta: int):
+        familles = self._familles
+        for i in INDICES_MASQUE[masque]:
+            nombre = familles[i]
+            apres = nombre + delta
+            familles[i] = apres
+            # Le palier ne change qu'en franchissant un seuil (aucun au-delà de 4)
+            paliers = PALIERS_PAR_NOMBRE[i]
+            palier = paliers[apres if apres < 4 else 4]
+            if palier != paliers[nombre if nombre < 4 else 4]:
+                if palier:
+                    self._paliers[FAMILLES[i]] = palier
+                else:
+                    del self._paliers[FAMILLES[i]]
+    
+    def _indexer(self, emplacement: int, carte: Carte):
+        masque = carte.masque
+        self._compter_cartes_familles(masque, 1)
+        reference = self._noms.get(carte.nom)
+        if reference is None:
+            self._noms[carte.nom] = [1, masque]
+            self._compter_familles(masque, 1)
+            self._compter_nom(carte.nom, masque, 1)
+        else:
+            reference[0] += 1
+        
+        emplacements = self._index.setdefault((carte.nom, carte.niveau), {})
+        if emplacements and emplacement < next(reversed(emplacements)):
+            # Remplacement au milieu de la zone : garder les emplacements triés
+            emplacements[emplacement] = None
+            self._index[(carte.nom, carte.niveau)] = dict.fromkeys(sorted(emplacements))
+        else:
+            emplacements[emplacement] = None
+    
+    def _desindexer(self, emplacement: int, carte: Carte):
+        cle = (carte.nom, carte.niveau)
+        del self._index[cle][emplacement]
+        if not self._index[cle]:
+            del self._index[cle]
+        
+        self._compter_cartes_familles(carte.masque, -1)
+        reference = self._noms[carte.nom]
+        reference[0] -= 1
+        if reference[0] == 0:
+            del self._noms[carte.nom]
+            self._compter_familles(reference[1], -1)
+            self._compter_nom(carte.nom, reference[1], -1)
+    
+    def _compter_nom(self, nom: str, masque: int, delta: int):
+        if nom in BITS_NOMS and MASQUES_CARTES[nom] == masque:
+            self._masque_noms ^= BITS_NOMS[nom]
+        else:
+            self._noms_hors_table += delta
+    
+    def _liberer(self, emplacement: int) -> Carte:
+        carte = self._cartes.pop(emplacement)
+        self._desindexer(emplacement, carte)
+        return carte
+    
+    def _emplacement(self, position: int) -> int:
+        # Les extrémités (carte la plus à gauche / à droite) sont en O(1)
+        taille = len(self._cartes)
+        if position < 0:
+            position += taille
+        if not 0 <= position < taille:
+            raise IndexError("position hors de la zone")
+        if position == 0:
+            return next(iter(self._cartes))
+        if position == taille - 1:
+            return next(reversed(self._cartes))
+        return next(islice(self._cartes, position, None))
+    
+    # --- Interface de liste ---
+    
+    def __len__(self) -> int:
+        return len(self._cartes)
+    
+    def __iter__(self):
+        return iter(self._cartes.values())
+    
+    def __reversed__(self):
+        return reversed(self._cartes.values())
+    
+    def __contains__(self, carte) -> bool:
+        return any(self._cartes[e] == carte for e in self._index.get((carte.nom, carte.niveau), ()))
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return list(self._cartes.values())[position]
+        return self._cartes[self._emplacement(position)]
+    
+    def __setitem__(self, position, carte):
+        if isinstance(position, slice):
+            cartes = list(self._cartes.values())
+            cartes[position] = carte
+            self.clear()
+            self.extend(cartes)
+            return
+        # Remplacement sur place : la carte garde sa position
+        emplacement = self._emplacement(position)
+        self._desindexer(emplacement, self._cartes[emplacement])
+        self._cartes[emplacement] = carte
+        self._indexer(emplacement, carte)
+    
+    def __delitem__(self, position):
+        if isinstance(position, slice):
+            self[position] = []
+            return
+        self._liberer(self._emplacement(position))
+    
+    def insert(self, position: int, carte: Carte):
+        if position >= len(self._cartes):
+            self.append(carte)
+            return
+        cartes = list(self._cartes.values())
+        cartes.insert(position, carte)
+        self[:] = cartes
+    
+    def append(self, carte: Carte):
+        self._cartes[self._prochain] = carte
+        self._indexer(self._prochain, carte)
+        self._prochain += 1
+    
+    def pop(self, position: int = -1) -> Carte:
+        return self._liberer(self._emplacement(position))
+    
+    def remove(self, carte: Carte):
+        for emplacement in self._index.get((carte.nom, carte.niveau), ()):
+            if self._cartes[emplacement] == carte:
+                self._liberer(emplacement)
+                return
+        raise ValueError(f"{carte.nom} niveau {carte.niveau} absent de la zone")
+    
+    def count(self, carte) -> int:
+        return sum(1 for e in self._index.get((carte.nom, carte.niveau), ()) if self._cartes[e] == carte)
+    
+    def clear(self):
+        self._cartes.clear()
+        self._index.clear()
+        self._noms.clear()
+        self._familles = [0] * NB_FAMILLES
+        self._cartes_familles = [0] * NB_FAMILLES
+        self._synergie = 0.0
+        self._paliers.clear()
+        self._masque_noms = 0
+        self._noms_hors_table = 0
+    
+    def copy(self) -> List[Carte]:
+        return list(self._cartes.values())
+    
+    def __add__(self, autre) -> List[Carte]:
+        return list(self) + list(autre)
+    
+    def __radd__(self, autre) -> List[Carte]:
+        return list(autre) + list(self)
+    
+    def __eq__(self, autre) -> bool:
+        if isinstance(autre, (ZoneCartes, list)):
+            return list(self) == list(autre)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return repr(list(self))
 
 @dataclass
 class EtatJeu:
@@ -21,6 +311,12 @@ class EtatJeu:
     historique_pool: Dict[str, int]
     max_cartes_plateau: int = 2  # Limite de cartes sur le plateau
     hp: int = 10  # Points de vie (HP), on perd à 0
+    
+    def __setattr__(self, nom, valeur):
+        # Plateau et banc restent indexés, même réassignés avec une simple liste
+        if nom in ("main", "bench") and not isinstance(valeur, ZoneCartes):
+            valeur = ZoneCartes(valeur)
+        super().__setattr__(nom, valeur)
 
 # Bibliothèque des cartes Merge Tactics
 BIBLIOTHEQUE_CARTES = {
@@ -53,6 +349,98 @@ BIBLIOTHEQUE_CARTES = {
     "Reine": Carte("Reine", 5, ["Clan", "Vengeuse"], 1),
 }
 
+def serialiser_carte(carte: Carte) -> list:
+    """Forme compacte d'une carte : [nom, niveau] si elle vient de la bibliothèque"""
+    base = BIBLIOTHEQUE_CARTES.get(carte.nom)
+    if base and base.cout == carte.cout and base.traits == carte.traits:
+        return [carte.nom, carte.niveau]
+    return [carte.nom, carte.niveau, carte.cout, carte.traits]
+
+def deserialiser_carte(data: list) -> Carte:
+    if len(data) == 2:
+        base = BIBLIOTHEQUE_CARTES[data[0]]
+        return Carte(base.nom, base.cout, base.traits, data[1])
+    nom, niveau, cout, traits = data
+    return Carte(nom, cout, traits, niveau)
+
+# Fusions : 3 cartes identiques sur le banc, 2 sur le plateau
+NIVEAU_MAX = 5
+TAILLE_FUSION_BANC = 3
+TAILLE_FUSION_PLATEAU = 2
+
+def resoudre_fusions(cartes: List[Carte], taille_fusion: int = TAILLE_FUSION_BANC,
+                     niveau_max: int = NIVEAU_MAX) -> List[Tuple[str, int]]:
+    """Résout toute la cascade de fusions d'une zone en une passe
+    
+    Compte les cartes par (nom, niveau) puis propage les fusions niveau par
+    niveau, comme une retenue. La liste est modifiée en place : les cartes
+    consommées sont retirées (les plus anciennes d'abord) et les cartes
+    fusionnées ajoutées à la fin. Retourne les fusions [(nom, niveau obtenu)].
+    """
+    compteur = {}
+    for carte in cartes:
+        cle = (carte.nom, carte.niveau)
+        compteur[cle] = compteur.get(cle, 0) + 1
+    
+    fusions = []
+    for (nom, niveau) in [cle for cle, nombre in compteur.items() if nombre >= taille_fusion]:
+        # Retenue vers les niveaux supérieurs tant qu'il y a de quoi fusionner
+        while niveau < niveau_max:
+            nb_fusions = compteur.get((nom, niveau), 0) // taille_fusion
+            if not nb_fusions:
+                break
+            compteur[(nom, niveau)] -= nb_fusions * taille_fusion
+            compteur[(nom, niveau + 1)] = compteur.get((nom, niveau + 1), 0) + nb_fusions
+            fusions.extend([(nom, niveau + 1)] * nb_fusions)
+            niveau += 1
+    
+    if not fusions:
+        return fusions
+    
+    if isinstance(cartes, ZoneCartes):
+        # Zone indexée : retirer les cartes consommées et ajouter les nouvelles, sans tout réindexer
+        modeles = {nom: cartes.trouver(nom, niveau) for nom, niveau in compteur if cartes.compter(nom, niveau)}
+        for (nom, niveau), nombre in list(compteur.items()):
+            presentes = cartes.compter(nom, niveau)
+            for _ in range(presentes - min(nombre, presentes)):
+                cartes.retirer(nom, niveau)
+            compteur[(nom, niveau)] = nombre - min(nombre, presentes)
+        for (nom, niveau), nombre in compteur.items():
+            modele = modeles[nom]
+            for _ in range(nombre):
+                cartes.append(Carte(nom, modele.cout, modele.traits.copy(), niveau))
+        return fusions
+    
+    # Garder les cartes d'origine les plus récentes, dans leur ordre
+    conservees = []
+    for carte in reversed(cartes):
+        cle = (carte.nom, carte.niveau)
+        if compteur[cle] > 0:
+            compteur[cle] -= 1
+            conservees.append(carte)
+    conservees.reverse()
+    
+    # Ce qui reste dans le compteur correspond aux cartes créées par fusion
+    modeles = {}
+    for carte in cartes:
+        modeles.setdefault(carte.nom, carte)
+    for (nom, niveau), nombre in compteur.items():
+        modele = modeles[nom]
+        conservees.extend(Carte(nom, modele.cout, modele.traits.copy(), niveau) for _ in range(nombre))
+    
+    cartes[:] = conservees
+    return fusions
+
+@dataclass
+class ResultatFusions:
+    fusions: List[Tuple[str, int]] = field(default_factory=list)  # (nom, niveau obtenu)
+    elixir_gagne: int = 0
+    bonus_leader: int = 0
+    
+    @property
+    def nombre(self) -> int:
+        return len(self.fusions)
+
 # Modificateurs de partie (27 modificateurs + 1 aléatoire)
 MODIFICATEURS_PARTIE = {
     "plein_les_poches": "Tous les leaders commencent avec +5 élixir",
@@ -85,6 +473,28 @@ MODIFICATEURS_PARTIE = {
     # + 1 modificateur aléatoire généré par le jeu
 }
 
+# Coût de la troupe 2⭐ reçue au départ avec les modificateurs étoile
+COUT_CARTE_ETOILE = {
+    "etoile_rare": 2,
+    "etoile_epique": 3,
+    "etoile_légendaire": 4,
+    "etoile_de_champion": 5
+}
+
+# Questions posées par la CLI pour les modificateurs actifs (voir poser_question_modificateur)
+QUESTIONS_DEBUT_TOUR = {
+    "banc_de_pandore": "pandore",
+    "promotion": "promotion",
+    "cheaté": "cheate",
+}
+QUESTIONS_FIN_TOUR = {
+    "heritage": "heritage",
+    "tu_es_a_moi": "copie_ennemi",
+    "rester_en_vie": "mannequin_survie",
+    "bonne_affaire": "ventes",
+    "offre_a_saisir": "magasin_reset",
+}
+
 # Bonus des familles/traits (2 cartes = bonus 1, 4 cartes = bonus 2)
 BONUS_FAMILLES = {
     "Noble": {
@@ -129,6 +539,116 @@ BONUS_FAMILLES = {
     }
 }
 
+# Seuils d'activation de chaque famille (2 et 4, ou 3 seulement)
+SEUILS_FAMILLES = {famille: sorted(paliers, reverse=True) for famille, paliers in BONUS_FAMILLES.items()}
+
+def palier_famille(famille: str, nombre: int) -> int:
+    """Palier de bonus atteint avec `nombre` cartes distinctes de la famille (0 si aucun)"""
+    for seuil in SEUILS_FAMILLES.get(famille, ()):
+        if nombre >= seuil:
+            return seuil
+    return 0
+
+def _score_synergie(famille: str, nombre: int) -> float:
+    if SEUILS_FAMILLES[famille] == [3]:
+        # Familles qui activent à 3 cartes uniquement
+        return {2: 3.0, 3: 5.0}.get(nombre, 1.5 if nombre > 3 else 0.0)
+    # Familles qui activent à 2 et 4 cartes
+    return {2: 4.0, 3: 2.0, 4: 6.0}.get(nombre, 1.0 if nombre > 4 else 0.0)
+
+# Score de synergie par famille selon le nombre de cartes (5 = "plus de 4")
+SCORE_SYNERGIE = [[_score_synergie(famille, nombre) for nombre in range(6)] for famille in FAMILLES]
+# Palier de chaque famille selon le nombre de noms distincts (4 = "4 ou plus")
+PALIERS_PAR_NOMBRE = [[palier_famille(famille, nombre) for nombre in range(5)] for famille in FAMILLES]
+
+# Masques précalculés des cartes de la bibliothèque
+MASQUES_CARTES = {nom: carte.masque for nom, carte in BIBLIOTHEQUE_CARTES.items()}
+# Un bit par nom de carte (compositions de plateau, voir table_familles.py)
+BITS_NOMS = {nom: 1 << i for i, nom in enumerate(BIBLIOTHEQUE_CARTES)}
+# Coûts des cartes, pour estimer les prochaines boutiques (probabilites_pool.py, simulation_boutique.py)
+COUTS_CARTES = tuple((nom, carte.cout) for nom, carte in BIBLIOTHEQUE_CARTES.items())
+
+def max_cartes_plateau(tour: int, modificateurs: List[str]) -> int:
+    """Limite de cartes sur le plateau selon le tour et les modificateurs"""
+    # Base : 2 au tour 1, puis +1 par tour (max 6)
+    base_max = min(2 + (tour - 1), 6)
+    
+    # Modificateur "plus_on_est_de_fous" : +1 carte (max 7)
+    if "plus_on_est_de_fous" in modificateurs:
+        base_max = min(base_max + 1, 7)
+    
+    # Modificateur "la_fete" : toujours 6 cartes
+    if "la_fete" in modificateurs:
+        base_max = 6
+    
+    return base_max
+
+# Poids du score des nouvelles sessions ; un profil réglé hors ligne (reglage_poids.py) peut les remplacer
+POIDS_PAR_DEFAUT = {
+    "traits": 2.0,
+    "merge": 2.0,
+    "fusion_sell": 3.0,
+    "disruption": 1.0,
+    "cost": 1.0,
+    "familles": 1.0
+}
+FORMAT_PROFIL_POIDS = 1
+DOSSIER_PROFILS_POIDS = os.path.join("data", "poids")
+_poids_session = dict(POIDS_PAR_DEFAUT)
+
+def chemin_profil_poids(version: int, dossier: str = DOSSIER_PROFILS_POIDS) -> str:
+    return os.path.join(dossier, f"profil_v{version}.json")
+
+def versions_profils_poids(dossier: str = DOSSIER_PROFILS_POIDS) -> List[int]:
+    """Versions des profils de poids présents dans le dossier, par ordre croissant"""
+    try:
+        fichiers = os.listdir(dossier)
+    except OSError:
+        return []
+    return sorted(int(f[len("profil_v"):-len(".json")]) for f in fichiers
+                  if f.startswith("profil_v") and f.endswith(".json") and f[len("profil_v"):-len(".json")].isdigit())
+
+def lire_profil_poids(chemin: str) -> Dict:
+    """Profil de poids lu et vérifié (format, clés connues) ; ValueError s'il est incompatible"""
+    with open(chemin, encoding="utf-8") as f:
+        profil = json.load(f)
+    poids = profil["weights"]
+    if profil.get("format") != FORMAT_PROFIL_POIDS or not set(poids) <= set(POIDS_PAR_DEFAUT):
+        raise ValueError(f"profil de poids incompatible : {chemin}")
+    return profil
+
+def charger_profil_poids(chemin: Optional[str] = None, dossier: str = DOSSIER_PROFILS_POIDS) -> Optional[Dict]:
+    """Utiliser un profil de poids pour les nouvelles sessions (le plus récent accepté du dossier par défaut)
+    
+    Les profils rejetés par reglage_poids.py (moins bons que les poids par défaut en
+    validation) sont sautés. MERGE_TACTICS_WEIGHTS_PROFILE fixe le fichier. Renvoie le
+    profil chargé, ou None (poids par défaut) s'il n'y en a pas ou qu'il est invalide.
+    """
+    global _poids_session
+    chemin = chemin or os.environ.get("MERGE_TACTICS_WEIGHTS_PROFILE")
+    _poids_session = dict(POIDS_PAR_DEFAUT)
+    try:
+        if chemin:
+            profil = lire_profil_poids(chemin)
+        else:
+            profil = None
+            for version in reversed(versions_profils_poids(dossier)):
+                candidat = lire_profil_poids(chemin_profil_poids(version, dossier))
+                if candidat.get("accepte", True):
+                    profil = candidat
+                    break
+            if profil is None:
+                return None
+        _poids_session.update({cle: float(valeur) for cle, valeur in profil["weights"].items()})
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"⚠️ Profil de poids ignoré ({e})")
+        return None
+    return profil
+
+def poids_session() -> Dict[str, float]:
+    """Poids du score pour une nouvelle session (copie)"""
+    return dict(_poids_session)
+
 # Suppression du mode normal - Merge Tactics seulement
 class GameSession:
     def __init__(self):
@@ -140,13 +660,7 @@ class GameSession:
             max_cartes_plateau=2,  # Initialisation explicite
             hp=10  # Points de vie initiaux
         )
-        self.weights = {
-            "traits": 2.0,
-            "merge": 2.0,
-            "fusion_sell": 3.0,
-            "disruption": 1.0,
-            "cost": 1.0
-        }
+        self.weights = poids_session()
         self.tour = 1
         self.elixir_par_tour = 4
         self.cartes_initiales = 1
@@ -181,67 +695,79 @@ class GameSession:
         self.extracteur_stock = 0
         self.premiere_carte_gratuite = False
         self.mannequin_actif = False
+        self.mannequin_special = False
+        self.copie_ennemi_prise = False  # Tu es à moi : une seule copie par partie
+        self.capitaine_ace = None  # Nom du capitaine, choisi au premier bonus Ace
+        self.achats_tour = 0  # Achats du tour en cours (modificateurs de premier achat)
+        # Élixir mis de côté pour le tour suivant (voir BONUS_TOUR_SUIVANT)
+        self.interets_stockes = 0
+        self.bonus_ventes = 0
+        self.gobelin_bonus_elixir = 0
+    
+    def effets(self, etape: str) -> Tuple[Callable, ...]:
+        """Effets des modificateurs actifs à cette étape (voir EFFETS_MODIFICATEURS)"""
+        return effets_compiles(tuple(self.modificateurs_actifs))[etape]
+    
+    def to_dict(self) -> Dict:
+        """Sérialise la session sous une forme JSON compacte (cartes en [nom, niveau])"""
+        data = {}
+        for attribut, valeur in vars(self).items():
+            if attribut in ("etat", "leaders_disponibles", "bibliotheque_cartes"):
+                continue
+            if attribut == "leader_choisi" and valeur and valeur.get("nom") in self.leaders_disponibles:
+                valeur = valeur["nom"]  # Les leaders sont constants : seul le nom est stocké
+            data[attribut] = valeur
+        
+        data["etat"] = {
+            "elixir": self.etat.elixir,
+            "main": [serialiser_carte(c) for c in self.etat.main],
+            "bench": [serialiser_carte(c) for c in self.etat.bench],
+            "historique_pool": self.etat.historique_pool,
+            "max_cartes_plateau": self.etat.max_cartes_plateau,
+            "hp": self.etat.hp
+        }
+        data["mode_choisi"] = hasattr(self, "bibliotheque_cartes")
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GameSession':
+        """Reconstruit une session à partir de to_dict()"""
+        data = dict(data)
+        etat = data.pop("etat")
+        game_session = cls()
+        if data.pop("mode_choisi", False):
+            game_session.bibliotheque_cartes = BIBLIOTHEQUE_CARTES
+        
+        for attribut, valeur in data.items():
+            if attribut == "leader_choisi" and isinstance(valeur, str):
+                valeur = game_session.leaders_disponibles.get(valeur)
+            setattr(game_session, attribut, valeur)
+        
+        game_session.etat = EtatJeu(
+            elixir=etat["elixir"],
+            main=[deserialiser_carte(c) for c in etat["main"]],
+            bench=[deserialiser_carte(c) for c in etat["bench"]],
+            historique_pool=etat["historique_pool"],
+            max_cartes_plateau=etat["max_cartes_plateau"],
+            hp=etat["hp"]
+        )
+        return game_session
     
     def calculer_max_cartes_plateau(self):
         """Calcule la limite de cartes sur le plateau selon le tour et les modificateurs"""
-        # Base : 2 au tour 1, puis +1 par tour (max 6)
-        base_max = min(2 + (self.tour - 1), 6)
-        
-        # Modificateur "plus_on_est_de_fous" : +1 carte (max 7)
-        if "plus_on_est_de_fous" in self.modificateurs_actifs:
-            base_max = min(base_max + 1, 7)
-        
-        # Modificateur "la_fete" : toujours 6 cartes
-        if "la_fete" in self.modificateurs_actifs:
-            base_max = 6
-        
-        self.etat.max_cartes_plateau = base_max
-        return base_max
+        self.etat.max_cartes_plateau = max_cartes_plateau(self.tour, self.modificateurs_actifs)
+        return self.etat.max_cartes_plateau
     
     def gerer_resultat_bataille(self, victoire=True, troupes_adverses_restantes=0):
         """Gère le résultat d'une bataille (victoire ou défaite) et avance le tour"""
-        elixir_gagne = 0
-        hp_perdus = 0
-        message = ""
-        game_over = False
-        
-        if victoire:
-            message = "🎉 Victoire ! Bien joué !"
-            # Pas de bonus d'élixir pour les victoires actuellement
-        else:
-            # Calcul des dégâts : -1 HP (défaite) + nombre de troupes adverses restantes
-            hp_perdus = 1 + troupes_adverses_restantes
-            self.etat.hp -= hp_perdus
-            
-            message = f"💀 Défaite... -{hp_perdus} HP ({1} défaite + {troupes_adverses_restantes} troupes adverses)"
-            
-            # Vérifier si le joueur est éliminé
-            if self.etat.hp <= 0:
-                self.etat.hp = 0
-                game_over = True
-                message += " 💥 GAME OVER ! Vous êtes éliminé !"
-            
-            # Appliquer bonus du leader pour défaite
-            if self.leader_choisi and self.leader_choisi['bonus_defeat'] > 0:
-                elixir_leader = self.leader_choisi['bonus_defeat']
-                elixir_gagne += elixir_leader
-                self.etat.elixir += elixir_leader
-                message += f" +{elixir_leader} élixir (Leader: {self.leader_choisi['nom']})"
-        
-        # Avancer le tour si le jeu n'est pas terminé
-        if not game_over:
-            self.tour += 1
-            elixir_tour = self.elixir_par_tour
-            elixir_gagne += elixir_tour
-            self.etat.elixir += elixir_tour
-            message += f" → Tour {self.tour} | +{elixir_tour} élixir"
-        
+        elixir_avant = self.etat.elixir
+        _, evenements = step(self, FinTour(victoire=victoire, troupes_adverses_restantes=troupes_adverses_restantes))
         return {
-            'elixir_gagne': elixir_gagne,
-            'hp_perdus': hp_perdus,
-            'message': message,
+            'elixir_gagne': self.etat.elixir - elixir_avant,
+            'hp_perdus': next((e.details['hp_perdus'] for e in evenements if e.type == "defaite"), 0),
+            'message': " ".join(e.message for e in evenements),
             'victoire': victoire,
-            'game_over': game_over,
+            'game_over': any(e.type == "game_over" for e in evenements),
             'hp_restants': self.etat.hp,
             'tour': self.tour
         }
@@ -290,6 +816,20 @@ class GameSession:
         
         return bonus_gagne
     
+    def fusionner(self, zone: str = "bench", details: str = "") -> ResultatFusions:
+        """Fusionne tout ce qui peut l'être dans une zone ("bench" ou "main")
+        
+        +1 élixir par fusion, et le bonus du leader une fois par action.
+        """
+        taille_fusion = TAILLE_FUSION_BANC if zone == "bench" else TAILLE_FUSION_PLATEAU
+        resultat = ResultatFusions(fusions=resoudre_fusions(getattr(self.etat, zone), taille_fusion))
+        if resultat.fusions:
+            resultat.elixir_gagne = resultat.nombre
+            self.etat.elixir += resultat.elixir_gagne
+            resultat.bonus_leader = self.appliquer_bonus_leader("merge", details)
+            resultat.elixir_gagne += resultat.bonus_leader
+        return resultat
+    
     def configuration_modificateurs(self):
         print("\n=== CONFIGURATION DES MODIFICATEURS ===")
         print("Configurons les modificateurs actifs pour cette partie...")
@@ -330,154 +870,102 @@ class GameSession:
                     self.modificateurs_actifs = []
         
         # Appliquer les modificateurs à l'état initial
-        self.appliquer_modificateurs()
+        for message in self.appliquer_modificateurs():
+            print(message)
         
         if self.modificateurs_actifs:
             print(f"\n✅ Modificateurs actifs: {', '.join(self.modificateurs_actifs)}")
         else:
             print("\n🔸 Aucun modificateur actif.")
     
-    def appliquer_modificateurs(self):
-        """Applique les effets des modificateurs sur l'état initial"""
+    def appliquer_modificateurs(self) -> List[str]:
+        """Applique les effets des modificateurs sur l'état initial (messages à afficher)"""
+        messages = []
+        effets = EFFETS_MODIFICATEURS["debut"]
         for mod in self.modificateurs_actifs:
-            if mod == "plein_les_poches":
-                self.etat.elixir += 5
-                print(f"🪙 Modificateur {mod}: +5 élixir de départ appliqué!")
-            elif mod == "plus_on_est_de_fous":
-                self.taille_equipe_max = 7
-                print(f"👥 Modificateur {mod}: Taille d'équipe augmentée à 7!")
-            elif mod == "la_fete":
-                self.taille_equipe_max = 6
-                self.taille_equipe_fixe = True
-                print(f"🎉 Modificateur {mod}: Taille d'équipe fixée à 6!")
-            elif mod in ["etoile_rare", "etoile_epique", "etoile_légendaire", "etoile_de_champion"]:
-                self.modificateur_etoile_debut = mod
-                print(f"⭐ Modificateur {mod}: Carte améliorée au début configurée!")
-            elif mod == "extracteur_elixir":
-                self.extracteur_actif = True
-                self.extracteur_stock = 0
-                print(f"⚡ Modificateur {mod}: Extracteur d'élixir activé!")
-            elif mod == "4_etoiles":
-                self.choix_par_tour = 6  # Double sélection
-                print(f"🌟 Modificateur {mod}: Sélection doublée (6 choix)!")
+            if mod in effets:
+                effets[mod](self, mod, messages)
+        return messages
+    
+    def afficher_evenements(self, evenements: List["Evenement"]):
+        for evenement in evenements:
+            print(evenement.message)
     
     def gerer_modificateurs_debut_tour(self):
         """Gère les effets des modificateurs en début de tour"""
-        # Miroir magique
-        if "miroir_magique" in self.modificateurs_actifs and self.etat.bench:
-            carte_droite = self.etat.bench[-1]
-            copie = Carte(carte_droite.nom, carte_droite.cout, carte_droite.traits, 1)
-            self.etat.bench.append(copie)
-            print(f"🪞 Miroir magique: Copie 1⭐ de {carte_droite.nom} ajoutée au banc!")
-        
-        # Banc de Pandore
-        if "banc_de_pandore" in self.modificateurs_actifs and self.etat.bench:
-            print(f"📦 Banc de Pandore: Troupe la plus à droite remplacée!")
-            print("Quelle nouvelle troupe du même coût avez-vous reçue?")
-            ancienne_carte = self.etat.bench[0]
-            nouvelle_carte = self.selectionner_carte(f"Nouvelle troupe (coût {ancienne_carte.cout}):")
-            if nouvelle_carte:
-                self.etat.bench[0] = nouvelle_carte
-        
-        # Promotion (transformation en coût +1)
-        if "promotion" in self.modificateurs_actifs and self.etat.bench:
-            print(f"⬆️ Promotion: Troupe la plus à droite transformée!")
-            ancienne_carte = self.etat.bench[-1]
-            nouveau_cout = ancienne_carte.cout + 1
-            print(f"Quelle troupe à {nouveau_cout} élixir avez-vous reçue?")
-            nouvelle_carte = self.selectionner_carte(f"Nouvelle troupe (coût {nouveau_cout}):")
-            if nouvelle_carte:
-                self.etat.bench[-1] = nouvelle_carte
-        
-        # Clairvoyance
-        if "clairvoyance" in self.modificateurs_actifs and len(self.etat.bench) == 0:
-            self.etat.elixir += 2
-            print(f"🔮 Clairvoyance: Banc vide, +2 élixir!")
-        
-        # Cheaté
-        if "cheaté" in self.modificateurs_actifs:
-            print(f"🎲 Cheaté: Troupe utile reçue!")
-            troupe_utile = self.selectionner_carte("Quelle troupe utile avez-vous reçue?")
-            if troupe_utile:
-                self.etat.bench.append(troupe_utile)
-        
-        # Ascension (round 3 spécifiquement)
-        if "ascension" in self.modificateurs_actifs and self.tour == 3 and self.etat.bench:
-            carte_droite = self.etat.bench[-1]
-            carte_droite.niveau = 3
-            print(f"🚀 Ascension: {carte_droite.nom} transformé en 3⭐!")
+        reponses = {}
+        for mod in self.modificateurs_actifs:
+            if mod in QUESTIONS_DEBUT_TOUR:
+                reponses.update(self.poser_question_modificateur(QUESTIONS_DEBUT_TOUR[mod]))
+        
+        _, evenements = step(self, DebutTour(**reponses))
+        self.afficher_evenements(evenements)
     
     def gerer_modificateurs_fin_tour(self):
-        """Gère les effets des modificateurs en fin de tour et questions post-round"""
+        """Pose les questions de fin de round puis passe au tour suivant"""
+        self.calculer_bonus_familles()
         
         # Questions liées aux modificateurs
-        questions_modificateurs = []
-        
-        if "heritage" in self.modificateurs_actifs:
-            questions_modificateurs.append("heritage")
-        if "tu_es_a_moi" in self.modificateurs_actifs:
-            questions_modificateurs.append("copie_ennemi")
-        if "rester_en_vie" in self.modificateurs_actifs:
-            questions_modificateurs.append("mannequin_survie")
-        if "bonne_affaire" in self.modificateurs_actifs:
-            questions_modificateurs.append("ventes")
-        if "offre_a_saisir" in self.modificateurs_actifs:
-            questions_modificateurs.append("magasin_reset")
+        questions_modificateurs = [QUESTIONS_FIN_TOUR[mod] for mod in self.modificateurs_actifs
+                                   if mod in QUESTIONS_FIN_TOUR]
         
         # Questions liées aux bonus de familles actifs
         if "Gobelin" in self.bonus_familles_actifs:
             questions_modificateurs.append("bonus_gobelin")
         if "Ace" in self.bonus_familles_actifs:
             questions_modificateurs.append("bonus_ace")
+        if self.extracteur_actif and self.extracteur_stock > 0:
+            questions_modificateurs.append("extracteur")
         
         # Poser les questions selon les modificateurs actifs
+        reponses = {}
         for question in questions_modificateurs:
-            self.poser_question_modificateur(question)
-        
-        # De plus en plus riche (calcul d'intérêts)
-        if "de_plus_en_plus_riche" in self.modificateurs_actifs:
-            interets = self.etat.elixir // 2
-            if interets > 0:
-                print(f"💎 De plus en plus riche: +{interets} élixir d'intérêt au prochain round!")
-                # On stocke pour l'appliquer au début du prochain tour
-                if not hasattr(self, 'interets_stockes'):
-                    self.interets_stockes = 0
-                self.interets_stockes += interets
-    
-    def poser_question_modificateur(self, type_question):
-        """Pose des questions spécifiques selon les modificateurs"""
-        if type_question == "heritage":
+            reponses.update(self.poser_question_modificateur(question))
+        
+        _, evenements = step(self, FinTour(**reponses))
+        self.afficher_evenements(evenements)
+    
+    def poser_question_modificateur(self, type_question) -> Dict[str, Any]:
+        """Pose des questions spécifiques selon les modificateurs (réponses pour DebutTour et FinTour)"""
+        if type_question == "pandore":
+            # Banc de Pandore : la troupe la plus à droite est remplacée
+            if self.etat.bench:
+                print("📦 Banc de Pandore: Quelle nouvelle troupe du même coût avez-vous reçue?")
+                carte = self.selectionner_carte(f"Nouvelle troupe (coût {self.etat.bench[0].cout}):")
+                return {"remplacement_pandore": carte.nom if carte else None}
+        
+        elif type_question == "promotion":
+            # Promotion (transformation en coût +1)
+            if self.etat.bench:
+                nouveau_cout = self.etat.bench[-1].cout + 1
+                print(f"⬆️ Promotion: Quelle troupe à {nouveau_cout} élixir avez-vous reçue?")
+                carte = self.selectionner_carte(f"Nouvelle troupe (coût {nouveau_cout}):")
+                return {"promotion": carte.nom if carte else None}
+        
+        elif type_question == "cheate":
+            carte = self.selectionner_carte("🎲 Cheaté: Quelle troupe utile avez-vous reçue?")
+            return {"troupe_cheatee": carte.nom if carte else None}
+        
+        elif type_question == "heritage":
             reponse = input("💀 Héritage: Un leader adverse est-il mort ce round? (o/n): ").strip().lower()
-            if reponse in ['o', 'oui', 'y', 'yes']:
-                self.etat.elixir += 5
-                print("💰 +5 élixir grâce à l'héritage!")
+            return {"leader_adverse_mort": reponse in ['o', 'oui', 'y', 'yes']}
         
         elif type_question == "copie_ennemi":
-            if not hasattr(self, 'copie_ennemi_prise'):
+            if not self.copie_ennemi_prise:
                 reponse = input("⚔️ Tu es à moi: Première troupe ennemie éliminée? (nom ou 'non'): ").strip()
                 if reponse.lower() not in ['non', 'n', 'no']:
                     troupe_copiee = self.selectionner_carte(f"Quelle troupe ennemie avez-vous copiée?")
                     if troupe_copiee:
-                        copie = Carte(troupe_copiee.nom, troupe_copiee.cout, troupe_copiee.traits, 1)
-                        self.etat.bench.append(copie)
-                        print(f"📋 Copie 1⭐ de {troupe_copiee.nom} ajoutée!")
-                        self.copie_ennemi_prise = True
+                        return {"copie_ennemie": troupe_copiee.nom}
         
         elif type_question == "mannequin_survie":
             reponse = input("🎭 Mannequin: Votre mannequin a-t-il survécu? (o/n): ").strip().lower()
-            if reponse in ['o', 'oui', 'y', 'yes']:
-                self.etat.elixir += 1
-                print("💰 +1 élixir pour la survie du mannequin!")
+            return {"mannequin_survivant": reponse in ['o', 'oui', 'y', 'yes']}
         
         elif type_question == "ventes":
             reponse = input("💸 Bonne affaire: Combien de troupes avez-vous vendues? (nombre): ").strip()
             try:
-                nb_ventes = int(reponse)
-                if nb_ventes > 0:
-                    if not hasattr(self, 'bonus_ventes'):
-                        self.bonus_ventes = 0
-                    self.bonus_ventes += nb_ventes
-                    print(f"💰 +{nb_ventes} élixir au prochain round grâce aux ventes!")
+                return {"ventes": max(0, int(reponse))}
             except ValueError:
                 pass
         
@@ -489,58 +977,39 @@ class GameSession:
         elif type_question == "bonus_gobelin":
             niveau_bonus = self.bonus_familles_actifs.get("Gobelin", 0)
             if niveau_bonus == 2:
-                print("🟢 Bonus Gobelin (2): Gobelin bonus de 2 élixirs au prochain round!")
-                if not hasattr(self, 'gobelin_bonus_elixir'):
-                    self.gobelin_bonus_elixir = 0
-                self.gobelin_bonus_elixir += 2
-                
                 reponse = input("🎲 Avez-vous reçu un Gobelin bonus aléatoire gratuit? (nom ou 'non'): ").strip()
                 if reponse.lower() not in ['non', 'n', 'no']:
                     gobelin_bonus = self.selectionner_carte("Quel Gobelin bonus avez-vous reçu?")
-                    if gobelin_bonus and "Gobelin" in gobelin_bonus.traits:
-                        self.etat.bench.append(gobelin_bonus)
-                        print(f"🎁 {gobelin_bonus.nom} gratuit ajouté au banc!")
+                    if gobelin_bonus:
+                        return {"gobelin_bonus": gobelin_bonus.nom}
             
             elif niveau_bonus == 4:
                 reponse = input("🟢 Bonus Gobelin (4): Avez-vous gagné un Gobelin 3-4 élixir? (60% de chances) (o/n): ").strip().lower()
                 if reponse in ['o', 'oui', 'y', 'yes']:
                     gobelin_bonus = self.selectionner_carte("Quel Gobelin 3-4 élixir avez-vous reçu?")
-                    if gobelin_bonus and "Gobelin" in gobelin_bonus.traits and gobelin_bonus.cout in [3, 4]:
-                        self.etat.bench.append(gobelin_bonus)
-                        print(f"🎁 {gobelin_bonus.nom} bonus ajouté au banc!")
+                    if gobelin_bonus:
+                        return {"gobelin_bonus": gobelin_bonus.nom}
         
         elif type_question == "bonus_ace":
             niveau_bonus = self.bonus_familles_actifs.get("Ace", 0)
             if niveau_bonus in [2, 4]:
-                if not hasattr(self, 'capitaine_ace'):
+                capitaines_possibles = capitaines_ace_possibles(self)
+                if self.capitaine_ace is None and len(capitaines_possibles) > 1:
                     # Première fois qu'on active le bonus Ace, sélectionner le capitaine
                     print("👑 Bonus Ace: Sélection du capitaine (unité avec le plus haut niveau de fusion)")
-                    if self.etat.main:
-                        cartes_ace = [c for c in self.etat.main if "Ace" in c.traits]
-                        if cartes_ace:
-                            # Trouver le niveau le plus haut
-                            niveau_max = max(c.niveau for c in cartes_ace)
-                            capitaines_possibles = [c for c in cartes_ace if c.niveau == niveau_max]
-                            
-                            if len(capitaines_possibles) == 1:
-                                self.capitaine_ace = capitaines_possibles[0].nom
-                                print(f"👑 {self.capitaine_ace} est devenu capitaine!")
-                            else:
-                                print("Capitaines possibles:")
-                                for i, c in enumerate(capitaines_possibles):
-                                    print(f"{i+1}. {c}")
-                                while True:
-                                    try:
-                                        choix = int(input("Quel Ace est devenu capitaine? (numéro): ")) - 1
-                                        if 0 <= choix < len(capitaines_possibles):
-                                            self.capitaine_ace = capitaines_possibles[choix].nom
-                                            print(f"👑 {self.capitaine_ace} est devenu capitaine!")
-                                            break
-                                    except ValueError:
-                                        pass
+                    print("Capitaines possibles:")
+                    for i, c in enumerate(capitaines_possibles):
+                        print(f"{i+1}. {c}")
+                    while True:
+                        try:
+                            choix = int(input("Quel Ace est devenu capitaine? (numéro): ")) - 1
+                            if 0 <= choix < len(capitaines_possibles):
+                                return {"capitaine_ace": capitaines_possibles[choix].nom}
+                        except ValueError:
+                            pass
                 
                 # Questions sur les éliminations du capitaine
-                if hasattr(self, 'capitaine_ace'):
+                if self.capitaine_ace is not None:
                     eliminations = input(f"👑 Votre capitaine {self.capitaine_ace} a-t-il éliminé des troupes ce round? (nombre ou 0): ").strip()
                     try:
                         nb_eliminations = int(eliminations)
@@ -550,45 +1019,19 @@ class GameSession:
                         pass
         
         # Questions supplémentaires pour l'extracteur
-        if self.extracteur_actif and self.extracteur_stock > 0:
+        elif type_question == "extracteur":
             reponse = input(f"⚡ Extracteur: Voulez-vous vendre l'extracteur? ({self.extracteur_stock} élixir stocké) (o/n): ").strip().lower()
-            if reponse in ['o', 'oui', 'y', 'yes']:
-                self.etat.elixir += self.extracteur_stock
-                print(f"💰 +{self.extracteur_stock} élixir récupéré de l'extracteur!")
-                self.extracteur_actif = False
-                self.extracteur_stock = 0
+            return {"vendre_extracteur": reponse in ['o', 'oui', 'y', 'yes']}
+        
+        return {}
     
     def calculer_bonus_familles(self):
-        """Calcule les bonus de familles actifs selon les cartes sur le plateau"""
-        familles_count = {}
-        
-        # Grouper d'abord par nom de carte (deux cartes identiques = 1 unité pour les bonus)
-        cartes_uniques = {}
-        for carte in self.etat.main:
-            cartes_uniques[carte.nom] = carte  # Garde seulement une instance de chaque nom
-        
-        # Compter les familles basées sur les cartes uniques
-        for nom_carte, carte in cartes_uniques.items():
-            for trait in carte.traits:
-                if trait in BONUS_FAMILLES:
-                    familles_count[trait] = familles_count.get(trait, 0) + 1
-        
-        # Déterminer les bonus actifs selon les seuils de chaque famille
-        self.bonus_familles_actifs = {}
-        for famille, count in familles_count.items():
-            bonus_niveaux = BONUS_FAMILLES[famille]
-            
-            # Familles qui activent à 3 cartes uniquement
-            if famille in ["Assassin", "Guetteur", "Vengeuse", "Lanceur"]:
-                if count >= 3:
-                    self.bonus_familles_actifs[famille] = 3
-            
-            # Familles qui activent à 2 et 4 cartes
-            elif famille in ["Noble", "Clan", "Gobelin", "Revenant", "Ace", "Colosse", "Bagarreur"]:
-                if count >= 4:
-                    self.bonus_familles_actifs[famille] = 4
-                elif count >= 2:
-                    self.bonus_familles_actifs[famille] = 2
+        """Bonus de familles actifs selon les cartes sur le plateau (table précalculée)"""
+        from table_familles import table_partagee
+        masque_noms = self.etat.main.masque_noms()
+        paliers = table_partagee().paliers(masque_noms) if masque_noms is not None else None
+        # Plateau hors table : compteurs tenus à jour par etat.main
+        self.bonus_familles_actifs = paliers if paliers is not None else self.etat.main.paliers_familles()
     
     def afficher_bonus_familles(self):
         """Affiche les bonus de familles actifs"""
@@ -681,13 +1124,13 @@ class GameSession:
         if self.extracteur_actif:
             print(f"⚡ Extracteur d'élixir: {self.extracteur_stock} stocké")
         
-        if hasattr(self, 'interets_stockes') and self.interets_stockes > 0:
+        if self.interets_stockes > 0:
             print(f"💎 Intérêts en attente: +{self.interets_stockes} au prochain tour")
         
-        if hasattr(self, 'bonus_ventes') and self.bonus_ventes > 0:
+        if self.bonus_ventes > 0:
             print(f"💸 Bonus ventes en attente: +{self.bonus_ventes} au prochain tour")
         
-        if hasattr(self, 'gobelin_bonus_elixir') and self.gobelin_bonus_elixir > 0:
+        if self.gobelin_bonus_elixir > 0:
             print(f"🟢 Bonus Gobelin en attente: +{self.gobelin_bonus_elixir} au prochain tour")
         
         if self.tour > 1:
@@ -701,7 +1144,7 @@ class GameSession:
             print("  (Aucune carte sur le plateau)")
         
         if self.mannequin_actif:
-            if hasattr(self, 'mannequin_special') and self.mannequin_special:
+            if self.mannequin_special:
                 print("  🎭✨ Mannequin spécial (2 attributs)")
             else:
                 print("  🎭 Mannequin")
@@ -732,15 +1175,6 @@ class GameSession:
                 self.etat.main.append(carte_speciale)
                 self.cartes_initiales = 0  # Déjà configuré avec le modificateur
         
-        if "rester_en_vie" in self.modificateurs_actifs:
-            print("\n🎭 Modificateur 'Rester en vie': Mannequin ajouté!")
-            self.mannequin_actif = True
-        
-        if "mannequin_special" in self.modificateurs_actifs:
-            print("\n🎭✨ Modificateur 'Mannequin spécial': Mannequin avec 2 attributs ajouté!")
-            self.mannequin_actif = True
-            self.mannequin_special = True
-        
         if self.cartes_initiales > 0:
             print(f"Vous commencez avec {self.cartes_initiales} carte(s) déjà posée(s).")
             for i in range(self.cartes_initiales):
@@ -758,20 +1192,13 @@ class GameSession:
                             else:
                                 niveau = int(niveau_input)
                             if niveau >= 1:
-                                # Créer une nouvelle carte avec le bon niveau
-                                carte_avec_niveau = Carte(carte.nom, carte.cout, carte.traits, niveau)
-                                self.etat.main.append(carte_avec_niveau)
+                                # Carte posée au bon niveau, prise dans le pool
+                                step(self, Recevoir(carte.nom, niveau, "main"))
                                 break
                             else:
                                 print("Le niveau doit être au moins 1.")
                         except ValueError:
                             print("Veuillez entrer un nombre valide.")
-                    
-                    # Mise à jour de l'historique
-                    if carte.nom in self.etat.historique_pool:
-                        self.etat.historique_pool[carte.nom] += 1
-                    else:
-                        self.etat.historique_pool[carte.nom] = 1
         
         # Vérification de l'élixir initial (peut varier avec les bonus)
         elixir_defaut = 4
@@ -789,14 +1216,7 @@ class GameSession:
     
     def configurer_carte_etoile_debut(self):
         """Configure la carte spéciale obtenue avec les modificateurs étoile"""
-        cout_max = {
-            "etoile_rare": 2,
-            "etoile_epique": 3, 
-            "etoile_légendaire": 4,
-            "etoile_de_champion": 5
-        }
-        
-        cout = cout_max[self.modificateur_etoile_debut]
+        cout = COUT_CARTE_ETOILE[self.modificateur_etoile_debut]
         print(f"Sélectionnez votre troupe 2⭐ à {cout} élixir:")
         
         # Filtrer les cartes par coût
@@ -818,37 +1238,6 @@ class GameSession:
         # Gestion des modificateurs en début de tour
         self.gerer_modificateurs_debut_tour()
         
-        # Ajout d'élixir au début du tour (sauf tour 1)
-        if self.tour > 1:
-            elixir_gagne = self.elixir_par_tour
-            
-            # Intérêts stockés (de plus en plus riche)
-            if hasattr(self, 'interets_stockes') and self.interets_stockes > 0:
-                elixir_gagne += self.interets_stockes
-                print(f"💎 Intérêts: +{self.interets_stockes} élixir!")
-                self.interets_stockes = 0
-            
-            # Bonus de ventes stockés
-            if hasattr(self, 'bonus_ventes') and self.bonus_ventes > 0:
-                elixir_gagne += self.bonus_ventes
-                print(f"💸 Bonus ventes: +{self.bonus_ventes} élixir!")
-                self.bonus_ventes = 0
-            
-            # Bonus élixir Gobelin stockés
-            if hasattr(self, 'gobelin_bonus_elixir') and self.gobelin_bonus_elixir > 0:
-                elixir_gagne += self.gobelin_bonus_elixir
-                print(f"🟢 Bonus Gobelin: +{self.gobelin_bonus_elixir} élixir!")
-                self.gobelin_bonus_elixir = 0
-            
-            # Extracteur d'élixir
-            if self.extracteur_actif:
-                elixir_gagne += 2
-                self.extracteur_stock += 2
-                print(f"⚡ Extracteur d'élixir: +2 élixir stocké (total stocké: {self.extracteur_stock})")
-            
-            self.etat.elixir += elixir_gagne
-            print(f"\n💰 +{elixir_gagne} élixir! Total: {self.etat.elixir}")
-        
         self.afficher_etat()
         
         print("\n=== CHOIX DISPONIBLES ===")
@@ -872,32 +1261,31 @@ class GameSession:
             print(f"{i+1}. {carte}")
         
         # Analyse et recommandation avec bonus de familles
-        meilleur = self.meilleur_choix_avec_familles(options)
+        evaluation = self.evaluer_etat()
+        meilleur = evaluation.meilleur(options)
         
         if meilleur:
             print(f"\n🎯 RECOMMANDATION: {meilleur.nom}")
             # Affichage des scores détaillés
             print("\nAnalyse détaillée:")
-            sc_traits = score_traits(meilleur, self.etat.main + self.etat.bench, self.weights)
-            sc_merge = score_merge(meilleur, self.etat.main, self.weights)
-            sc_infinite = score_infinite_elixir(meilleur, self.etat.main, self.weights)
-            sc_disruption = score_disruption(meilleur, self.etat.historique_pool, self.weights)
-            sc_budget = score_budget(meilleur, self.etat, self.weights)
-            sc_familles = self.score_familles(meilleur)
+            detail = evaluation.detail(meilleur)
+            
+            print(f"  • Score traits: {detail['traits']:.2f}")
+            print(f"  • Score fusion: {detail['merge']:.2f}")
+            print(f"  • Score élixir infini: {detail['infinite_elixir']:.2f}")
+            print(f"  • Score disruption: {detail['disruption']:.2f}")
+            print(f"  • Score budget: {detail['budget']:.2f}")
+            print(f"  • Score familles: {detail['familles']:.2f}")
+            print(f"  • TOTAL: {detail['total']:.2f}")
             
-            print(f"  • Score traits: {sc_traits:.2f}")
-            print(f"  • Score fusion: {sc_merge:.2f}")
-            print(f"  • Score élixir infini: {sc_infinite:.2f}")
-            print(f"  • Score disruption: {sc_disruption:.2f}")
-            print(f"  • Score budget: {sc_budget:.2f}")
-            print(f"  • Score familles: {sc_familles:.2f}")
-            print(f"  • TOTAL: {sc_traits + sc_merge + sc_infinite + sc_disruption + sc_budget + sc_familles:.2f}")
+            # Plan sur les prochains tours (achats, ventes, fusions), borné dans le temps
+            from planificateur import decrire_action, planifier_session
+            plan = planifier_session(self, options)
+            if plan.profondeur:
+                print(f"\n📅 Plan sur {plan.profondeur} tour(s): " + ", ".join(decrire_action(a) for a in plan.actions))
         else:
             print("\n❌ Aucun choix recommandé (pas assez d'élixir)")
         
-        # Gestion de la première carte gratuite
-        premiere_achat = True
-        
         # Demander quel choix l'utilisateur a fait
         while True:
             try:
@@ -922,101 +1310,50 @@ class GameSession:
                         except ValueError:
                             print("Veuillez entrer un nombre valide.")
                     
-                    # Créer la carte avec le bon niveau
-                    carte_avec_niveau = Carte(carte_choisie.nom, carte_choisie.cout, carte_choisie.traits, niveau)
-                    
-                    # Calculer le coût avec modificateurs
-                    cout_final = carte_choisie.cout
-                    if "cadeau_de_la_maison" in self.modificateurs_actifs and premiere_achat:
-                        cout_final = 0
-                        print("🎁 Première carte gratuite grâce au modificateur!")
-                        premiere_achat = False
-                    elif "premier_choix" in self.modificateurs_actifs and premiere_achat:
-                        carte_avec_niveau.niveau = 2
-                        print("⭐ Première carte transformée en 2 étoiles!")
-                        premiere_achat = False
-                    
-                    # Mettre à jour l'état
-                    self.etat.elixir -= cout_final
-                    self.etat.main.append(carte_avec_niveau)
-                    
-                    # Mise à jour de l'historique
-                    if carte_choisie.nom in self.etat.historique_pool:
-                        self.etat.historique_pool[carte_choisie.nom] += 1
-                    else:
-                        self.etat.historique_pool[carte_choisie.nom] = 1
-                    
-                    print(f"✅ {carte_choisie.nom} niveau {niveau} ajouté à votre plateau!")
+                    try:
+                        _, evenements = step(self, Acheter(carte_choisie.nom, niveau, "main"))
+                    except ActionInvalide as erreur:
+                        print(f"❌ {erreur}")
+                        continue
+                    self.afficher_evenements(evenements)
                     break
                 else:
                     print(f"Veuillez entrer un nombre entre 0 et {len(options)}.")
             except ValueError:
                 print("Veuillez entrer un nombre valide.")
         
-        # Gestion des modificateurs en fin de tour
+        # Gestion des modificateurs en fin de tour, puis tour suivant
         self.gerer_modificateurs_fin_tour()
-        
-        self.tour += 1
         return True
     
     def score_familles(self, carte: Carte) -> float:
         """Score une carte selon son potentiel d'amélioration des bonus de familles"""
-        score = 0
-        
-        # Simulation : ajouter cette carte et recalculer les bonus
-        familles_count = {}
-        for carte_existante in self.etat.main:
-            for trait in carte_existante.traits:
-                if trait in BONUS_FAMILLES:
-                    familles_count[trait] = familles_count.get(trait, 0) + 1
-        
-        # Ajouter la nouvelle carte
-        for trait in carte.traits:
-            if trait in BONUS_FAMILLES:
-                familles_count[trait] = familles_count.get(trait, 0) + 1
-        
-        # Calculer les bonus après ajout selon les vrais seuils
-        for famille, count in familles_count.items():
-            # Familles qui activent à 3 cartes uniquement
-            if famille in ["Assassin", "Guetteur", "Vengeuse", "Lanceur"]:
-                if count == 3:  # Activation du bonus (3 cartes)
-                    score += 5.0
-                elif count == 2:  # Proche de l'activation
-                    score += 3.0
-                elif count > 3:  # Plus de 3 cartes (synergie)
-                    score += 1.5
-            
-            # Familles qui activent à 2 et 4 cartes
-            elif famille in ["Noble", "Clan", "Gobelin", "Revenant", "Ace", "Colosse", "Bagarreur"]:
-                if count == 2:  # Activation premier bonus (2 cartes)
-                    score += 4.0
-                elif count == 4:  # Activation deuxième bonus (4 cartes)
-                    score += 6.0
-                elif count == 3:  # Proche du deuxième bonus
-                    score += 2.0
-                elif count > 4:  # Plus de 4 cartes (synergie)
-                    score += 1.0
-        
-        return score
+        return score_familles_plateau(self.etat.main, carte)
+    
+    def empreinte(self) -> Tuple:
+        """Empreinte canonique de l'état de jeu, indépendante de l'ordre des cartes
+        
+        Deux sessions de même plateau, banc, élixir, tour, leader, modificateurs
+        et historique du pool ont la même empreinte.
+        """
+        leader = self.leader_choisi["nom"] if self.leader_choisi else None
+        return (
+            tuple(sorted(self.etat.main.comptes().items())),
+            tuple(sorted(self.etat.bench.comptes().items())),
+            self.etat.elixir,
+            self.tour,
+            leader,
+            tuple(sorted(self.modificateurs_actifs)),
+            tuple(sorted((nom, n) for nom, n in self.etat.historique_pool.items() if n)),
+        )
+    
+    def evaluer_etat(self) -> "EvaluationEtat":
+        """Scores de l'état courant par le pipeline partagé (CLI et API)"""
+        return pipeline_score(self.weights).evaluer(self.etat)
     
     def meilleur_choix_avec_familles(self, options: List[Carte]) -> Optional[Carte]:
         """Version améliorée qui prend en compte les bonus de familles"""
-        meilleurscore = float('-inf')
-        meilleur = None
-        for c in options:
-            if c.cout > self.etat.elixir:
-                continue
-            sc = 0
-            sc += score_traits(c, self.etat.main + self.etat.bench, self.weights)
-            sc += score_merge(c, self.etat.main, self.weights)
-            sc += score_infinite_elixir(c, self.etat.main, self.weights)
-            sc += score_disruption(c, self.etat.historique_pool, self.weights)
-            sc += score_budget(c, self.etat, self.weights)
-            sc += self.score_familles(c)  # Nouveau score familles
-            if sc > meilleurscore:
-                meilleurscore = sc
-                meilleur = c
-        return meilleur
+        return self.evaluer_etat().meilleur(options)
     
     def run(self):
         print("🏰 CLASH ROYALE MERGE TACTICS ASSISTANT 🏰")
@@ -1039,12 +1376,517 @@ class GameSession:
         
         print("\n👋 Merci d'avoir joué! À bientôt!")
 
+# ===== MOTEUR DE JEU (sans entrées/sorties) =====
+# Les règles sont appliquées par step(session, action) -> (session, événements) ;
+# la CLI et l'API Flask construisent les actions et affichent les événements.
+
+class ActionInvalide(Exception):
+    """Action refusée par les règles (la session n'est pas modifiée)"""
+
+@dataclass(frozen=True)
+class Acheter:
+    nom: str
+    niveau: int = 1
+    zone: str = "bench"  # "bench" ou "main"
+
+@dataclass(frozen=True)
+class Recevoir:
+    """Carte obtenue sans payer (carte de départ) : prise dans le pool"""
+    nom: str
+    niveau: int = 1
+    zone: str = "bench"
+
+@dataclass(frozen=True)
+class Vendre:
+    nom: str
+    niveau: int = 1
+    zone: str = "bench"
+
+@dataclass(frozen=True)
+class Retirer:
+    """Suppression d'une carte (prix - 1 élixir récupéré)"""
+    nom: str
+    niveau: int = 1
+    zone: str = "bench"
+
+@dataclass(frozen=True)
+class Deplacer:
+    nom: str
+    niveau: int = 1
+    destination: str = "main"  # depuis l'autre zone
+
+@dataclass(frozen=True)
+class Fusionner:
+    nom: str
+    niveau: int = 1
+
+@dataclass(frozen=True)
+class DebutTour:
+    """Effets des modificateurs en début de tour ; les troupes reçues sont indiquées par le joueur"""
+    remplacement_pandore: Optional[str] = None
+    promotion: Optional[str] = None
+    troupe_cheatee: Optional[str] = None
+
+@dataclass(frozen=True)
+class FinTour:
+    """Résultat du round, réponses aux questions des modificateurs, puis passage au tour suivant"""
+    victoire: bool = True
+    troupes_adverses_restantes: int = 0
+    leader_adverse_mort: bool = False
+    copie_ennemie: Optional[str] = None
+    mannequin_survivant: bool = False
+    ventes: int = 0
+    gobelin_bonus: Optional[str] = None
+    capitaine_ace: Optional[str] = None
+    vendre_extracteur: bool = False
+
+# Texte de chaque type d'événement (formaté avec ses détails)
+MESSAGES_EVENEMENTS = {
+    "achat": "✅ {nom} niveau {niveau} acheté pour {cout} élixir",
+    "achat_gratuit": "🎁 Première carte gratuite grâce au modificateur!",
+    "premier_choix": "⭐ Première carte transformée en 2 étoiles!",
+    "reception": "✅ {nom} niveau {niveau} ajouté",
+    "fusion": "🔀 Fusion {resume} +{elixir_gagne} élixir",
+    "vente": "💰 {nom} niveau {niveau} vendu pour {elixir} élixir",
+    "suppression": "🗑️ {nom} niveau {niveau} supprimé pour {elixir} élixir",
+    "deplacement": "↔️ {nom} niveau {niveau} déplacé vers le {destination}",
+    "bonus_leader": "+{elixir} élixir (Leader: {leader})",
+    "miroir": "🪞 Miroir magique: Copie 1⭐ de {nom} ajoutée au banc!",
+    "pandore": "📦 Banc de Pandore: {ancienne} remplacé par {nom}!",
+    "promotion": "⬆️ Promotion: {ancienne} transformé en {nom}!",
+    "clairvoyance": "🔮 Clairvoyance: Banc vide, +2 élixir!",
+    "cheate": "🎲 Cheaté: {nom} reçu!",
+    "ascension": "🚀 Ascension: {nom} transformé en 3⭐!",
+    "victoire": "🎉 Victoire ! Bien joué !",
+    "defaite": "💀 Défaite... -{hp_perdus} HP (1 défaite + {troupes} troupes adverses)",
+    "game_over": "💥 GAME OVER ! Vous êtes éliminé !",
+    "heritage": "💰 +5 élixir grâce à l'héritage!",
+    "copie_ennemie": "📋 Copie 1⭐ de {nom} ajoutée!",
+    "mannequin": "💰 +1 élixir pour la survie du mannequin!",
+    "ventes": "💰 +{ventes} élixir au prochain round grâce aux ventes!",
+    "gobelin_elixir": "🟢 Bonus Gobelin (2): Gobelin bonus de 2 élixirs au prochain round!",
+    "gobelin_carte": "🎁 {nom} bonus ajouté au banc!",
+    "capitaine_ace": "👑 {nom} est devenu capitaine!",
+    "extracteur_vendu": "💰 +{elixir} élixir récupéré de l'extracteur!",
+    "interets": "💎 De plus en plus riche: +{interets} élixir d'intérêt au prochain round!",
+    "nouveau_tour": "→ Tour {tour} | +{elixir} élixir",
+}
+
+@dataclass
+class Evenement:
+    type: str
+    details: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def message(self) -> str:
+        return MESSAGES_EVENEMENTS[self.type].format(**self.details)
+
+def _zone(game_session: GameSession, zone: str) -> ZoneCartes:
+    if zone not in ("main", "bench"):
+        raise ActionInvalide(f"Zone inconnue : {zone}")
+    return getattr(game_session.etat, zone)
+
+def _carte_bibliotheque(nom: Optional[str], niveau: int = 1) -> Optional[Carte]:
+    base = BIBLIOTHEQUE_CARTES.get(nom)
+    return Carte(base.nom, base.cout, base.traits, niveau) if base else None
+
+def _prendre_dans_pool(game_session: GameSession, nom: str):
+    historique = game_session.etat.historique_pool
+    historique[nom] = historique.get(nom, 0) + 1
+
+def _fusionner(game_session: GameSession, zone: str, evenements: List[Evenement], details: str = "",
+               carte: Optional[Carte] = None):
+    # Zone déjà fusionnée : seule la carte ajoutée peut compléter un groupe
+    taille_fusion = TAILLE_FUSION_BANC if zone == "bench" else TAILLE_FUSION_PLATEAU
+    if carte is not None and getattr(game_session.etat, zone).compter(carte.nom, carte.niveau) < taille_fusion:
+        return
+    resultat = game_session.fusionner(zone, details)
+    if resultat.fusions:
+        evenements.append(Evenement("fusion", {
+            "zone": zone, "fusions": resultat.fusions, "nombre": resultat.nombre,
+            "elixir_gagne": resultat.elixir_gagne, "bonus_leader": resultat.bonus_leader,
+            "resume": " → ".join(f"{nom} niv.{niveau}!" for nom, niveau in resultat.fusions)}))
+        for effet in game_session.effets("fusion"):
+            effet(game_session, resultat, evenements)
+
+def _bonus_leader(game_session: GameSession, type_bonus: str, evenements: List[Evenement]) -> int:
+    bonus = game_session.appliquer_bonus_leader(type_bonus)
+    if bonus:
+        evenements.append(Evenement("bonus_leader", {"elixir": bonus, "leader": game_session.leader_choisi["nom"]}))
+    return bonus
+
+# --- Effets des modificateurs, par étape de la partie ---
+# Chaque effet est enregistré pour une étape et un modificateur ; une session n'exécute
+# que les effets de ses modificateurs actifs, dans l'ordre d'enregistrement.
+
+ETAPES_MODIFICATEURS = ("debut", "debut_tour", "fin_tour", "nouveau_tour", "achat", "vente", "fusion")
+EFFETS_MODIFICATEURS: Dict[str, Dict[str, Callable]] = {etape: {} for etape in ETAPES_MODIFICATEURS}
+# Champs de la session versés avec l'élixir du tour suivant, puis remis à zéro
+BONUS_TOUR_SUIVANT = ("interets_stockes", "bonus_ventes", "gobelin_bonus_elixir")
+
+def effet_modificateur(etape: str, *modificateurs: str):
+    """Décorateur : effet(session, contexte, sortie) des modificateurs à cette étape
+    
+    Contexte et sortie selon l'étape : debut (nom du modificateur, messages),
+    debut_tour / fin_tour (action, événements), nouveau_tour (détails du revenu,
+    événements), achat (AchatEnCours, événements), vente (carte vendue, événements),
+    fusion (ResultatFusions, événements).
+    """
+    def enregistrer(effet: Callable) -> Callable:
+        for modificateur in modificateurs:
+            EFFETS_MODIFICATEURS[etape][modificateur] = effet
+        return effet
+    return enregistrer
+
+_effets_compiles = {}
+
+def effets_compiles(modificateurs: Tuple[str, ...]) -> Dict[str, Tuple[Callable, ...]]:
+    """Effets de ces modificateurs par étape (compilés une fois par ensemble de modificateurs)"""
+    effets = _effets_compiles.get(modificateurs)
+    if effets is None:
+        actifs = set(modificateurs)
+        effets = _effets_compiles[modificateurs] = {
+            etape: tuple(effet for mod, effet in par_modificateur.items() if mod in actifs)
+            for etape, par_modificateur in EFFETS_MODIFICATEURS.items()}
+    return effets
+
+@dataclass
+class AchatEnCours:
+    """Achat en cours de validation : les effets peuvent changer le coût ou la carte"""
+    carte: Carte
+    cout: int
+    premier: bool  # Premier achat du tour
+    gratuit: bool = False
+
+@effet_modificateur("debut", "plein_les_poches")
+def _plein_les_poches(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.etat.elixir += 5
+    messages.append(f"🪙 Modificateur {mod}: +5 élixir de départ appliqué!")
+
+@effet_modificateur("debut", "plus_on_est_de_fous")
+def _plus_on_est_de_fous(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.taille_equipe_max = 7
+    messages.append(f"👥 Modificateur {mod}: Taille d'équipe augmentée à 7!")
+
+@effet_modificateur("debut", "la_fete")
+def _la_fete(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.taille_equipe_max = 6
+    game_session.taille_equipe_fixe = True
+    messages.append(f"🎉 Modificateur {mod}: Taille d'équipe fixée à 6!")
+
+@effet_modificateur("debut", *COUT_CARTE_ETOILE)
+def _carte_etoile(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.modificateur_etoile_debut = mod
+    messages.append(f"⭐ Modificateur {mod}: Carte améliorée au début configurée!")
+
+@effet_modificateur("debut", "extracteur_elixir")
+def _extracteur(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.extracteur_actif = True
+    game_session.extracteur_stock = 0
+    messages.append(f"⚡ Modificateur {mod}: Extracteur d'élixir activé!")
+
+@effet_modificateur("debut", "4_etoiles")
+def _quatre_etoiles(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.choix_par_tour = 6  # Double sélection
+    messages.append(f"🌟 Modificateur {mod}: Sélection doublée (6 choix)!")
+
+@effet_modificateur("debut", "rester_en_vie")
+def _rester_en_vie(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.mannequin_actif = True
+    messages.append("🎭 Modificateur 'Rester en vie': Mannequin ajouté!")
+
+@effet_modificateur("debut", "mannequin_special")
+def _mannequin_special(game_session: GameSession, mod: str, messages: List[str]):
+    game_session.mannequin_actif = True
+    game_session.mannequin_special = True
+    messages.append("🎭✨ Modificateur 'Mannequin spécial': Mannequin avec 2 attributs ajouté!")
+
+@effet_modificateur("debut_tour", "miroir_magique")
+def _miroir_magique(game_session: GameSession, action: "DebutTour", evenements: List[Evenement]):
+    banc = game_session.etat.bench
+    if banc:
+        carte_droite = banc[-1]
+        banc.append(Carte(carte_droite.nom, carte_droite.cout, carte_droite.traits, 1))
+        evenements.append(Evenement("miroir", {"nom": carte_droite.nom}))
+
+@effet_modificateur("debut_tour", "banc_de_pandore")
+def _banc_de_pandore(game_session: GameSession, action: "DebutTour", evenements: List[Evenement]):
+    banc = game_session.etat.bench
+    nouvelle_carte = _carte_bibliotheque(action.remplacement_pandore)
+    if banc and nouvelle_carte:
+        evenements.append(Evenement("pandore", {"ancienne": banc[0].nom, "nom": nouvelle_carte.nom}))
+        banc[0] = nouvelle_carte
+
+@effet_modificateur("debut_tour", "promotion")
+def _promotion(game_session: GameSession, action: "DebutTour", evenements: List[Evenement]):
+    banc = game_session.etat.bench
+    nouvelle_carte = _carte_bibliotheque(action.promotion)
+    if banc and nouvelle_carte:
+        evenements.append(Evenement("promotion", {"ancienne": banc[-1].nom, "nom": nouvelle_carte.nom}))
+        banc[-1] = nouvelle_carte
+
+@effet_modificateur("debut_tour", "clairvoyance")
+def _clairvoyance(game_session: GameSession, action: "DebutTour", evenements: List[Evenement]):
+    if not game_session.etat.bench:
+        game_session.etat.elixir += 2
+        evenements.append(Evenement("clairvoyance"))
+
+@effet_modificateur("debut_tour", "cheaté")
+def _cheate(game_session: GameSession, action: "DebutTour", evenements: List[Evenement]):
+    nouvelle_carte = _carte_bibliotheque(action.troupe_cheatee)
+    if nouvelle_carte:
+        game_session.etat.bench.append(nouvelle_carte)
+        evenements.append(Evenement("cheate", {"nom": nouvelle_carte.nom}))
+
+@effet_modificateur("debut_tour", "ascension")
+def _ascension(game_session: GameSession, action: "DebutTour", evenements: List[Evenement]):
+    banc = game_session.etat.bench
+    if game_session.tour == 3 and banc:
+        carte_droite = banc[-1]
+        banc[-1] = Carte(carte_droite.nom, carte_droite.cout, carte_droite.traits, 3)
+        evenements.append(Evenement("ascension", {"nom": carte_droite.nom}))
+
+@effet_modificateur("fin_tour", "heritage")
+def _heritage(game_session: GameSession, action: "FinTour", evenements: List[Evenement]):
+    if action.leader_adverse_mort:
+        game_session.etat.elixir += 5
+        evenements.append(Evenement("heritage"))
+
+@effet_modificateur("fin_tour", "tu_es_a_moi")
+def _tu_es_a_moi(game_session: GameSession, action: "FinTour", evenements: List[Evenement]):
+    copie = _carte_bibliotheque(action.copie_ennemie)
+    if copie and not game_session.copie_ennemi_prise:
+        game_session.etat.bench.append(copie)
+        game_session.copie_ennemi_prise = True
+        evenements.append(Evenement("copie_ennemie", {"nom": copie.nom}))
+
+@effet_modificateur("fin_tour", "rester_en_vie")
+def _mannequin_survivant(game_session: GameSession, action: "FinTour", evenements: List[Evenement]):
+    if action.mannequin_survivant:
+        game_session.etat.elixir += 1
+        evenements.append(Evenement("mannequin"))
+
+@effet_modificateur("fin_tour", "bonne_affaire")
+def _ventes_declarees(game_session: GameSession, action: "FinTour", evenements: List[Evenement]):
+    # Ventes faites hors du moteur, déclarées par le joueur
+    if action.ventes > 0:
+        game_session.bonus_ventes += action.ventes
+        evenements.append(Evenement("ventes", {"ventes": action.ventes}))
+
+@effet_modificateur("fin_tour", "extracteur_elixir")
+def _vendre_extracteur(game_session: GameSession, action: "FinTour", evenements: List[Evenement]):
+    if action.vendre_extracteur and game_session.extracteur_actif and game_session.extracteur_stock > 0:
+        game_session.etat.elixir += game_session.extracteur_stock
+        evenements.append(Evenement("extracteur_vendu", {"elixir": game_session.extracteur_stock}))
+        game_session.extracteur_actif = False
+        game_session.extracteur_stock = 0
+
+@effet_modificateur("fin_tour", "de_plus_en_plus_riche")
+def _interets(game_session: GameSession, action: "FinTour", evenements: List[Evenement]):
+    # Enregistré en dernier : les intérêts portent sur l'élixir gagné pendant la fin de round
+    interets = game_session.etat.elixir // 2
+    if interets > 0:
+        game_session.interets_stockes += interets
+        evenements.append(Evenement("interets", {"interets": interets}))
+
+@effet_modificateur("nouveau_tour", "extracteur_elixir")
+def _production_extracteur(game_session: GameSession, details: Dict[str, Any], evenements: List[Evenement]):
+    if game_session.extracteur_actif:
+        details["elixir"] += 2
+        game_session.extracteur_stock += 2
+        details["extracteur_stock"] = game_session.extracteur_stock
+
+@effet_modificateur("achat", "cadeau_de_la_maison")
+def _cadeau_de_la_maison(game_session: GameSession, achat: AchatEnCours, evenements: List[Evenement]):
+    if achat.premier:
+        achat.cout = 0
+        if achat.carte.cout:
+            achat.gratuit = True
+            evenements.append(Evenement("achat_gratuit"))
+
+@effet_modificateur("achat", "premier_choix")
+def _premier_choix(game_session: GameSession, achat: AchatEnCours, evenements: List[Evenement]):
+    if achat.premier and not achat.gratuit:
+        achat.carte.niveau = 2
+        evenements.append(Evenement("premier_choix"))
+
+@effet_modificateur("vente", "bonne_affaire")
+def _bonne_affaire(game_session: GameSession, carte: Carte, evenements: List[Evenement]):
+    game_session.bonus_ventes += 1
+    evenements.append(Evenement("ventes", {"ventes": 1}))
+
+def _acheter(game_session: GameSession, action: Acheter, evenements: List[Evenement]):
+    carte = _carte_bibliotheque(action.nom, action.niveau)
+    if carte is None:
+        raise ActionInvalide("Carte non trouvée")
+    zone = _zone(game_session, action.zone)
+    achat = AchatEnCours(carte, carte.cout, premier=game_session.achats_tour == 0)
+    for effet in game_session.effets("achat"):
+        effet(game_session, achat, evenements)
+    if achat.cout > game_session.etat.elixir:
+        raise ActionInvalide("Pas assez d'élixir")
+    
+    game_session.etat.elixir -= achat.cout
+    game_session.achats_tour += 1
+    zone.append(carte)
+    _prendre_dans_pool(game_session, carte.nom)
+    evenements.append(Evenement("achat", {"nom": carte.nom, "niveau": carte.niveau, "cout": achat.cout}))
+    _fusionner(game_session, action.zone, evenements, f"({carte.nom} acheté)", carte)
+
+def _recevoir(game_session: GameSession, action: Recevoir, evenements: List[Evenement]):
+    carte = _carte_bibliotheque(action.nom, action.niveau)
+    if carte is None:
+        raise ActionInvalide("Carte non trouvée")
+    _zone(game_session, action.zone).append(carte)
+    _prendre_dans_pool(game_session, carte.nom)
+    evenements.append(Evenement("reception", {"nom": carte.nom, "niveau": carte.niveau}))
+
+def _vendre(game_session: GameSession, action: Vendre, evenements: List[Evenement]):
+    carte = _zone(game_session, action.zone).retirer(action.nom, action.niveau)
+    if carte is None:
+        raise ActionInvalide("Carte non trouvée")
+    elixir = max(1, carte.cout // 2)
+    game_session.etat.elixir += elixir
+    evenements.append(Evenement("vente", {"nom": carte.nom, "niveau": carte.niveau, "elixir": elixir}))
+    # Le bonus de défaite du leader s'applique aussi aux ventes
+    _bonus_leader(game_session, "defeat", evenements)
+    for effet in game_session.effets("vente"):
+        effet(game_session, carte, evenements)
+
+def _retirer(game_session: GameSession, action: Retirer, evenements: List[Evenement]):
+    carte = _zone(game_session, action.zone).retirer(action.nom, action.niveau)
+    if carte is None:
+        raise ActionInvalide("Carte non trouvée")
+    elixir = max(1, carte.cout - 1)
+    game_session.etat.elixir += elixir
+    evenements.append(Evenement("suppression", {"nom": carte.nom, "niveau": carte.niveau, "elixir": elixir}))
+
+def _deplacer(game_session: GameSession, action: Deplacer, evenements: List[Evenement]):
+    destination = _zone(game_session, action.destination)
+    source = game_session.etat.bench if action.destination == "main" else game_session.etat.main
+    if source.trouver(action.nom, action.niveau) is None:
+        raise ActionInvalide("Carte non trouvée")
+    if action.destination == "main":
+        # Limite du plateau, sauf si la carte fusionne avec une carte déjà posée
+        limite = game_session.calculer_max_cartes_plateau()
+        if len(destination) >= limite and not destination.compter(action.nom, action.niveau):
+            raise ActionInvalide(f"Plateau plein ! Limite : {limite} cartes (Tour {game_session.tour})")
+    
+    carte = source.retirer(action.nom, action.niveau)
+    destination.append(carte)
+    evenements.append(Evenement("deplacement", {
+        "nom": action.nom, "niveau": action.niveau,
+        "destination": "plateau" if action.destination == "main" else "banc"}))
+    _fusionner(game_session, action.destination, evenements, f"({action.nom} fusionné)", carte)
+
+def _fusion_manuelle(game_session: GameSession, action: Fusionner, evenements: List[Evenement]):
+    nb_identiques = game_session.etat.bench.compter(action.nom, action.niveau)
+    if nb_identiques < TAILLE_FUSION_BANC:
+        raise ActionInvalide(f"Pas assez de cartes identiques pour fusionner "
+                             f"(besoin de {TAILLE_FUSION_BANC}, trouvé {nb_identiques})")
+    if action.niveau >= NIVEAU_MAX:
+        raise ActionInvalide(f"Impossible de fusionner au-delà du niveau {NIVEAU_MAX}")
+    _fusionner(game_session, "bench", evenements, f"({action.nom} fusionné manuellement)")
+
+def _debut_tour(game_session: GameSession, action: DebutTour, evenements: List[Evenement]):
+    for effet in game_session.effets("debut_tour"):
+        effet(game_session, action, evenements)
+
+def capitaines_ace_possibles(game_session: GameSession) -> List[Carte]:
+    """Cartes Ace du plateau au plus haut niveau (candidates au rôle de capitaine)"""
+    cartes_ace = [c for c in game_session.etat.main if "Ace" in c.traits]
+    if not cartes_ace:
+        return []
+    niveau_max = max(c.niveau for c in cartes_ace)
+    return [c for c in cartes_ace if c.niveau == niveau_max]
+
+def _fin_tour(game_session: GameSession, action: FinTour, evenements: List[Evenement]):
+    etat = game_session.etat
+    
+    # Résultat de la bataille : -1 HP par défaite et par troupe adverse restante
+    game_over = False
+    if action.victoire:
+        evenements.append(Evenement("victoire"))
+    else:
+        hp_perdus = 1 + action.troupes_adverses_restantes
+        etat.hp -= hp_perdus
+        evenements.append(Evenement("defaite", {"hp_perdus": hp_perdus, "troupes": action.troupes_adverses_restantes}))
+        if etat.hp <= 0:
+            etat.hp = 0
+            game_over = True
+            evenements.append(Evenement("game_over"))
+        _bonus_leader(game_session, "defeat", evenements)
+    
+    for effet in game_session.effets("fin_tour"):
+        effet(game_session, action, evenements)
+    
+    # Bonus de familles de fin de round (paliers tenus à jour par le plateau)
+    game_session.bonus_familles_actifs = etat.main.paliers_familles()
+    palier_gobelin = game_session.bonus_familles_actifs.get("Gobelin", 0)
+    if palier_gobelin == 2:
+        game_session.gobelin_bonus_elixir += 2
+        evenements.append(Evenement("gobelin_elixir"))
+    gobelin = _carte_bibliotheque(action.gobelin_bonus)
+    if (gobelin and "Gobelin" in gobelin.traits
+            and (palier_gobelin == 2 or (palier_gobelin == 4 and gobelin.cout in (3, 4)))):
+        etat.bench.append(gobelin)
+        evenements.append(Evenement("gobelin_carte", {"nom": gobelin.nom}))
+    
+    if game_session.bonus_familles_actifs.get("Ace", 0) in (2, 4) and game_session.capitaine_ace is None:
+        # Premier bonus Ace : l'unité Ace de plus haut niveau devient capitaine
+        candidats = [c.nom for c in capitaines_ace_possibles(game_session)]
+        if candidats:
+            game_session.capitaine_ace = action.capitaine_ace if action.capitaine_ace in candidats else candidats[0]
+            evenements.append(Evenement("capitaine_ace", {"nom": game_session.capitaine_ace}))
+    
+    if game_over:
+        return
+    
+    # Tour suivant : élixir du tour et bonus mis de côté
+    game_session.tour += 1
+    game_session.achats_tour = 0
+    details = {"tour": game_session.tour, "elixir": game_session.elixir_par_tour}
+    for attribut in BONUS_TOUR_SUIVANT:
+        bonus = getattr(game_session, attribut)
+        if bonus > 0:
+            details["elixir"] += bonus
+            details[attribut] = bonus
+            setattr(game_session, attribut, 0)
+    for effet in game_session.effets("nouveau_tour"):
+        effet(game_session, details, evenements)
+    etat.elixir += details["elixir"]
+    game_session.calculer_max_cartes_plateau()
+    evenements.append(Evenement("nouveau_tour", details))
+
+# Règle appliquée pour chaque type d'action
+REGLES_ACTIONS = {
+    Acheter: _acheter,
+    Recevoir: _recevoir,
+    Vendre: _vendre,
+    Retirer: _retirer,
+    Deplacer: _deplacer,
+    Fusionner: _fusion_manuelle,
+    DebutTour: _debut_tour,
+    FinTour: _fin_tour,
+}
+
+def step(game_session: GameSession, action) -> Tuple[GameSession, List[Evenement]]:
+    """Applique une action aux règles du jeu, sans entrée ni affichage
+    
+    La session est modifiée sur place et renvoyée avec les événements produits ;
+    une action refusée lève ActionInvalide avant toute modification.
+    """
+    regle = REGLES_ACTIONS.get(type(action))
+    if regle is None:
+        raise ActionInvalide(f"Action inconnue : {action!r}")
+    evenements = []
+    regle(game_session, action, evenements)
+    return game_session, evenements
+
 def score_traits(carte: Carte, main: List[Carte], weights: Dict[str, float]) -> float:
-    score = 0
-    for trait in carte.traits:
-        count = sum(trait in c.traits for c in main)
-        score += weights['traits'] * count
-    return score
+    # Familles partagées avec chaque carte : popcount de l'intersection des masques
+    masque = carte.masque
+    return weights['traits'] * sum((masque & c.masque).bit_count() for c in main)
 
 def score_merge(carte: Carte, main: List[Carte], weights: Dict[str, float]) -> float:
     same = sum(1 for c in main if c.nom == carte.nom)
@@ -1058,30 +1900,277 @@ def score_infinite_elixir(carte: Carte, main: List[Carte], weights: Dict[str, fl
         return weights['fusion_sell'] * 1
     return 0
 
+def disponibilites_pool(historique_pool: Dict[str, int]) -> Dict[str, float]:
+    """Disponibilité de chaque carte dans les prochaines boutiques (4 = pool complet), tables hypergéométriques"""
+    return disponibilites_table(COUTS_CARTES, historique_pool)
+
+def proba_fusion_pool(carte: Carte, etat: EtatJeu, boutiques: int = HORIZON_TOURS) -> float:
+    """Probabilité de pouvoir fusionner cette carte posée sur le plateau d'ici `boutiques` boutiques
+    
+    1 si un exemplaire de même niveau y est déjà, sinon celle de revoir le nom (niveau 1 seulement).
+    """
+    if etat.main.compter(carte.nom, carte.niveau):
+        return 1.0
+    if carte.niveau > 1 or carte.nom not in MASQUES_CARTES:
+        return 0.0
+    pris = etat.historique_pool.get(carte.nom, 0) + 1  # L'exemplaire acheté quitte le pool
+    return table_pool(COUTS_CARTES).proba(BIBLIOTHEQUE_CARTES[carte.nom].cout, pris,
+                                          TAILLE_FUSION_PLATEAU - 1, boutiques)
+
 def score_disruption(carte: Carte, historique_pool: Dict[str, int], weights: Dict[str, float]) -> float:
-    dispo = historique_pool.get(carte.nom, 4)
+    dispo = disponibilites_pool(historique_pool).get(carte.nom, 4)
     return weights['disruption'] / dispo
 
 def score_budget(carte: Carte, etat: EtatJeu, weights: Dict[str, float]) -> float:
     return -weights['cost'] * carte.cout
 
-def meilleur_choix(options: List[Carte], etat: EtatJeu, weights: Dict[str, float]) -> Optional[Carte]:
-    meilleurscore = float('-inf')
-    meilleur = None
-    for c in options:
-        if c.cout > etat.elixir:
-            continue
-        sc = 0
-        sc += score_traits(c, etat.main + etat.bench, weights)
-        sc += score_merge(c, etat.main, weights)
-        sc += score_infinite_elixir(c, etat.main, weights)
-        sc += score_disruption(c, etat.historique_pool, weights)
-        sc += score_budget(c, etat, weights)
-        if sc > meilleurscore:
-            meilleurscore = sc
-            meilleur = c
-    return meilleur
+# Composantes du score d'une carte, dans l'ordre affiché par tour_de_jeu
+COMPOSANTES_SCORE = ("traits", "merge", "infinite_elixir", "disruption", "budget", "familles")
+
+def detail_score(carte: Carte, etat: EtatJeu, weights: Dict[str, float]) -> Dict[str, float]:
+    """Composantes du score d'une carte calculées une à une (référence scalaire)"""
+    detail = {
+        "traits": score_traits(carte, etat.main + etat.bench, weights),
+        "merge": score_merge(carte, etat.main, weights),
+        "infinite_elixir": score_infinite_elixir(carte, etat.main, weights),
+        "disruption": score_disruption(carte, etat.historique_pool, weights),
+        "budget": score_budget(carte, etat, weights),
+        "familles": etat.main.score_synergie(carte.masque) * weights.get('familles', 1.0),
+    }
+    detail["total"] = sum(detail.values())
+    return detail
+
+class ScoreurCatalogue:
+    """Tout le catalogue (cartes × niveaux 1 à 5) décrit par des tableaux NumPy
+    
+    Les composantes vectorisées du pipeline scorent tous les candidats en une
+    passe : un produit matriciel ou une indexation par composante.
+    """
+    
+    def __init__(self, bibliotheque: Dict[str, Carte] = BIBLIOTHEQUE_CARTES, niveau_max: int = NIVEAU_MAX):
+        self.noms = list(bibliotheque)
+        self.index_noms = {nom: i for i, nom in enumerate(self.noms)}
+        self.candidats = [Carte(base.nom, base.cout, base.traits, niveau)
+                          for base in bibliotheque.values() for niveau in range(1, niveau_max + 1)]
+        self.index = {(c.nom, c.niveau): k for k, c in enumerate(self.candidats)}
+        
+        self.familles = np.array([[c.masque >> i & 1 for i in range(NB_FAMILLES)] for c in self.candidats],
+                                 dtype=float)
+        self.id_nom = np.array([self.index_noms[c.nom] for c in self.candidats])
+        self.couts = np.array([c.cout for c in self.candidats], dtype=float)
+        self.table_synergie = np.array(SCORE_SYNERGIE)
+        self.rangs_familles = np.arange(NB_FAMILLES)
+    
+    def position(self, carte: Carte) -> Optional[int]:
+        """Ligne de la carte dans les tableaux (None si hors catalogue)"""
+        k = self.index.get((carte.nom, carte.niveau))
+        if k is None or self.candidats[k] != carte:
+            return None  # Niveau > 5, coût ou traits modifiés
+        return k
+
+_scoreur_catalogue = None
+
+def scoreur_catalogue() -> Optional[ScoreurCatalogue]:
+    """Scoreur vectorisé partagé (None si NumPy n'est pas installé)"""
+    global _scoreur_catalogue
+    if _scoreur_catalogue is None and np is not None:
+        _scoreur_catalogue = ScoreurCatalogue()
+    return _scoreur_catalogue
+
+@dataclass(frozen=True)
+class ComposanteScore:
+    """Composante du score d'une carte
+    
+    `preparer(etat)` calcule une fois par état tout ce qui ne dépend pas du
+    candidat ; `evaluer(contexte, carte)` et `vectoriser(contexte, scoreur)`
+    en déduisent la valeur (non pondérée) d'une carte ou de tout le catalogue.
+    """
+    nom: str
+    poids: str  # Clé de GameSession.weights
+    preparer: Callable[[EtatJeu], Any]
+    evaluer: Callable[[Any, Carte], float]
+    vectoriser: Callable[[Any, ScoreurCatalogue], Any]
+
+# Composantes disponibles, par nom
+COMPOSANTES: Dict[str, ComposanteScore] = {}
+
+def enregistrer_composante(composante: ComposanteScore) -> ComposanteScore:
+    COMPOSANTES[composante.nom] = composante
+    return composante
+
+def _contexte_traits(etat: EtatJeu) -> List[int]:
+    # Cartes par famille sur le plateau + banc
+    return [a + b for a, b in zip(etat.main.compteurs_familles(distinctes=False),
+                                  etat.bench.compteurs_familles(distinctes=False))]
+
+def _contexte_presence(etat: EtatJeu) -> Tuple[set, set]:
+    paires = set(etat.main.comptes())
+    return {nom for nom, _ in paires}, paires
+
+def _vecteur_presence(contexte: Tuple[set, set], scoreur: ScoreurCatalogue):
+    noms, paires = contexte
+    presents = np.zeros(len(scoreur.noms))
+    presents[[scoreur.index_noms[nom] for nom in noms if nom in scoreur.index_noms]] = 1
+    return presents[scoreur.id_nom]
+
+def _vecteur_paires(contexte: Tuple[set, set], scoreur: ScoreurCatalogue):
+    paires = np.zeros(len(scoreur.candidats))
+    paires[[scoreur.index[p] for p in contexte[1] if p in scoreur.index]] = 1
+    return paires
+
+def score_familles_plateau(main: ZoneCartes, carte: Carte) -> float:
+    """Score de synergie du plateau si la carte y était ajoutée"""
+    from table_familles import table_partagee
+    masque_noms = main.masque_noms()
+    bit = BITS_NOMS.get(carte.nom, 0)
+    if (masque_noms is not None and bit and not masque_noms & bit and main.noms_distincts()
+            and MASQUES_CARTES[carte.nom] == carte.masque):
+        # Plateau sans doublon + nouveau nom : la table donne le score de la composition
+        score = table_partagee().score(masque_noms | bit)
+        if score is not None:
+            return score
+    # Simulation : ajouter cette carte aux compteurs du plateau
+    return main.score_synergie(carte.masque)
+
+def _contexte_familles(etat: EtatJeu) -> Tuple[ZoneCartes, List[int]]:
+    return etat.main, [min(n, 5) for n in etat.main.compteurs_familles(distinctes=False)]
+
+def _vecteur_familles(contexte: Tuple[ZoneCartes, List[int]], scoreur: ScoreurCatalogue):
+    from table_familles import table_partagee
+    main, tally = contexte
+    # Synergie du plateau + variation due aux familles du candidat
+    tally = np.array(tally)
+    synergie = scoreur.table_synergie[scoreur.rangs_familles, tally]
+    synergie_plus_un = scoreur.table_synergie[scoreur.rangs_familles, np.minimum(tally + 1, 5)]
+    scores = synergie.sum() + scoreur.familles @ (synergie_plus_un - synergie)
+    
+    # Plateau sans doublon : la table donne le score de chaque nouveau nom (comme score_familles_plateau)
+    masque_noms = main.masque_noms()
+    if masque_noms is None or not main.noms_distincts():
+        return scores
+    table = table_partagee()
+    par_nom = np.full(len(scoreur.noms), np.nan)
+    for i, nom in enumerate(scoreur.noms):
+        bit = BITS_NOMS.get(nom, 0)
+        if bit and not masque_noms & bit:
+            score = table.score(masque_noms | bit)
+            if score is not None:
+                par_nom[i] = score
+    depuis_table = par_nom[scoreur.id_nom]
+    return np.where(np.isnan(depuis_table), scores, depuis_table)
+
+enregistrer_composante(ComposanteScore(
+    "traits", "traits", _contexte_traits,
+    lambda tally, carte: sum(tally[i] for i in INDICES_MASQUE[carte.masque]),
+    lambda tally, scoreur: scoreur.familles @ np.array(tally, dtype=float)))
+enregistrer_composante(ComposanteScore(
+    "merge", "merge", _contexte_presence,
+    lambda presence, carte: 1 if carte.nom in presence[0] else 0,
+    _vecteur_presence))
+enregistrer_composante(ComposanteScore(
+    "infinite_elixir", "fusion_sell", _contexte_presence,
+    lambda presence, carte: 1 if (carte.nom, carte.niveau) in presence[1] else 0,
+    _vecteur_paires))
+enregistrer_composante(ComposanteScore(
+    "disruption", "disruption", lambda etat: disponibilites_pool(etat.historique_pool),
+    lambda dispo, carte: 1 / dispo.get(carte.nom, 4),
+    lambda dispo, scoreur: 1 / np.array([dispo.get(nom, 4) for nom in scoreur.noms],
+                                        dtype=float)[scoreur.id_nom]))
+enregistrer_composante(ComposanteScore(
+    "budget", "cost", lambda etat: None,
+    lambda _, carte: -carte.cout,
+    lambda _, scoreur: -scoreur.couts))
+enregistrer_composante(ComposanteScore(
+    "familles", "familles", _contexte_familles,
+    lambda contexte, carte: score_familles_plateau(contexte[0], carte),
+    _vecteur_familles))
+
+class EvaluationEtat:
+    """Scores des candidats pour un état donné
+    
+    Les contextes des composantes sont calculés une seule fois, et tout le
+    catalogue est scoré en une passe vectorisée à la première demande.
+    """
+    
+    def __init__(self, pipeline: "PipelineScore", etat: EtatJeu):
+        self.pipeline = pipeline
+        self.etat = etat
+        self.contextes = {}
+        for composante, _ in pipeline.composantes:
+            if composante.preparer not in self.contextes:
+                self.contextes[composante.preparer] = composante.preparer(etat)
+        self._matrice = None
+    
+    def matrice(self):
+        """Composantes pondérées de tout le catalogue (candidats × composantes)"""
+        if self._matrice is None:
+            scoreur = scoreur_catalogue()
+            self._matrice = np.column_stack([
+                poids * composante.vectoriser(self.contextes[composante.preparer], scoreur)
+                for composante, poids in self.pipeline.composantes
+            ])
+        return self._matrice
+    
+    def detail(self, carte: Carte) -> Dict[str, float]:
+        """Composantes pondérées du score d'une carte, plus le total"""
+        scoreur = scoreur_catalogue()
+        k = scoreur.position(carte) if scoreur is not None else None
+        if k is not None:
+            valeurs = self.matrice()[k].tolist()
+        else:
+            valeurs = [poids * composante.evaluer(self.contextes[composante.preparer], carte)
+                       for composante, poids in self.pipeline.composantes]
+        detail = dict(zip(self.pipeline.noms, valeurs))
+        detail["total"] = sum(valeurs)
+        return detail
+    
+    def details(self, cartes: List[Carte]) -> List[Dict[str, float]]:
+        return [self.detail(carte) for carte in cartes]
+    
+    def meilleur(self, options: List[Carte]) -> Optional[Carte]:
+        """Meilleure carte abordable (la première en cas d'égalité)"""
+        meilleurscore = float('-inf')
+        meilleur = None
+        for c in options:
+            if c.cout > self.etat.elixir:
+                continue
+            sc = self.detail(c)["total"]
+            if sc > meilleurscore:
+                meilleurscore = sc
+                meilleur = c
+        return meilleur
+
+class PipelineScore:
+    """Liste compilée de composantes pondérées, partagée par le CLI et l'API"""
+    
+    def __init__(self, weights: Dict[str, float], composantes=COMPOSANTES_SCORE):
+        self.composantes = [(COMPOSANTES[nom], weights.get(COMPOSANTES[nom].poids, 1.0))
+                            for nom in composantes]
+        self.noms = [c.nom for c, _ in self.composantes]
+    
+    def evaluer(self, etat: EtatJeu) -> EvaluationEtat:
+        return EvaluationEtat(self, etat)
+
+_pipelines = {}
+
+def pipeline_score(weights: Dict[str, float], composantes=COMPOSANTES_SCORE) -> PipelineScore:
+    """Pipeline compilé pour ces poids (réutilisé tant que les poids ne changent pas)"""
+    cle = (tuple(sorted(weights.items())), tuple(composantes))
+    pipeline = _pipelines.get(cle)
+    if pipeline is None:
+        pipeline = _pipelines[cle] = PipelineScore(weights, composantes)
+    return pipeline
+
+def detail_scores(cartes: List[Carte], etat: EtatJeu, weights: Dict[str, float]) -> List[Dict[str, float]]:
+    """Composantes du score de plusieurs cartes, tout le catalogue étant scoré en une passe"""
+    return pipeline_score(weights).evaluer(etat).details(cartes)
+
+def meilleur_choix(options: List[Carte], etat: EtatJeu, weights: Dict[str, float],
+                   avec_familles: bool = False) -> Optional[Carte]:
+    composantes = COMPOSANTES_SCORE if avec_familles else COMPOSANTES_SCORE[:-1]
+    return pipeline_score(weights, composantes).evaluer(etat).meilleur(options)
 
 if __name__ == "__main__":
+    charger_profil_poids()
     session = GameSession()
     session.run()
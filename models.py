@@ -4,10 +4,14 @@ Modèles de données pour la gestion des comptes et historique des parties
 
 import json
 import os
+import sys
+import base64
 import hashlib
+import sqlite3
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, fields
 import uuid
 
 @dataclass
@@ -87,28 +91,168 @@ class SavedGame:
             stats=stats
         )
 
-class DatabaseManager:
-    """Gestionnaire de base de données JSON simple"""
+@dataclass
+class SaveSummary:
+    """Métadonnées d'une sauvegarde, sans l'état de jeu complet"""
+    save_id: str
+    username: str
+    game_name: str
+    created_at: str
+    last_modified: str
+    tour: int
+    elixir: int
+    hp: int
+    is_completed: bool = False
     
-    def __init__(self, data_dir="data"):
-        self.data_dir = data_dir
-        self.ensure_data_directory()
+    def to_dict(self):
+        return asdict(self)
+    
+    @classmethod
+    def from_save_dict(cls, data):
+        return cls(**{f.name: data[f.name] for f in fields(cls) if f.name in data})
+
+# Nombre de parties conservées dans l'historique récent d'un joueur
+RECENT_GAMES_MAX = 10
+
+@dataclass
+class StatsAggregate:
+    """Agrégats de statistiques d'un joueur, tenus à jour à chaque partie enregistrée"""
+    total_games: int = 0
+    wins: int = 0
+    tour_sum: int = 0
+    best_tour: int = 0
+    total_elixir: int = 0
+    total_fusions: int = 0
+    leaders: Dict[str, int] = field(default_factory=dict)
+    modificateurs: Dict[str, int] = field(default_factory=dict)
+    favorite_leader: str = ''
+    favorite_modificateur: str = ''
+    recent_games: List[Dict] = field(default_factory=list)  # Anneau borné, du plus ancien au plus récent
+    
+    @staticmethod
+    def _count(compteurs: Dict[str, int], cle: str, favori: str) -> str:
+        """Incrémenter une table de fréquences et renvoyer le favori mis à jour"""
+        compteurs[cle] = compteurs.get(cle, 0) + 1
+        if compteurs[cle] > compteurs.get(favori, 0):
+            return cle
+        return favori
+    
+    def record(self, stats_dict: Dict):
+        """Ajouter une partie aux agrégats en O(1)"""
+        self.total_games += 1
+        if stats_dict['victoire']:
+            self.wins += 1
+        self.tour_sum += stats_dict['tour_final']
+        self.best_tour = max(self.best_tour, stats_dict['tour_final'])
+        self.total_elixir += stats_dict['elixir_total_gagne']
+        self.total_fusions += stats_dict['fusions_effectuees']
+        
+        if stats_dict['leader_utilise']:
+            self.favorite_leader = self._count(self.leaders, stats_dict['leader_utilise'], self.favorite_leader)
+        if stats_dict['modificateur_utilise']:
+            self.favorite_modificateur = self._count(self.modificateurs, stats_dict['modificateur_utilise'], self.favorite_modificateur)
         
-        # Fichiers de données
+        self.recent_games.append(stats_dict)
+        if len(self.recent_games) > RECENT_GAMES_MAX:
+            del self.recent_games[0]
+    
+    def summary(self) -> Dict:
+        """Statistiques au format renvoyé par /api/stats"""
+        total_games = self.total_games
+        return {
+            'total_games': total_games,
+            'wins': self.wins,
+            'losses': total_games - self.wins,
+            'win_rate': round(self.wins / total_games * 100, 1) if total_games else 0,
+            'average_tour': round(self.tour_sum / total_games, 1) if total_games else 0,
+            'best_tour': self.best_tour,
+            'total_elixir': self.total_elixir,
+            'total_fusions': self.total_fusions,
+            'favorite_leader': self.favorite_leader,
+            'favorite_modificateur': self.favorite_modificateur,
+            'recent_games': list(reversed(self.recent_games))
+        }
+    
+    def to_dict(self):
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+    
+    @classmethod
+    def build(cls, user_stats: List[Dict]) -> 'StatsAggregate':
+        """Reconstruire les agrégats depuis l'historique complet (réparation)"""
+        aggregate = cls()
+        for stats_dict in sorted(user_stats, key=lambda x: x.get('date', '')):
+            aggregate.record(stats_dict)
+        return aggregate
+
+def apply_game_to_account(account_data: Dict, stats_dict: Dict) -> Dict:
+    """Reporter le résultat d'une partie sur les compteurs d'un compte"""
+    account_data['total_games'] = account_data.get('total_games', 0) + 1
+    
+    if stats_dict['victoire']:
+        account_data['total_wins'] = account_data.get('total_wins', 0) + 1
+    else:
+        account_data['total_losses'] = account_data.get('total_losses', 0) + 1
+    
+    account_data['best_tour'] = max(account_data.get('best_tour', 0), stats_dict['tour_final'])
+    account_data['favorite_leader'] = stats_dict['leader_utilise']
+    account_data['favorite_modificateur'] = stats_dict['modificateur_utilise']
+    return account_data
+
+# === BACKENDS DE STOCKAGE ===
+
+class JsonStorage:
+    """Backend historique : un fichier JSON par type de données dans data/"""
+    
+    name = "json"
+    
+    # Nombre d'entrées du journal au-delà duquel on compacte dans les fichiers JSON
+    COMPACTION_THRESHOLD = 500
+    
+    def __init__(self, data_dir="data", compaction_threshold=None):
+        self.data_dir = data_dir
         self.accounts_file = os.path.join(data_dir, "accounts.json")
         self.games_file = os.path.join(data_dir, "saved_games.json")
         self.stats_file = os.path.join(data_dir, "game_stats.json")
         
+        # Journal append-only des parties terminées (une ligne JSON par partie)
+        self.journal_file = os.path.join(data_dir, "game_stats.jsonl")
+        self.compaction_threshold = compaction_threshold or self.COMPACTION_THRESHOLD
+        self._journal_lock = threading.RLock()
+        self._journal_offset = 0
+        self._instantane = None  # Signature de stats_aggregates.json, remplacé à chaque compaction
+        self._pending = {}  # username -> parties du journal pas encore compactées
+        self._pending_count = 0
+        
+        # Agrégats par joueur : instantané sur disque + journal, gardés en mémoire
+        self.aggregates_file = os.path.join(data_dir, "stats_aggregates.json")
+        self._aggregates = None
+        
+        # Index secondaire email -> username pour les contrôles d'unicité
+        self.email_index_file = os.path.join(data_dir, "email_index.json")
+        self._accounts_lock = threading.RLock()
+        
+        # Index des métadonnées de sauvegarde par joueur (sans game_state)
+        self.saves_index_file = os.path.join(data_dir, "saves_index.json")
+        self._saves_lock = threading.RLock()
+        
+        # Fichiers d'index gardés en mémoire : chemin -> (signature disque, données)
+        self._json_cache = {}
+        
         # Initialiser les fichiers s'ils n'existent pas
         self.initialize_files()
-    
-    def ensure_data_directory(self):
-        """Créer le dossier data s'il n'existe pas"""
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
+        self.recover_compaction()
+        if not os.path.exists(self.email_index_file) or not self.email_index_complete():
+            self.rebuild_email_index()
+        if not os.path.exists(self.saves_index_file) or not self.saves_index_complete():
+            self.rebuild_saves_index()
     
     def initialize_files(self):
         """Initialiser les fichiers JSON s'ils n'existent pas"""
+        os.makedirs(self.data_dir, exist_ok=True)
         files = [self.accounts_file, self.games_file, self.stats_file]
         for file_path in files:
             if not os.path.exists(file_path):
@@ -128,21 +272,611 @@ class DatabaseManager:
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
     
-    # === GESTION DES COMPTES ===
+    def load_json_cached(self, file_path):
+        """Charger un fichier JSON, relu seulement s'il a changé sur disque"""
+        try:
+            stat = os.stat(file_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        cached = self._json_cache.get(file_path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, self.load_json(file_path))
+            self._json_cache[file_path] = cached
+        return cached[1]
     
-    def create_account(self, username: str, email: str, password: str) -> bool:
-        """Créer un nouveau compte"""
+    def save_json_cached(self, file_path, data):
+        """Remplacer atomiquement un fichier JSON et mettre à jour le cache"""
+        self.save_json(file_path + ".tmp", data)
+        os.replace(file_path + ".tmp", file_path)
+        stat = os.stat(file_path)
+        self._json_cache[file_path] = ((stat.st_mtime_ns, stat.st_size), data)
+    
+    # --- Journal des parties ---
+    
+    def refresh_journal(self):
+        """Lire uniquement les lignes ajoutées au journal depuis la dernière lecture"""
+        with self._journal_lock:
+            try:
+                taille = os.path.getsize(self.journal_file)
+            except FileNotFoundError:
+                taille = 0
+            try:
+                stat = os.stat(self.aggregates_file)
+                instantane = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                instantane = None
+            
+            if taille < self._journal_offset or instantane != self._instantane:
+                # Journal compacté entre-temps (autre processus), même s'il a déjà été
+                # rempli au-delà de notre position : tout relire
+                self._journal_offset = 0
+                self._pending = {}
+                self._pending_count = 0
+                self._aggregates = None
+                self._instantane = instantane
+            
+            if taille == self._journal_offset:
+                return
+            
+            with open(self.journal_file, 'rb') as f:
+                f.seek(self._journal_offset)
+                for ligne in f:
+                    if not ligne.endswith(b'\n'):
+                        break  # Ligne en cours d'écriture, relue au prochain passage
+                    self._journal_offset += len(ligne)
+                    try:
+                        entree = json.loads(ligne)
+                    except json.JSONDecodeError:
+                        continue
+                    self._pending.setdefault(entree['username'], []).append(entree['stats'])
+                    self._pending_count += 1
+                    if self._aggregates is not None:
+                        self._aggregates.setdefault(entree['username'], StatsAggregate()).record(entree['stats'])
+    
+    def pending_stats(self, username: str) -> List[Dict]:
+        self.refresh_journal()
+        return self._pending.get(username, [])
+    
+    def _snapshot_aggregates(self) -> Dict[str, StatsAggregate]:
+        """Agrégats de l'instantané, reconstruits depuis game_stats.json s'ils n'existent pas encore"""
+        if os.path.exists(self.aggregates_file):
+            return {username: StatsAggregate.from_dict(data)
+                    for username, data in self.load_json(self.aggregates_file).items()}
+        return {username: StatsAggregate.build(user_stats)
+                for username, user_stats in self.load_json(self.stats_file).items()}
+    
+    def get_aggregate(self, username: str) -> Optional[StatsAggregate]:
+        with self._journal_lock:
+            self.refresh_journal()
+            if self._aggregates is None:
+                self._aggregates = self._snapshot_aggregates()
+                for pending_user, user_stats in self._pending.items():
+                    for stats_dict in user_stats:
+                        self._aggregates.setdefault(pending_user, StatsAggregate()).record(stats_dict)
+            return self._aggregates.get(username)
+    
+    def rebuild_aggregates(self) -> int:
+        """Recalculer tous les agrégats depuis l'historique complet"""
+        with self._journal_lock:
+            self.compact()
+            aggregates = {username: StatsAggregate.build(user_stats)
+                          for username, user_stats in self.load_json(self.stats_file).items()}
+            self.save_json(self.aggregates_file + ".tmp", {u: a.to_dict() for u, a in aggregates.items()})
+            os.replace(self.aggregates_file + ".tmp", self.aggregates_file)
+            self._aggregates = None
+            return len(aggregates)
+    
+    def compact(self):
+        """Reporter le journal dans game_stats.json, accounts.json et les agrégats, puis le vider
+        
+        Le journal est d'abord renommé (.compacting) ; une fois les fichiers
+        temporaires écrits, il passe en .compacted, ce qui valide la compaction.
+        Un arrêt brutal à n'importe quelle étape est rattrapé par recover_compaction().
+        """
+        with self._journal_lock:
+            if not os.path.exists(self.journal_file):
+                return 0
+            os.replace(self.journal_file, self.journal_file + ".compacting")
+            self._journal_offset = 0
+            self._pending = {}
+            self._pending_count = 0
+            self._aggregates = None
+            return self._apply_compaction()
+    
+    def _apply_compaction(self):
+        compacting = self.journal_file + ".compacting"
+        aggregates = self._snapshot_aggregates()
+        all_stats = self.load_json(self.stats_file)
         accounts = self.load_json(self.accounts_file)
         
-        # Vérifier si le nom d'utilisateur existe déjà
-        if username in accounts:
-            return False
+        nb_entrees = 0
+        with open(compacting, 'rb') as f:
+            for ligne in f:
+                try:
+                    entree = json.loads(ligne)
+                except json.JSONDecodeError:
+                    continue
+                username, stats_dict = entree['username'], entree['stats']
+                all_stats.setdefault(username, []).append(stats_dict)
+                if username in accounts:
+                    apply_game_to_account(accounts[username], stats_dict)
+                aggregates.setdefault(username, StatsAggregate()).record(stats_dict)
+                nb_entrees += 1
+        
+        self.save_json(self.stats_file + ".tmp", all_stats)
+        self.save_json(self.accounts_file + ".tmp", accounts)
+        self.save_json(self.aggregates_file + ".tmp", {u: a.to_dict() for u, a in aggregates.items()})
+        os.replace(compacting, self.journal_file + ".compacted")
+        self._finish_compaction()
+        return nb_entrees
+    
+    def _finish_compaction(self):
+        for file_path in (self.stats_file, self.accounts_file, self.aggregates_file):
+            if os.path.exists(file_path + ".tmp"):
+                os.replace(file_path + ".tmp", file_path)
+        os.remove(self.journal_file + ".compacted")
+    
+    def recover_compaction(self):
+        """Terminer ou rejouer une compaction interrompue"""
+        with self._journal_lock:
+            if os.path.exists(self.journal_file + ".compacted"):
+                self._finish_compaction()
+            elif os.path.exists(self.journal_file + ".compacting"):
+                for file_path in (self.stats_file, self.accounts_file, self.aggregates_file):
+                    if os.path.exists(file_path + ".tmp"):
+                        os.remove(file_path + ".tmp")
+                self._apply_compaction()
+    
+    # --- Comptes ---
+    
+    def get_account(self, username: str) -> Optional[Dict]:
+        account_data = self.load_json(self.accounts_file).get(username)
+        if account_data is None:
+            return None
+        # Superposer les parties encore dans le journal
+        for stats_dict in self.pending_stats(username):
+            apply_game_to_account(account_data, stats_dict)
+        return account_data
+    
+    def email_index(self) -> Dict[str, str]:
+        """Index email -> username"""
+        return self.load_json_cached(self.email_index_file)
+    
+    def _save_email_index(self, index: Dict[str, str]):
+        self.save_json_cached(self.email_index_file, index)
+    
+    def rebuild_email_index(self) -> int:
+        """Reconstruire l'index des emails depuis accounts.json"""
+        with self._accounts_lock:
+            accounts = self.load_json(self.accounts_file)
+            index = {acc_data['email']: username for username, acc_data in accounts.items() if acc_data.get('email')}
+            self._save_email_index(index)
+            return len(index)
+    
+    def email_index_complete(self) -> bool:
+        """Vérifié au démarrage : un arrêt entre l'écriture du compte et celle de l'index y laisse un email absent"""
+        index = self.email_index()
+        return all(acc_data['email'] in index
+                   for acc_data in self.load_json(self.accounts_file).values() if acc_data.get('email'))
+    
+    def insert_account(self, account_data: Dict) -> bool:
+        """Créer le compte si le nom et l'email sont libres (index : O(1))
         
-        # Vérifier si l'email existe déjà
-        for acc_data in accounts.values():
-            if acc_data.get('email') == email:
+        accounts.json est tout de même relu et réécrit en entier : une inscription
+        reste O(n) en comptes avec ce backend (SQLite pour beaucoup de comptes).
+        """
+        with self._accounts_lock:
+            accounts = self.load_json(self.accounts_file)
+            index = self.email_index()
+            if account_data['username'] in accounts or account_data['email'] in index:
                 return False
+            
+            accounts[account_data['username']] = account_data
+            self.save_json(self.accounts_file, accounts)
+            self._save_email_index({**index, account_data['email']: account_data['username']})
+            return True
+    
+    def update_account(self, username: str, account_data: Dict):
+        with self._journal_lock, self._accounts_lock:
+            # Les compteurs reçus incluent déjà le journal : le compacter d'abord
+            # pour ne pas rejouer ces parties une seconde fois
+            self.compact()
+            accounts = self.load_json(self.accounts_file)
+            ancien_email = accounts.get(username, {}).get('email')
+            accounts[username] = account_data
+            self.save_json(self.accounts_file, accounts)
+            
+            if ancien_email != account_data.get('email'):
+                index = dict(self.email_index())
+                if index.get(ancien_email) == username:
+                    del index[ancien_email]
+                index[account_data['email']] = username
+                self._save_email_index(index)
+    
+    # --- Sauvegardes ---
+    
+    def get_save(self, save_id: str) -> Optional[Dict]:
+        return self.load_json(self.games_file).get(save_id)
+    
+    def put_save(self, save_data: Dict):
+        with self._saves_lock:
+            games = self.load_json(self.games_file)
+            games[save_data['save_id']] = save_data
+            self.save_json(self.games_file, games)
+            
+            index = self.load_json_cached(self.saves_index_file)
+            user_index = {**index.get(save_data['username'], {}),
+                          save_data['save_id']: SaveSummary.from_save_dict(save_data).to_dict()}
+            self.save_json_cached(self.saves_index_file, {**index, save_data['username']: user_index})
+    
+    def delete_save(self, save_id: str):
+        with self._saves_lock:
+            games = self.load_json(self.games_file)
+            save_data = games.pop(save_id, None)
+            self.save_json(self.games_file, games)
+            
+            if save_data is not None:
+                index = self.load_json_cached(self.saves_index_file)
+                user_index = dict(index.get(save_data['username'], {}))
+                user_index.pop(save_id, None)
+                self.save_json_cached(self.saves_index_file, {**index, save_data['username']: user_index})
+    
+    def list_saves(self, username: str) -> List[Dict]:
+        games = self.load_json(self.games_file)
+        return [save_data for save_data in games.values() if save_data['username'] == username]
+    
+    def _saves_index_from_games(self) -> Dict[str, Dict[str, Dict]]:
+        index = {}
+        for save_data in self.load_json(self.games_file).values():
+            index.setdefault(save_data['username'], {})[save_data['save_id']] = \
+                SaveSummary.from_save_dict(save_data).to_dict()
+        return index
+    
+    def rebuild_saves_index(self) -> int:
+        """Reconstruire l'index des métadonnées depuis saved_games.json"""
+        with self._saves_lock:
+            index = self._saves_index_from_games()
+            self.save_json_cached(self.saves_index_file, index)
+            return sum(len(user_index) for user_index in index.values())
+    
+    def saves_index_complete(self) -> bool:
+        """Vérifié au démarrage : un arrêt entre l'écriture de saved_games.json et celle de l'index le laisse périmé"""
+        index = self.load_json_cached(self.saves_index_file)
+        # Les joueurs dont toutes les sauvegardes ont été supprimées gardent une entrée vide
+        return {username: user_index for username, user_index in index.items() if user_index} == \
+            self._saves_index_from_games()
+    
+    def list_save_summaries(self, username: str, limit: int, after: Optional[tuple] = None) -> List[Dict]:
+        """Métadonnées des sauvegardes, plus récentes d'abord, sans lire les game_state"""
+        user_index = self.load_json_cached(self.saves_index_file).get(username, {})
+        summaries = sorted(user_index.values(), key=lambda s: (s['last_modified'], s['save_id']), reverse=True)
+        if after is not None:
+            summaries = [s for s in summaries if (s['last_modified'], s['save_id']) < after]
+        return [dict(s) for s in summaries[:limit]]
+    
+    # --- Statistiques ---
+    
+    def record_game(self, username: str, stats_dict: Dict):
+        """Ajouter une partie au journal : une seule écriture en fin de fichier"""
+        ligne = json.dumps({'username': username, 'stats': stats_dict}, ensure_ascii=False) + "\n"
+        with self._journal_lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(ligne)
+            
+            self.refresh_journal()
+            if self._pending_count >= self.compaction_threshold:
+                self.compact()
+    
+    def get_stats(self, username: str) -> List[Dict]:
+        return self.load_json(self.stats_file).get(username, []) + self.pending_stats(username)
+    
+    def iter_all_stats(self):
+        """Itère sur (username, stats_dict) pour toutes les parties enregistrées"""
+        for username, user_stats in self.load_json(self.stats_file).items():
+            for stats_dict in user_stats:
+                yield username, stats_dict
+        self.refresh_journal()
+        for username, user_stats in list(self._pending.items()):
+            for stats_dict in user_stats:
+                yield username, stats_dict
+
+
+class SQLiteStorage:
+    """Backend SQLite : un seul fichier indexé par utilisateur, email et propriétaire de sauvegarde"""
+    
+    name = "sqlite"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS accounts (
+            username TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            total_games INTEGER NOT NULL DEFAULT 0,
+            total_wins INTEGER NOT NULL DEFAULT 0,
+            total_losses INTEGER NOT NULL DEFAULT 0,
+            best_tour INTEGER NOT NULL DEFAULT 0,
+            favorite_leader TEXT NOT NULL DEFAULT '',
+            favorite_modificateur TEXT NOT NULL DEFAULT ''
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_accounts_email ON accounts(email);
+        
+        CREATE TABLE IF NOT EXISTS saved_games (
+            save_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            game_name TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            last_modified TEXT NOT NULL,
+            tour INTEGER NOT NULL,
+            elixir INTEGER NOT NULL,
+            hp INTEGER NOT NULL,
+            is_completed INTEGER NOT NULL DEFAULT 0,
+            game_state TEXT NOT NULL,
+            stats TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_saves_owner ON saved_games(username, last_modified);
+        
+        CREATE TABLE IF NOT EXISTS game_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            date TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_stats_owner ON game_stats(username, id);
+        
+        CREATE TABLE IF NOT EXISTS stats_aggregates (
+            username TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    """
+    
+    ACCOUNT_FIELDS = [f.name for f in fields(PlayerAccount)]
+    
+    def __init__(self, data_dir="data", db_file="merge_tactics.sqlite3"):
+        self.data_dir = data_dir
+        self.db_path = os.path.join(data_dir, db_file)
+        os.makedirs(data_dir, exist_ok=True)
+        # Une connexion par thread : le serveur Flask peut être multi-thread
+        self._local = threading.local()
+        with self.connect() as conn:
+            conn.executescript(self.SCHEMA)
+        
+        # Base créée avant les agrégats : les calculer une fois depuis l'historique
+        conn = self.connect()
+        if (conn.execute("SELECT 1 FROM game_stats LIMIT 1").fetchone() is not None
+                and conn.execute("SELECT 1 FROM stats_aggregates LIMIT 1").fetchone() is None):
+            self.rebuild_aggregates()
+    
+    def connect(self) -> sqlite3.Connection:
+        """Connexion SQLite propre au thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    # --- Comptes ---
+    
+    def get_account(self, username: str) -> Optional[Dict]:
+        row = self.connect().execute(
+            "SELECT * FROM accounts WHERE username = ?", (username,)
+        ).fetchone()
+        return dict(row) if row else None
+    
+    def rebuild_email_index(self) -> int:
+        """Reconstruire l'index unique des emails"""
+        conn = self.connect()
+        conn.execute("REINDEX idx_accounts_email")
+        return conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+    
+    def insert_account(self, account_data: Dict) -> bool:
+        colonnes = ", ".join(self.ACCOUNT_FIELDS)
+        marqueurs = ", ".join("?" for _ in self.ACCOUNT_FIELDS)
+        try:
+            with self.connect() as conn:
+                conn.execute(
+                    f"INSERT INTO accounts ({colonnes}) VALUES ({marqueurs})",
+                    [account_data[champ] for champ in self.ACCOUNT_FIELDS]
+                )
+        except sqlite3.IntegrityError:
+            # Nom d'utilisateur ou email déjà pris (index uniques)
+            return False
+        return True
+    
+    def update_account(self, username: str, account_data: Dict):
+        champs = [champ for champ in self.ACCOUNT_FIELDS if champ != 'username']
+        affectations = ", ".join(f"{champ} = ?" for champ in champs)
+        with self.connect() as conn:
+            conn.execute(
+                f"UPDATE accounts SET {affectations} WHERE username = ?",
+                [account_data[champ] for champ in champs] + [username]
+            )
+    
+    # --- Sauvegardes ---
+    
+    @staticmethod
+    def _row_to_save(row) -> Dict:
+        save_data = dict(row)
+        save_data['game_state'] = json.loads(save_data['game_state'])
+        save_data['stats'] = json.loads(save_data['stats']) if save_data['stats'] else None
+        save_data['is_completed'] = bool(save_data['is_completed'])
+        return save_data
+    
+    def get_save(self, save_id: str) -> Optional[Dict]:
+        row = self.connect().execute(
+            "SELECT * FROM saved_games WHERE save_id = ?", (save_id,)
+        ).fetchone()
+        return self._row_to_save(row) if row else None
+    
+    def put_save(self, save_data: Dict):
+        with self.connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO saved_games
+                   (save_id, username, game_name, created_at, last_modified,
+                    tour, elixir, hp, is_completed, game_state, stats)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    save_data['save_id'], save_data['username'], save_data['game_name'],
+                    save_data['created_at'], save_data['last_modified'],
+                    save_data['tour'], save_data['elixir'], save_data['hp'],
+                    int(save_data.get('is_completed', False)),
+                    json.dumps(save_data['game_state'], ensure_ascii=False),
+                    json.dumps(save_data['stats'], ensure_ascii=False) if save_data.get('stats') else None
+                )
+            )
+    
+    def delete_save(self, save_id: str):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM saved_games WHERE save_id = ?", (save_id,))
+    
+    def list_saves(self, username: str) -> List[Dict]:
+        rows = self.connect().execute(
+            "SELECT * FROM saved_games WHERE username = ?", (username,)
+        ).fetchall()
+        return [self._row_to_save(row) for row in rows]
+    
+    def rebuild_saves_index(self) -> int:
+        """Reconstruire l'index des sauvegardes par propriétaire"""
+        conn = self.connect()
+        conn.execute("REINDEX idx_saves_owner")
+        return conn.execute("SELECT COUNT(*) FROM saved_games").fetchone()[0]
+    
+    def list_save_summaries(self, username: str, limit: int, after: Optional[tuple] = None) -> List[Dict]:
+        """Métadonnées des sauvegardes, plus récentes d'abord, sans lire les game_state"""
+        colonnes = ", ".join(f.name for f in fields(SaveSummary))
+        requete = f"SELECT {colonnes} FROM saved_games WHERE username = ?"
+        parametres = [username]
+        if after is not None:
+            requete += " AND (last_modified < ? OR (last_modified = ? AND save_id < ?))"
+            parametres += [after[0], after[0], after[1]]
+        requete += " ORDER BY last_modified DESC, save_id DESC LIMIT ?"
+        rows = self.connect().execute(requete, parametres + [limit]).fetchall()
+        return [{**dict(row), 'is_completed': bool(row['is_completed'])} for row in rows]
+    
+    # --- Statistiques ---
+    
+    def append_stats(self, username: str, stats_dict: Dict):
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT INTO game_stats (username, date, data) VALUES (?, ?, ?)",
+                (username, stats_dict.get('date', ''), json.dumps(stats_dict, ensure_ascii=False))
+            )
+            self._record_aggregate(conn, username, stats_dict)
+    
+    def _record_aggregate(self, conn: sqlite3.Connection, username: str, stats_dict: Dict):
+        row = conn.execute("SELECT data FROM stats_aggregates WHERE username = ?", (username,)).fetchone()
+        aggregate = StatsAggregate.from_dict(json.loads(row['data'])) if row else StatsAggregate()
+        aggregate.record(stats_dict)
+        conn.execute(
+            "INSERT OR REPLACE INTO stats_aggregates (username, data) VALUES (?, ?)",
+            (username, json.dumps(aggregate.to_dict(), ensure_ascii=False))
+        )
+    
+    def get_aggregate(self, username: str) -> Optional[StatsAggregate]:
+        row = self.connect().execute(
+            "SELECT data FROM stats_aggregates WHERE username = ?", (username,)
+        ).fetchone()
+        return StatsAggregate.from_dict(json.loads(row['data'])) if row else None
+    
+    def rebuild_aggregates(self) -> int:
+        """Recalculer tous les agrégats depuis l'historique complet"""
+        historique = {}
+        for username, stats_dict in self.iter_all_stats():
+            historique.setdefault(username, []).append(stats_dict)
+        with self.connect() as conn:
+            conn.execute("DELETE FROM stats_aggregates")
+            conn.executemany(
+                "INSERT INTO stats_aggregates (username, data) VALUES (?, ?)",
+                [(username, json.dumps(StatsAggregate.build(user_stats).to_dict(), ensure_ascii=False))
+                 for username, user_stats in historique.items()]
+            )
+        return len(historique)
+    
+    def record_game(self, username: str, stats_dict: Dict):
+        """Enregistrer une partie et mettre à jour le compte dans la même transaction"""
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT INTO game_stats (username, date, data) VALUES (?, ?, ?)",
+                (username, stats_dict.get('date', ''), json.dumps(stats_dict, ensure_ascii=False))
+            )
+            self._record_aggregate(conn, username, stats_dict)
+            conn.execute(
+                """UPDATE accounts SET
+                       total_games = total_games + 1,
+                       total_wins = total_wins + ?,
+                       total_losses = total_losses + ?,
+                       best_tour = MAX(best_tour, ?),
+                       favorite_leader = ?,
+                       favorite_modificateur = ?
+                   WHERE username = ?""",
+                (
+                    int(bool(stats_dict['victoire'])), int(not stats_dict['victoire']),
+                    stats_dict['tour_final'], stats_dict['leader_utilise'],
+                    stats_dict['modificateur_utilise'], username
+                )
+            )
+    
+    def get_stats(self, username: str) -> List[Dict]:
+        rows = self.connect().execute(
+            "SELECT data FROM game_stats WHERE username = ? ORDER BY id", (username,)
+        ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+    
+    def iter_all_stats(self):
+        """Itère sur (username, stats_dict) pour toutes les parties enregistrées"""
+        for row in self.connect().execute("SELECT username, data FROM game_stats ORDER BY id"):
+            yield row['username'], json.loads(row['data'])
+
+
+STORAGE_BACKENDS = {
+    JsonStorage.name: JsonStorage,
+    SQLiteStorage.name: SQLiteStorage,
+}
+
+
+class DatabaseManager:
+    """Gestionnaire de base de données avec backend de stockage interchangeable"""
+    
+    def __init__(self, data_dir="data", backend=None):
+        self.data_dir = data_dir
+        self.ensure_data_directory()
         
+        # Backend choisi : instance, nom ("json", "sqlite") ou variable d'environnement
+        if backend is None:
+            backend = os.environ.get("MERGE_TACTICS_STORAGE", "json")
+        if isinstance(backend, str):
+            if backend not in STORAGE_BACKENDS:
+                raise ValueError(f"Backend de stockage inconnu : {backend}")
+            backend = STORAGE_BACKENDS[backend](data_dir)
+        self.storage = backend
+    
+    def ensure_data_directory(self):
+        """Créer le dossier data s'il n'existe pas"""
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+    
+    @staticmethod
+    def serialize_game_state(game_session) -> Dict:
+        """Sérialiser l'état du jeu d'une session"""
+        return {
+            'tour': game_session.tour,
+            'elixir': game_session.etat.elixir,
+            'hp': game_session.etat.hp,
+            'main': [{'nom': c.nom, 'niveau': c.niveau, 'traits': c.traits, 'cout': c.cout} for c in game_session.etat.main],
+            'bench': [{'nom': c.nom, 'niveau': c.niveau, 'traits': c.traits, 'cout': c.cout} for c in game_session.etat.bench],
+            'modificateurs_actifs': game_session.modificateurs_actifs,
+            'leader_choisi': game_session.leader_choisi,
+            'bonus_familles_actifs': game_session.bonus_familles_actifs
+        }
+    
+    # === GESTION DES COMPTES ===
+    
+    def create_account(self, username: str, email: str, password: str) -> bool:
+        """Créer un nouveau compte (False si le nom ou l'email est déjà pris)"""
         # Hasher le mot de passe
         password_hash = hashlib.sha256(password.encode()).hexdigest()
         
@@ -154,80 +888,54 @@ class DatabaseManager:
             created_at=datetime.now().isoformat()
         )
         
-        accounts[username] = account.to_dict()
-        self.save_json(self.accounts_file, accounts)
-        return True
+        # Unicité du nom et de l'email vérifiée par le backend, dans la même opération que l'écriture
+        return self.storage.insert_account(account.to_dict())
     
     def authenticate(self, username: str, password: str) -> bool:
         """Authentifier un utilisateur"""
-        accounts = self.load_json(self.accounts_file)
+        account_data = self.storage.get_account(username)
         
-        if username not in accounts:
+        if account_data is None:
             return False
         
         password_hash = hashlib.sha256(password.encode()).hexdigest()
-        return accounts[username]['password_hash'] == password_hash
+        return account_data['password_hash'] == password_hash
     
     def get_account(self, username: str) -> Optional[PlayerAccount]:
         """Récupérer un compte"""
-        accounts = self.load_json(self.accounts_file)
+        account_data = self.storage.get_account(username)
         
-        if username not in accounts:
+        if account_data is None:
             return None
         
-        return PlayerAccount.from_dict(accounts[username])
+        return PlayerAccount.from_dict(account_data)
     
     def update_account_stats(self, username: str, stats: GameStats):
         """Mettre à jour les statistiques d'un compte"""
-        accounts = self.load_json(self.accounts_file)
+        account_data = self.storage.get_account(username)
         
-        if username not in accounts:
+        if account_data is None:
             return False
         
-        account_data = accounts[username]
-        account_data['total_games'] += 1
+        apply_game_to_account(account_data, asdict(stats))
         
-        if stats.victoire:
-            account_data['total_wins'] += 1
-        else:
-            account_data['total_losses'] += 1
-        
-        account_data['best_tour'] = max(account_data.get('best_tour', 0), stats.tour_final)
-        account_data['favorite_leader'] = stats.leader_utilise
-        account_data['favorite_modificateur'] = stats.modificateur_utilise
-        
-        accounts[username] = account_data
-        self.save_json(self.accounts_file, accounts)
+        self.storage.update_account(username, account_data)
         return True
     
     # === GESTION DES SAUVEGARDES ===
     
     def save_game(self, username: str, game_session, game_name: str = None) -> str:
         """Sauvegarder une partie"""
-        games = self.load_json(self.games_file)
-        
         save_id = str(uuid.uuid4())
         current_time = datetime.now().isoformat()
         
         if not game_name:
             game_name = f"Partie du {datetime.now().strftime('%d/%m/%Y %H:%M')}"
         
-        # Sérialiser l'état du jeu
-        game_state = {
-            'tour': game_session.tour,
-            'elixir': game_session.etat.elixir,
-            'hp': game_session.etat.hp,
-            'main': [{'nom': c.nom, 'niveau': c.niveau, 'traits': c.traits, 'cout': c.cout} for c in game_session.etat.main],
-            'bench': [{'nom': c.nom, 'niveau': c.niveau, 'traits': c.traits, 'cout': c.cout} for c in game_session.etat.bench],
-            'modificateurs_actifs': game_session.modificateurs_actifs,
-            'leader_choisi': game_session.leader_choisi,
-            'bonus_familles_actifs': game_session.bonus_familles_actifs
-        }
-        
         saved_game = SavedGame(
             save_id=save_id,
             username=username,
-            game_state=game_state,
+            game_state=self.serialize_game_state(game_session),
             created_at=current_time,
             last_modified=current_time,
             game_name=game_name,
@@ -236,152 +944,170 @@ class DatabaseManager:
             hp=game_session.etat.hp
         )
         
-        games[save_id] = saved_game.to_dict()
-        self.save_json(self.games_file, games)
+        self.storage.put_save(saved_game.to_dict())
         
         return save_id
     
     def load_game(self, save_id: str) -> Optional[SavedGame]:
         """Charger une partie sauvegardée"""
-        games = self.load_json(self.games_file)
+        save_data = self.storage.get_save(save_id)
         
-        if save_id not in games:
+        if save_data is None:
             return None
         
-        return SavedGame.from_dict(games[save_id])
+        return SavedGame.from_dict(save_data)
     
     def get_user_saves(self, username: str) -> List[SavedGame]:
         """Récupérer toutes les sauvegardes d'un utilisateur"""
-        games = self.load_json(self.games_file)
-        user_saves = []
-        
-        for save_data in games.values():
-            if save_data['username'] == username:
-                user_saves.append(SavedGame.from_dict(save_data))
+        user_saves = [SavedGame.from_dict(save_data) for save_data in self.storage.list_saves(username)]
         
         # Trier par date de modification (plus récent en premier)
         user_saves.sort(key=lambda x: x.last_modified, reverse=True)
         return user_saves
     
+    def list_save_summaries(self, username: str, limit: int = 50, cursor: Optional[str] = None):
+        """Lister une page de métadonnées de sauvegardes (plus récentes d'abord)
+        
+        Renvoie (sauvegardes, curseur suivant) ; le curseur vaut None sur la dernière page.
+        """
+        after = self.decode_cursor(cursor) if cursor else None
+        summaries = self.storage.list_save_summaries(username, limit + 1, after)
+        
+        next_cursor = None
+        if len(summaries) > limit:
+            summaries = summaries[:limit]
+            dernier = summaries[-1]
+            next_cursor = self.encode_cursor(dernier['last_modified'], dernier['save_id'])
+        return summaries, next_cursor
+    
+    @staticmethod
+    def encode_cursor(last_modified: str, save_id: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps([last_modified, save_id]).encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        try:
+            last_modified, save_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError("Curseur de pagination invalide")
+        return (last_modified, save_id)
+    
     def delete_save(self, save_id: str, username: str) -> bool:
         """Supprimer une sauvegarde (seulement si elle appartient à l'utilisateur)"""
-        games = self.load_json(self.games_file)
+        save_data = self.storage.get_save(save_id)
         
-        if save_id not in games:
+        if save_data is None:
             return False
         
-        if games[save_id]['username'] != username:
+        if save_data['username'] != username:
             return False
         
-        del games[save_id]
-        self.save_json(self.games_file, games)
+        self.storage.delete_save(save_id)
         return True
     
     def update_save(self, save_id: str, game_session, username: str) -> bool:
         """Mettre à jour une sauvegarde existante"""
-        games = self.load_json(self.games_file)
+        save_data = self.storage.get_save(save_id)
         
-        if save_id not in games:
+        if save_data is None:
             return False
         
-        if games[save_id]['username'] != username:
+        if save_data['username'] != username:
             return False
         
         # Mettre à jour l'état du jeu
-        game_state = {
-            'tour': game_session.tour,
-            'elixir': game_session.etat.elixir,
-            'hp': game_session.etat.hp,
-            'main': [{'nom': c.nom, 'niveau': c.niveau, 'traits': c.traits, 'cout': c.cout} for c in game_session.etat.main],
-            'bench': [{'nom': c.nom, 'niveau': c.niveau, 'traits': c.traits, 'cout': c.cout} for c in game_session.etat.bench],
-            'modificateurs_actifs': game_session.modificateurs_actifs,
-            'leader_choisi': game_session.leader_choisi,
-            'bonus_familles_actifs': game_session.bonus_familles_actifs
-        }
-        
-        games[save_id]['game_state'] = game_state
-        games[save_id]['last_modified'] = datetime.now().isoformat()
-        games[save_id]['tour'] = game_session.tour
-        games[save_id]['elixir'] = game_session.etat.elixir
-        games[save_id]['hp'] = game_session.etat.hp
+        save_data['game_state'] = self.serialize_game_state(game_session)
+        save_data['last_modified'] = datetime.now().isoformat()
+        save_data['tour'] = game_session.tour
+        save_data['elixir'] = game_session.etat.elixir
+        save_data['hp'] = game_session.etat.hp
         
-        self.save_json(self.games_file, games)
+        self.storage.put_save(save_data)
         return True
     
     # === GESTION DES STATISTIQUES ===
     
     def save_game_stats(self, username: str, stats: GameStats):
         """Sauvegarder les statistiques d'une partie"""
-        all_stats = self.load_json(self.stats_file)
-        
-        if username not in all_stats:
-            all_stats[username] = []
-        
         stats_dict = asdict(stats)
         stats_dict['date'] = datetime.now().isoformat()
         
-        all_stats[username].append(stats_dict)
-        self.save_json(self.stats_file, all_stats)
-        
-        # Mettre à jour les stats du compte
-        self.update_account_stats(username, stats)
+        # Enregistre la partie et met à jour les stats du compte
+        self.storage.record_game(username, stats_dict)
     
     def get_user_stats(self, username: str) -> Dict:
-        """Récupérer les statistiques d'un utilisateur"""
-        all_stats = self.load_json(self.stats_file)
-        user_stats = all_stats.get(username, [])
-        
-        if not user_stats:
-            return {
-                'total_games': 0,
-                'wins': 0,
-                'losses': 0,
-                'win_rate': 0,
-                'average_tour': 0,
-                'best_tour': 0,
-                'total_elixir': 0,
-                'total_fusions': 0,
-                'favorite_leader': '',
-                'favorite_modificateur': '',
-                'recent_games': []
-            }
-        
-        # Calculer les statistiques
-        total_games = len(user_stats)
-        wins = sum(1 for stat in user_stats if stat['victoire'])
-        losses = total_games - wins
-        win_rate = (wins / total_games * 100) if total_games > 0 else 0
-        
-        tours = [stat['tour_final'] for stat in user_stats]
-        average_tour = sum(tours) / len(tours) if tours else 0
-        best_tour = max(tours) if tours else 0
-        
-        total_elixir = sum(stat['elixir_total_gagne'] for stat in user_stats)
-        total_fusions = sum(stat['fusions_effectuees'] for stat in user_stats)
-        
-        # Leaders et modificateurs les plus utilisés
-        leaders = [stat['leader_utilise'] for stat in user_stats if stat['leader_utilise']]
-        modificateurs = [stat['modificateur_utilise'] for stat in user_stats if stat['modificateur_utilise']]
-        
-        favorite_leader = max(set(leaders), key=leaders.count) if leaders else ''
-        favorite_modificateur = max(set(modificateurs), key=modificateurs.count) if modificateurs else ''
-        
-        # Parties récentes (10 dernières)
-        recent_games = sorted(user_stats, key=lambda x: x['date'], reverse=True)[:10]
-        
-        return {
-            'total_games': total_games,
-            'wins': wins,
-            'losses': losses,
-            'win_rate': round(win_rate, 1),
-            'average_tour': round(average_tour, 1),
-            'best_tour': best_tour,
-            'total_elixir': total_elixir,
-            'total_fusions': total_fusions,
-            'favorite_leader': favorite_leader,
-            'favorite_modificateur': favorite_modificateur,
-            'recent_games': recent_games
-        }
+        """Récupérer les statistiques d'un utilisateur (lecture des agrégats)"""
+        aggregate = self.storage.get_aggregate(username)
+        return (aggregate or StatsAggregate()).summary()
+    
+    def rebuild_email_index(self) -> int:
+        """Reconstruire l'index email -> username depuis les comptes existants"""
+        return self.storage.rebuild_email_index()
+    
+    def rebuild_saves_index(self) -> int:
+        """Reconstruire l'index des métadonnées de sauvegardes"""
+        return self.storage.rebuild_saves_index()
+    
+    def rebuild_stats_aggregates(self) -> int:
+        """Reconstruire les agrégats de tous les joueurs depuis l'historique (réparation)"""
+        return self.storage.rebuild_aggregates()
+
+# === MIGRATION ===
+
+def migrate_json_to_sqlite(data_dir="data", sqlite_storage: Optional[SQLiteStorage] = None) -> Dict[str, int]:
+    """Copier en une fois les fichiers data/*.json dans la base SQLite"""
+    source = JsonStorage(data_dir)
+    source.compact()  # Reporter le journal dans les fichiers JSON avant la copie
+    cible = sqlite_storage or SQLiteStorage(data_dir)
+    resultat = {'accounts': 0, 'accounts_ignores': 0, 'saves': 0, 'stats': 0}
+    
+    for username, account_data in source.load_json(source.accounts_file).items():
+        account = PlayerAccount.from_dict({**account_data, 'username': username})
+        if cible.insert_account(account.to_dict()):
+            resultat['accounts'] += 1
+        else:
+            # Compte déjà migré ou email en double
+            resultat['accounts_ignores'] += 1
+    
+    for save_data in source.load_json(source.games_file).values():
+        cible.put_save(SavedGame.from_dict(save_data).to_dict())
+        resultat['saves'] += 1
+    
+    # Les statistiques n'ont pas de clé naturelle : ne les copier que dans une table vide
+    deja_migrees = cible.connect().execute("SELECT COUNT(*) FROM game_stats").fetchone()[0]
+    if not deja_migrees:
+        for username, stats_dict in source.iter_all_stats():
+            cible.append_stats(username, stats_dict)
+            resultat['stats'] += 1
+    
+    return resultat
 
 # Instance globale du gestionnaire de base de données
 db = DatabaseManager()
+
+if __name__ == "__main__":
+    # Utilisation : python models.py migrate|compact|rebuild-stats|rebuild-email-index|rebuild-saves-index [data_dir]
+    if len(sys.argv) >= 2 and sys.argv[1] == "rebuild-saves-index":
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else "data"
+        nb_sauvegardes = DatabaseManager(data_dir).rebuild_saves_index()
+        print(f"✅ Index des sauvegardes reconstruit ({nb_sauvegardes} sauvegardes)")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "rebuild-email-index":
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else "data"
+        nb_emails = DatabaseManager(data_dir).rebuild_email_index()
+        print(f"✅ Index des emails reconstruit ({nb_emails} comptes)")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "rebuild-stats":
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else "data"
+        nb_joueurs = DatabaseManager(data_dir).rebuild_stats_aggregates()
+        print(f"✅ Agrégats reconstruits pour {nb_joueurs} joueurs")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "compact":
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else "data"
+        nb_entrees = JsonStorage(data_dir).compact()
+        print(f"✅ Journal compacté : {nb_entrees} parties reportées dans game_stats.json")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else "data"
+        resultat = migrate_json_to_sqlite(data_dir)
+        print(f"✅ Migration terminée : {resultat['accounts']} comptes, {resultat['saves']} sauvegardes, "
+              f"{resultat['stats']} statistiques ({resultat['accounts_ignores']} comptes ignorés)")
+        print("💡 Lancez le serveur avec MERGE_TACTICS_STORAGE=sqlite pour utiliser la base SQLite")
+    else:
+        print("Utilisation : python models.py migrate|compact|rebuild-stats|rebuild-email-index|rebuild-saves-index [data_dir]")
@@ -0,0 +1,268 @@
+"""
+Planification des achats et ventes sur plusieurs tours
+
+Recherche en faisceau sur des scénarios tirés au hasard (boutiques futures et
+issue des combats), approfondie tour par tour tant que le délai le permet :
+la réponse est toujours celle de la dernière profondeur terminée.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from main import (BIBLIOTHEQUE_CARTES, BITS_NOMS, TAILLE_FUSION_BANC, Carte, GameSession,
+                  max_cartes_plateau, meilleur_choix, resoudre_fusions)
+from table_familles import MAX_NOMS_TABLE, table_partagee
+
+# Valeur d'un état en fin d'horizon : synergie du meilleur plateau, puissance des
+# cartes posées (coût × 2^(niveau-1)) et élixir non dépensé
+POIDS_SYNERGIE = 1.0
+POIDS_ELIXIR = 0.5
+
+Action = Tuple  # ("acheter", nom, niveau) | ("vendre", nom, niveau) | ("passer",)
+
+
+class DelaiDepasse(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ReglesPlan:
+    """Règles de la partie utiles au planificateur (élixir, leader, modificateurs)"""
+    elixir_par_tour: int = 4
+    bonus_merge: int = 0
+    bonus_defeat: int = 0
+    interets: bool = False  # de_plus_en_plus_riche
+    choix_par_tour: int = 3
+    modificateurs: Tuple[str, ...] = ()
+    
+    @classmethod
+    def depuis_session(cls, game_session: GameSession) -> "ReglesPlan":
+        leader = game_session.leader_choisi or {}
+        return cls(
+            elixir_par_tour=game_session.elixir_par_tour,
+            bonus_merge=leader.get("bonus_merge", 0),
+            bonus_defeat=leader.get("bonus_defeat", 0),
+            interets="de_plus_en_plus_riche" in game_session.modificateurs_actifs,
+            choix_par_tour=game_session.choix_par_tour,
+            modificateurs=tuple(game_session.modificateurs_actifs),
+        )
+
+
+@dataclass(frozen=True)
+class EtatPlan:
+    plateau: Tuple[Carte, ...]
+    banc: Tuple[Carte, ...]
+    elixir: int
+    tour: int
+    interets: int = 0  # intérêts en attente pour le prochain tour
+    
+    def cle(self) -> Tuple:
+        return (tuple(sorted((c.nom, c.niveau) for c in self.plateau)),
+                tuple(sorted((c.nom, c.niveau) for c in self.banc)), self.elixir, self.interets)
+
+
+@dataclass
+class Scenario:
+    """Futur tiré au hasard : boutique et défaite (ou non) de chaque tour à venir"""
+    boutiques: List[List[Carte]]
+    defaites: List[bool]
+
+
+@dataclass
+class Plan:
+    actions: List[Action]  # tour actuel, puis suite indicative sur le premier scénario
+    valeur: float
+    profondeur: int  # nombre de tours entièrement explorés (0 = choix glouton)
+    noeuds: int = 0
+    interrompu: bool = False  # délai atteint avant la profondeur demandée
+    valeurs_premier_tour: Dict[Tuple[Action, ...], float] = field(default_factory=dict)
+    
+    def actions_du_tour(self) -> List[Action]:
+        """Actions du tour actuel (jusqu'au premier passage de tour)"""
+        if ("passer",) in self.actions:
+            return self.actions[:self.actions.index(("passer",))]
+        return list(self.actions)
+
+
+def decrire_action(action: Action) -> str:
+    if action[0] == "passer":
+        return "fin du tour"
+    return f"{action[0]} {action[1]} (niv. {action[2]})"
+
+
+def valeur_etat(etat: EtatPlan, regles: ReglesPlan) -> float:
+    """Valeur heuristique : meilleur plateau possible (cartes les plus puissantes) + élixir"""
+    taille = min(max_cartes_plateau(etat.tour, regles.modificateurs), MAX_NOMS_TABLE)
+    cartes = sorted(etat.plateau + etat.banc, key=lambda c: -c.cout * 2 ** (c.niveau - 1))
+    posees = set()
+    masque_noms = 0
+    puissance = 0
+    for carte in cartes:
+        if len(posees) == taille:
+            break
+        if (carte.nom, carte.niveau) in posees:
+            continue  # Deux cartes identiques fusionneraient
+        posees.add((carte.nom, carte.niveau))
+        masque_noms |= BITS_NOMS.get(carte.nom, 0)
+        puissance += carte.cout * 2 ** (carte.niveau - 1)
+    return (POIDS_SYNERGIE * table_partagee().score(masque_noms) + puissance
+            + POIDS_ELIXIR * (etat.elixir + etat.interets))
+
+
+def acheter(etat: EtatPlan, carte: Carte, regles: ReglesPlan) -> EtatPlan:
+    """Achat sur le banc puis fusions du banc (+1 élixir par fusion, bonus du leader)"""
+    banc = list(etat.banc)
+    banc.append(carte)
+    fusions = resoudre_fusions(banc, TAILLE_FUSION_BANC)
+    elixir = etat.elixir - carte.cout
+    if fusions:
+        elixir += len(fusions) + regles.bonus_merge
+    return EtatPlan(etat.plateau, tuple(banc), elixir, etat.tour, etat.interets)
+
+
+def vendre(etat: EtatPlan, carte: Carte, regles: ReglesPlan) -> EtatPlan:
+    """Vente d'une carte : moitié du coût (au moins 1), plus le bonus de défaite du leader"""
+    plateau, banc = list(etat.plateau), list(etat.banc)
+    zone = banc if any(c is carte for c in banc) else plateau
+    zone.pop(next(i for i, c in enumerate(zone) if c is carte))
+    elixir = etat.elixir + max(1, carte.cout // 2) + regles.bonus_defeat
+    return EtatPlan(tuple(plateau), tuple(banc), elixir, etat.tour, etat.interets)
+
+
+def fin_de_tour(etat: EtatPlan, defaite: bool, regles: ReglesPlan) -> EtatPlan:
+    """Combat (bonus de défaite du leader), intérêts sur l'élixir qui reste alors, puis élixir du tour suivant"""
+    elixir = etat.elixir
+    if defaite:
+        elixir += regles.bonus_defeat
+    interets = etat.interets + (elixir // 2 if regles.interets else 0)
+    elixir += regles.elixir_par_tour + interets
+    return EtatPlan(etat.plateau, etat.banc, elixir, etat.tour + 1)
+
+
+def coups_du_tour(etat: EtatPlan, boutique: List[Carte], regles: ReglesPlan,
+                  verifier=lambda: None) -> List[Tuple[EtatPlan, List[Action]]]:
+    """Toutes les suites d'actions d'un tour (au plus une vente, puis des achats), états dédoublonnés"""
+    departs = [(etat, [])]
+    vues_vente = set()
+    for carte in etat.banc + etat.plateau:
+        if (carte.nom, carte.niveau) not in vues_vente:
+            vues_vente.add((carte.nom, carte.niveau))
+            departs.append((vendre(etat, carte, regles), [("vendre", carte.nom, carte.niveau)]))
+    
+    resultats = {}
+    
+    def explorer(courant: EtatPlan, actions: List[Action], restantes: Tuple[int, ...]):
+        verifier()
+        resultats.setdefault(courant.cle(), (courant, actions))
+        for position, i in enumerate(restantes):
+            carte = boutique[i]
+            if carte.cout <= courant.elixir:
+                explorer(acheter(courant, carte, regles), actions + [("acheter", carte.nom, carte.niveau)],
+                         restantes[:position] + restantes[position + 1:])
+    
+    for depart, actions in departs:
+        explorer(depart, actions, tuple(range(len(boutique))))
+    return list(resultats.values())
+
+
+def tirer_scenario(rng: random.Random, tours: int, regles: ReglesPlan, proba_defaite: float) -> Scenario:
+    """Boutiques uniformes sur le catalogue (cartes niveau 1) et défaites avec la probabilité donnée"""
+    noms = list(BIBLIOTHEQUE_CARTES)
+    boutiques = []
+    for _ in range(tours):
+        boutique = []
+        for nom in rng.choices(noms, k=regles.choix_par_tour):
+            base = BIBLIOTHEQUE_CARTES[nom]
+            boutique.append(Carte(base.nom, base.cout, base.traits, 1))
+        boutiques.append(boutique)
+    return Scenario(boutiques, [rng.random() < proba_defaite for _ in range(tours)])
+
+
+class Planificateur:
+    """Recherche en faisceau sur plusieurs tours, par approfondissement itératif sous délai"""
+    
+    def __init__(self, regles: ReglesPlan, tours: int = 3, largeur: int = 6, scenarios: int = 3,
+                 proba_defaite: float = 0.5, graine: int = 0):
+        self.regles = regles
+        self.tours = tours
+        self.largeur = largeur
+        rng = random.Random(graine)
+        self.scenarios = [tirer_scenario(rng, tours, regles, proba_defaite) for _ in range(scenarios)]
+        self.noeuds = 0
+        self._limite = None
+    
+    def _verifier(self):
+        self.noeuds += 1
+        if self._limite is not None and time.perf_counter() > self._limite:
+            raise DelaiDepasse()
+    
+    def _meilleure_suite(self, etat: EtatPlan, scenario: Scenario, restant: int) -> Tuple[float, List[Action]]:
+        """Meilleure valeur atteignable sur `restant` tours de ce scénario (faisceau de `largeur` états)"""
+        faisceau = [(valeur_etat(etat, self.regles), etat, [])]
+        for t in range(1, restant + 1):
+            candidats = {}
+            for _, courant, actions in faisceau:
+                for suivant, coups in coups_du_tour(courant, scenario.boutiques[t], self.regles, self._verifier):
+                    suivant = fin_de_tour(suivant, scenario.defaites[t], self.regles)
+                    cle = suivant.cle()
+                    if cle not in candidats:
+                        candidats[cle] = (valeur_etat(suivant, self.regles), suivant,
+                                          actions + coups + [("passer",)])
+            faisceau = sorted(candidats.values(), key=lambda x: -x[0])[:self.largeur]
+        return faisceau[0][0], faisceau[0][2]
+    
+    def planifier(self, etat: EtatPlan, boutique: List[Carte], delai_ms: Optional[float] = None,
+                  profondeur_max: Optional[int] = None) -> Optional[Plan]:
+        """Meilleur plan de la dernière profondeur terminée avant le délai (None si aucune)"""
+        self._limite = time.perf_counter() + delai_ms / 1000 if delai_ms is not None else None
+        self.noeuds = 0
+        profondeur_max = min(profondeur_max or self.tours, self.tours)
+        plan = None
+        try:
+            premiers = coups_du_tour(etat, boutique, self.regles, self._verifier)
+            for profondeur in range(1, profondeur_max + 1):
+                valeurs = {}
+                meilleur = None
+                for suivant, coups in premiers:
+                    total = 0.0
+                    suite_premier_scenario = []
+                    for k, scenario in enumerate(self.scenarios):
+                        apres = fin_de_tour(suivant, scenario.defaites[0], self.regles)
+                        valeur, suite = self._meilleure_suite(apres, scenario, profondeur - 1)
+                        total += valeur
+                        if k == 0:
+                            suite_premier_scenario = suite
+                    moyenne = total / len(self.scenarios)
+                    valeurs[tuple(coups)] = moyenne
+                    if meilleur is None or moyenne > meilleur[0] + 1e-9:
+                        meilleur = (moyenne, coups + [("passer",)] + suite_premier_scenario)
+                plan = Plan(actions=meilleur[1], valeur=meilleur[0], profondeur=profondeur,
+                            noeuds=self.noeuds, valeurs_premier_tour=valeurs)
+        except DelaiDepasse:
+            if plan is not None:
+                plan.interrompu = True
+                plan.noeuds = self.noeuds
+        finally:
+            self._limite = None
+        return plan
+
+
+def etat_depuis_session(game_session: GameSession) -> EtatPlan:
+    etat = game_session.etat
+    return EtatPlan(tuple(etat.main), tuple(etat.bench), etat.elixir, game_session.tour,
+                    game_session.interets_stockes)
+
+
+def planifier_session(game_session: GameSession, boutique: List[Carte], tours: int = 3,
+                      delai_ms: float = 1000, **options) -> Plan:
+    """Plan pour la boutique actuelle ; sans profondeur terminée, le choix glouton du pipeline"""
+    planificateur = Planificateur(ReglesPlan.depuis_session(game_session), tours=tours, **options)
+    plan = planificateur.planifier(etat_depuis_session(game_session), boutique, delai_ms)
+    if plan is None:
+        carte = meilleur_choix(boutique, game_session.etat, game_session.weights, avec_familles=True)
+        actions = [("acheter", carte.nom, carte.niveau)] if carte else []
+        plan = Plan(actions=actions + [("passer",)], valeur=float('-inf'), profondeur=0,
+                    noeuds=planificateur.noeuds, interrompu=True)
+    return plan
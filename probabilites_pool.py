@@ -0,0 +1,107 @@
+"""
+Tables de probabilités du pool partagé (loi hypergéométrique)
+
+Chaque boutique montre `choix` cartes tirées sans remise dans le pool restant ;
+le nombre d'exemplaires d'un nom vus dans une boutique suit donc une loi
+hypergéométrique, et sur plusieurs boutiques la somme de ces tirages. Les tables
+donnent, pour chaque palier de coût et chaque nombre d'exemplaires déjà pris,
+la probabilité de voir au moins k exemplaires dans les n prochaines boutiques.
+Elles sont calculées une fois par catalogue puis lues en O(1).
+"""
+
+from functools import cached_property, lru_cache
+from math import comb
+from typing import Dict, List, Sequence, Tuple
+
+from simulation_boutique import CHOIX_PAR_TOUR, EXEMPLAIRES_DEFAUT, EXEMPLAIRES_PAR_COUT, HORIZON_TOURS
+
+# Dimensions des tables : exemplaires cherchés (au moins k) et boutiques à venir
+K_MAX = 4
+BOUTIQUES_MAX = 6
+
+# Disponibilité d'un nom quand le pool est complet (ancienne valeur par défaut de score_disruption)
+DISPONIBILITE_NEUTRE = 4.0
+DISPONIBILITE_MIN = 0.5
+
+
+def _loi_boutique(pool: int, restants: int, choix: int) -> List[float]:
+    """P(x exemplaires dans une boutique) pour x = 0..K_MAX (le dernier terme regroupe "K_MAX ou plus")"""
+    choix = min(choix, pool)
+    if pool <= 0:
+        return [1.0] + [0.0] * K_MAX
+    total = comb(pool, choix)
+    loi = [comb(restants, x) * comb(pool - restants, choix - x) / total for x in range(min(restants, choix) + 1)]
+    loi += [0.0] * (K_MAX + 1 - len(loi))
+    return loi[:K_MAX] + [sum(loi[K_MAX:])]
+
+
+def _convoluer(a: List[float], b: List[float]) -> List[float]:
+    resultat = [0.0] * (K_MAX + 1)
+    for i, pa in enumerate(a):
+        if pa:
+            for j, pb in enumerate(b):
+                resultat[min(i + j, K_MAX)] += pa * pb
+    return resultat
+
+
+class TablePool:
+    """P(au moins k exemplaires vus en n boutiques) par (coût, exemplaires pris), à plat pour un accès O(1)"""
+    
+    def __init__(self, couts: Sequence[Tuple[str, int]], choix: int = CHOIX_PAR_TOUR):
+        self.couts = dict(couts)
+        self.choix = choix
+        paliers = sorted(set(self.couts.values()))
+        self.indice_cout = {cout: i for i, cout in enumerate(paliers)}
+        self.exemplaires = [EXEMPLAIRES_PAR_COUT.get(cout, EXEMPLAIRES_DEFAUT) for cout in paliers]
+        self.pris_max = max(self.exemplaires)
+        pool = sum(EXEMPLAIRES_PAR_COUT.get(cout, EXEMPLAIRES_DEFAUT) for cout in self.couts.values())
+        
+        # Pas de chaque dimension dans self.valeurs : [palier][pris][boutiques][k]
+        self._pas_k = 1
+        self._pas_boutiques = (K_MAX + 1) * self._pas_k
+        self._pas_pris = (BOUTIQUES_MAX + 1) * self._pas_boutiques
+        self._pas_palier = (self.pris_max + 1) * self._pas_pris
+        self.valeurs = [0.0] * (len(paliers) * self._pas_palier)
+        for i, exemplaires in enumerate(self.exemplaires):
+            for pris in range(self.pris_max + 1):
+                restants = max(0, exemplaires - pris)
+                # Le pool restant ne perd que les exemplaires pris de ce nom (les autres sont inconnus)
+                loi = _loi_boutique(pool - min(pris, exemplaires), restants, choix)
+                cumul = [1.0] + [0.0] * K_MAX
+                for boutiques in range(BOUTIQUES_MAX + 1):
+                    debut = i * self._pas_palier + pris * self._pas_pris + boutiques * self._pas_boutiques
+                    for k in range(K_MAX + 1):
+                        self.valeurs[debut + k] = min(1.0, sum(cumul[k:]))
+                    cumul = _convoluer(cumul, loi)
+    
+    def proba(self, cout: int, pris: int, k: int, boutiques: int = HORIZON_TOURS) -> float:
+        """Probabilité de voir au moins k exemplaires d'un nom de ce coût dans les prochaines boutiques"""
+        if k <= 0:
+            return 1.0
+        if k > K_MAX:
+            return 0.0
+        pris = min(max(pris, 0), self.pris_max)
+        return self.valeurs[self.indice_cout[cout] * self._pas_palier + pris * self._pas_pris
+                            + min(boutiques, BOUTIQUES_MAX) * self._pas_boutiques + k]
+    
+    def proba_nom(self, nom: str, historique: Dict[str, int], k: int, boutiques: int = HORIZON_TOURS) -> float:
+        return self.proba(self.couts[nom], historique.get(nom, 0), k, boutiques)
+    
+    @cached_property
+    def reference(self) -> float:
+        """P(voir au moins un exemplaire sur l'horizon) moyenne des noms quand le pool est complet"""
+        return sum(self.proba(cout, 0, 1) for cout in self.couts.values()) / len(self.couts)
+
+
+@lru_cache(maxsize=8)
+def table_pool(couts: Tuple[Tuple[str, int], ...], choix: int = CHOIX_PAR_TOUR) -> TablePool:
+    """Table calculée une fois par catalogue (et par nombre de choix en boutique)"""
+    return TablePool(couts, choix)
+
+
+def disponibilites_table(couts: Tuple[Tuple[str, int], ...], historique: Dict[str, int]) -> Dict[str, float]:
+    """Disponibilité de chaque nom dans les prochaines boutiques (4 = nom moyen, pool complet)"""
+    table = table_pool(couts)
+    echelle = DISPONIBILITE_NEUTRE / table.reference
+    return {nom: max(DISPONIBILITE_MIN, echelle * table.proba(cout, historique.get(nom, 0), 1))
+            for nom, cout in couts}
@@ -0,0 +1,74 @@
+"""
+Cache des recommandations, partagé par toutes les sessions
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from main import GameSession
+
+
+def cle_recommandations(game_session: GameSession, options, deadline_ms=None) -> Hashable:
+    """Clé de cache : empreinte de l'état, poids du score, options proposées (dans l'ordre affiché) et délai"""
+    return (
+        game_session.empreinte(),
+        game_session.elixir_par_tour,
+        tuple(sorted(game_session.weights.items())),
+        tuple((carte.nom, carte.niveau) for carte in options),
+        deadline_ms,
+    )
+
+
+class RecommendationCache:
+    """Cache LRU borné : clé de recommandations -> réponse déjà calculée
+    
+    Les joueurs retombent souvent sur les mêmes états (début de partie,
+    rafraîchissements de l'interface) : la réponse est alors servie sans rescorer.
+    """
+    
+    def __init__(self, max_entrees=4096):
+        self.max_entrees = max_entrees
+        self._entrees = OrderedDict()  # clé -> réponse, de la moins à la plus récemment utilisée
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    def get(self, cle: Hashable) -> Optional[Dict]:
+        with self._lock:
+            reponse = self._entrees.get(cle)
+            if reponse is None:
+                self.stats['misses'] += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.stats['hits'] += 1
+            return reponse
+    
+    def put(self, cle: Hashable, reponse: Dict):
+        if self.max_entrees <= 0:
+            return
+        with self._lock:
+            self._entrees[cle] = reponse
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.max_entrees:
+                self._entrees.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entrees.clear()
+    
+    def __len__(self):
+        return len(self._entrees)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = {**self.stats, 'entrees': len(self._entrees), 'max_entrees': self.max_entrees}
+        total = stats['hits'] + stats['misses']
+        stats['taux_hits'] = stats['hits'] / total if total else 0.0
+        return stats
+
+
+def create_recommendation_cache() -> RecommendationCache:
+    """Construire le cache depuis les variables d'environnement (0 le désactive)"""
+    return RecommendationCache(max_entrees=int(os.environ.get("MERGE_TACTICS_RECO_CACHE_SIZE", 4096)))
@@ -0,0 +1,321 @@
+"""
+Réglage hors ligne des poids du score (GameSession.weights)
+
+Une stratégie d'évolution (ou une recherche aléatoire) propose des vecteurs de
+poids ; chacun est évalué par des parties simulées (tournoi.jouer_partie,
+politique "score") dont les leaders et modificateurs sont tirés selon leur
+fréquence dans les parties enregistrées de data/game_stats.json (et du journal
+pas encore compacté). Les résultats enregistrés (tour final, victoires) ne
+servent pas au score : ils sont seulement recopiés dans le profil comme repère.
+Tous les candidats jouent les mêmes graines : seules les décisions d'achat
+diffèrent. Les évaluations sont réparties sur un pool de processus et gardées
+en cache par vecteur de poids ; le meilleur vecteur est validé sur d'autres
+graines contre les poids par défaut, puis écrit dans un nouveau profil versionné
+(data/poids/profil_vN.json). Le serveur charge au démarrage le plus récent des
+profils acceptés ; un profil qui perd en validation est gardé mais marqué rejeté.
+
+Utilisation : python reglage_poids.py [générations] [candidats] [processus] [parties]
+"""
+
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from main import (DOSSIER_PROFILS_POIDS, FORMAT_PROFIL_POIDS, MODIFICATEURS_PARTIE, POIDS_PAR_DEFAUT, GameSession,
+                  chemin_profil_poids, versions_profils_poids)
+import tournoi
+
+# La disruption n'a pas d'effet sans adversaires : son poids reste celui par défaut
+POIDS_REGLES = ("traits", "merge", "fusion_sell", "cost", "familles")
+POIDS_MIN = 0.05
+POIDS_MAX = 20.0
+PARTIES_PAR_LOT = 10
+CHEMIN_CACHE = os.path.join(DOSSIER_PROFILS_POIDS, "evaluations.json")
+
+Partie = Tuple[str, str, int]  # (leader, modificateur, graine)
+
+
+@dataclass
+class ConfigReglage:
+    generations: int = 8
+    candidats: int = 8
+    elites: int = 3
+    parties: int = 60  # par évaluation
+    parties_validation: int = 120
+    methode: str = "evolution"  # ou "aleatoire"
+    ecart_initial: float = 0.5  # en log des poids
+    graine: int = 0
+
+
+@dataclass
+class Evaluation:
+    tour_moyen: float
+    taux_victoire: float
+    parties: int
+
+
+# --- Parties rejouées ---
+
+def parties_enregistrees(dossier: str = "data") -> List[Dict]:
+    """Statistiques des parties terminées (game_stats.json puis journal pas encore compacté)"""
+    parties = []
+    try:
+        with open(os.path.join(dossier, "game_stats.json"), encoding="utf-8") as f:
+            for stats_utilisateur in json.load(f).values():
+                parties.extend(stats_utilisateur)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(os.path.join(dossier, "game_stats.jsonl"), encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    parties.append(json.loads(ligne)["stats"])
+                except (ValueError, KeyError):
+                    continue
+    except OSError:
+        pass
+    return parties
+
+
+def configurations_rejouees(enregistrees: List[Dict], nombre: int, graine: int) -> List[Partie]:
+    """Leaders et modificateurs tirés selon leur fréquence dans les parties enregistrées
+    
+    Sans partie exploitable, toutes les combinaisons sont équiprobables.
+    """
+    leaders = GameSession().leaders_disponibles
+    combinaisons = [(p.get("leader_utilise"), p.get("modificateur_utilise")) for p in enregistrees]
+    combinaisons = [(l, m) for l, m in combinaisons if l in leaders and m in MODIFICATEURS_PARTIE]
+    if not combinaisons:
+        combinaisons = [(l, m) for l in leaders for m in MODIFICATEURS_PARTIE]
+    rng = random.Random(graine)
+    return [(*rng.choice(combinaisons), rng.getrandbits(32)) for _ in range(nombre)]
+
+
+def reference_enregistree(enregistrees: List[Dict]) -> Optional[Dict[str, float]]:
+    """Résultats moyens des parties enregistrées, recopiés dans le profil (repère, hors score)"""
+    tours = [p["tour_final"] for p in enregistrees if isinstance(p.get("tour_final"), (int, float))]
+    if not tours:
+        return None
+    return {"tour_moyen": sum(tours) / len(tours), "parties": len(tours),
+            "taux_victoire": sum(1 for p in enregistrees if p.get("victoire")) / len(enregistrees)}
+
+
+# --- Évaluation (parallèle, en cache) ---
+
+def poids_complets(vecteur: Tuple[float, ...]) -> Dict[str, float]:
+    return {**POIDS_PAR_DEFAUT, **dict(zip(POIDS_REGLES, vecteur))}
+
+
+def arrondir(vecteur) -> Tuple[float, ...]:
+    """Vecteur borné et arrondi : deux candidats égaux à 1 % près partagent leur évaluation"""
+    return tuple(round(min(max(v, POIDS_MIN), POIDS_MAX), 2) for v in vecteur)
+
+
+def jouer_lot(vecteur: Tuple[float, ...], parties: List[Partie]) -> List[int]:
+    """[parties, somme des tours atteints, batailles, victoires] d'un lot de parties"""
+    weights = poids_complets(vecteur)
+    stats = [0, 0, 0, 0]
+    for leader, modificateur, graine in parties:
+        resultat = tournoi.jouer_partie(leader, modificateur, "score", graine, weights)
+        stats[0] += 1
+        stats[1] += resultat.tour
+        stats[2] += resultat.batailles
+        stats[3] += resultat.victoires
+    return stats
+
+
+def cle_vecteur(vecteur: Tuple[float, ...]) -> str:
+    return ",".join(f"{v:.2f}" for v in vecteur)
+
+
+def rang_evaluation(evaluation: Evaluation) -> Tuple[float, float]:
+    """Ordre des évaluations : tour moyen atteint, puis taux de victoire"""
+    return evaluation.tour_moyen, evaluation.taux_victoire
+
+
+class Evaluateur:
+    """Évalue des vecteurs de poids sur un jeu de parties fixe, avec un cache persistant par vecteur"""
+    
+    def __init__(self, parties: List[Partie], processus: int = 1, chemin_cache: Optional[str] = CHEMIN_CACHE):
+        self.parties = parties
+        self.processus = processus
+        self.chemin_cache = chemin_cache
+        donnees = (parties, tournoi.VERSION, tournoi.TOURS_MAX, tournoi.COMPOSANTES_TOURNOI, POIDS_REGLES,
+                   POIDS_PAR_DEFAUT)
+        self.signature = f"{zlib.crc32(json.dumps(donnees, ensure_ascii=False).encode('utf-8')):08x}"
+        self.cache: Dict[str, Evaluation] = {}
+        self.simulations = 0
+        fichier = self._lire_cache().get(self.signature, {})
+        for cle, valeurs in fichier.items():
+            self.cache[cle] = Evaluation(*valeurs)
+    
+    def _lire_cache(self) -> Dict:
+        if not self.chemin_cache:
+            return {}
+        try:
+            with open(self.chemin_cache, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _ecrire_cache(self):
+        if not self.chemin_cache:
+            return
+        tout = self._lire_cache()
+        tout[self.signature] = {cle: [e.tour_moyen, e.taux_victoire, e.parties] for cle, e in self.cache.items()}
+        os.makedirs(os.path.dirname(self.chemin_cache) or ".", exist_ok=True)
+        with open(self.chemin_cache + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(tout, f, separators=(",", ":"))
+        os.replace(self.chemin_cache + ".tmp", self.chemin_cache)
+    
+    def evaluer(self, vecteurs: List[Tuple[float, ...]]) -> List[Evaluation]:
+        """Évaluations des vecteurs (arrondis), en ne simulant que ceux absents du cache"""
+        vecteurs = [arrondir(v) for v in vecteurs]
+        manquants = list(dict.fromkeys(v for v in vecteurs if cle_vecteur(v) not in self.cache))
+        if manquants:
+            lots = [(v, self.parties[i:i + PARTIES_PAR_LOT])
+                    for v in manquants for i in range(0, len(self.parties), PARTIES_PAR_LOT)]
+            sommes = {v: [0, 0, 0, 0] for v in manquants}
+            if self.processus > 1 and len(lots) > 1:
+                with ProcessPoolExecutor(max_workers=self.processus) as executor:
+                    futures = {executor.submit(jouer_lot, *lot): lot[0] for lot in lots}
+                    for future in as_completed(futures):
+                        for i, valeur in enumerate(future.result()):
+                            sommes[futures[future]][i] += valeur
+            else:
+                for vecteur, parties in lots:
+                    for i, valeur in enumerate(jouer_lot(vecteur, parties)):
+                        sommes[vecteur][i] += valeur
+            for vecteur, (parties, tours, batailles, victoires) in sommes.items():
+                self.cache[cle_vecteur(vecteur)] = Evaluation(tours / parties, victoires / max(1, batailles), parties)
+            self.simulations += len(manquants) * len(self.parties)
+            self._ecrire_cache()
+        return [self.cache[cle_vecteur(v)] for v in vecteurs]
+
+
+# --- Recherche ---
+
+def proposer(rng: random.Random, config: ConfigReglage, moyenne: List[float], ecarts: List[float]) -> Tuple[float, ...]:
+    if config.methode == "aleatoire":
+        return tuple(math.exp(rng.uniform(math.log(POIDS_MIN), math.log(POIDS_MAX))) for _ in POIDS_REGLES)
+    return tuple(math.exp(m + e * rng.gauss(0, 1)) for m, e in zip(moyenne, ecarts))
+
+
+def regler(config: ConfigReglage, evaluateur: Evaluateur,
+           progression: Optional[Callable[[int, Tuple[float, ...], Evaluation], None]] = None
+           ) -> Tuple[Tuple[float, ...], Evaluation]:
+    """Meilleur vecteur trouvé (tour moyen atteint le plus élevé) et son évaluation
+    
+    Évolution : chaque génération tire des candidats autour d'une moyenne en log,
+    puis la moyenne et les écarts sont recalculés sur les meilleurs (diagonale de CMA-ES).
+    """
+    rng = random.Random(config.graine)
+    defaut = arrondir(POIDS_PAR_DEFAUT[nom] for nom in POIDS_REGLES)
+    moyenne = [math.log(v) for v in defaut]
+    ecarts = [config.ecart_initial] * len(POIDS_REGLES)
+    meilleur, evaluation = defaut, evaluateur.evaluer([defaut])[0]
+    
+    for generation in range(config.generations):
+        candidats = [arrondir(proposer(rng, config, moyenne, ecarts)) for _ in range(config.candidats)]
+        evaluations = evaluateur.evaluer(candidats)
+        classes = sorted(zip(candidats, evaluations), key=lambda x: rang_evaluation(x[1]), reverse=True)
+        if rang_evaluation(classes[0][1]) > rang_evaluation(evaluation):
+            meilleur, evaluation = classes[0]
+        elites = [[math.log(v) for v in vecteur] for vecteur, _ in classes[:config.elites]]
+        moyenne = [statistics.fmean(valeurs) for valeurs in zip(*elites)]
+        if len(elites) > 1:
+            ecarts = [max(statistics.pstdev(valeurs), 0.05) for valeurs in zip(*elites)]
+        if progression:
+            progression(generation + 1, meilleur, evaluation)
+    return meilleur, evaluation
+
+
+def ecrire_profil(vecteur: Tuple[float, ...], details: Dict, dossier: str = DOSSIER_PROFILS_POIDS) -> str:
+    """Nouveau profil versionné (version suivant la plus récente du dossier)"""
+    versions = versions_profils_poids(dossier)
+    version = versions[-1] + 1 if versions else 1
+    chemin = chemin_profil_poids(version, dossier)
+    os.makedirs(dossier, exist_ok=True)
+    profil = {"format": FORMAT_PROFIL_POIDS, "version": version, "cree_le": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "weights": poids_complets(vecteur), **details}
+    with open(chemin + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(profil, f, indent=2, ensure_ascii=False)
+    os.replace(chemin + ".tmp", chemin)
+    return chemin
+
+
+def reglage_complet(config: ConfigReglage, processus: int = 1, dossier_stats: str = "data",
+                    dossier_profils: str = DOSSIER_PROFILS_POIDS, chemin_cache: Optional[str] = CHEMIN_CACHE,
+                    progression=None) -> str:
+    """Régler, valider sur d'autres graines contre les poids par défaut, puis écrire le profil
+    
+    Le profil n'est accepté (chargé par le serveur) que si le vecteur réglé bat les
+    poids par défaut en validation ; sinon il est écrit avec "accepte": false.
+    """
+    enregistrees = parties_enregistrees(dossier_stats)
+    evaluateur = Evaluateur(configurations_rejouees(enregistrees, config.parties, config.graine),
+                            processus, chemin_cache)
+    meilleur, evaluation = regler(config, evaluateur, progression)
+    
+    validation = Evaluateur(configurations_rejouees(enregistrees, config.parties_validation, config.graine + 1),
+                            processus, chemin_cache)
+    defaut = arrondir(POIDS_PAR_DEFAUT[nom] for nom in POIDS_REGLES)
+    validation_meilleur, validation_defaut = validation.evaluer([meilleur, defaut])
+    details = {
+        "reglage": {**asdict(config), "signature": evaluateur.signature},
+        "evaluation": asdict(evaluation),
+        "validation": asdict(validation_meilleur),
+        "validation_poids_par_defaut": asdict(validation_defaut),
+        "accepte": rang_evaluation(validation_meilleur) > rang_evaluation(validation_defaut),
+        "parties_enregistrees": reference_enregistree(enregistrees),
+    }
+    
+    # Même réglage sur les mêmes parties : le dernier profil reste valable
+    versions = versions_profils_poids(dossier_profils)
+    if versions:
+        dernier = chemin_profil_poids(versions[-1], dossier_profils)
+        try:
+            with open(dernier, encoding="utf-8") as f:
+                profil = json.load(f)
+            if profil.get("reglage") == details["reglage"] and profil.get("weights") == poids_complets(meilleur):
+                return dernier
+        except (OSError, ValueError):
+            pass
+    return ecrire_profil(meilleur, details, dossier_profils)
+
+
+if __name__ == "__main__":
+    # Utilisation : python reglage_poids.py [générations] [candidats] [processus] [parties]
+    config = ConfigReglage()
+    if len(sys.argv) > 1:
+        config.generations = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        config.candidats = int(sys.argv[2])
+    processus = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    if len(sys.argv) > 4:
+        config.parties = int(sys.argv[4])
+    
+    def afficher_progression(generation, vecteur, evaluation):
+        poids = ", ".join(f"{nom}={v:g}" for nom, v in zip(POIDS_REGLES, vecteur))
+        print(f"Génération {generation}/{config.generations} : tour moyen {evaluation.tour_moyen:.2f}, "
+              f"victoires {evaluation.taux_victoire:.1%} ({poids})")
+    
+    debut = time.perf_counter()
+    chemin = reglage_complet(config, processus=processus, progression=afficher_progression)
+    with open(chemin, encoding="utf-8") as f:
+        profil = json.load(f)
+    if profil["accepte"]:
+        print(f"\n✅ Profil v{profil['version']} écrit dans {chemin} ({time.perf_counter() - debut:.1f} s)")
+    else:
+        print(f"\n⚠️ Profil v{profil['version']} écrit dans {chemin} mais rejeté : il ne bat pas les poids "
+              f"par défaut en validation ({time.perf_counter() - debut:.1f} s)")
+    print(f"Validation : tour moyen {profil['validation']['tour_moyen']:.2f} "
+          f"(poids par défaut : {profil['validation_poids_par_defaut']['tour_moyen']:.2f})")
@@ -0,0 +1,542 @@
+"""
+Stockage des sessions de jeu côté serveur
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from main import GameSession
+
+
+def session_id_valide(session_id) -> bool:
+    """Les identifiants de session sont des UUID (ils servent aussi de noms de fichiers)"""
+    try:
+        return str(uuid.UUID(str(session_id))) == session_id
+    except ValueError:
+        return False
+
+
+def serialiser_session(game_session: GameSession) -> str:
+    """Forme compacte d'une session, partagée par le débordement disque et les backends partagés"""
+    return json.dumps(game_session.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+
+def deserialiser_session(texte: str) -> GameSession:
+    return GameSession.from_dict(json.loads(texte))
+
+
+class SessionConcurrenteError(Exception):
+    """Action refusée : la session est occupée par une autre requête ou a été modifiée entre-temps"""
+
+
+class SessionLocks:
+    """Un verrou par session : une action de jeu s'applique en entier avant la suivante
+    
+    Le verrou est pris à la lecture de la session et rendu en fin de requête
+    (commit/discard du stockage). Les attentes sont mesurées pour suivre la contention.
+    """
+    
+    def __init__(self, timeout_seconds=10.0):
+        self.timeout_seconds = timeout_seconds
+        self._verrous = {}  # session_id -> [verrou, nombre de requêtes qui l'utilisent]
+        self._garde = threading.Lock()
+        self._local = threading.local()
+        self.stats = {'acquisitions': 0, 'contentions': 0, 'timeouts': 0,
+                      'attente_totale_ms': 0.0, 'attente_max_ms': 0.0}
+    
+    def _tenus(self) -> set:
+        if not hasattr(self._local, 'tenus'):
+            self._local.tenus = set()
+        return self._local.tenus
+    
+    def acquire(self, session_id):
+        tenus = self._tenus()
+        if session_id in tenus:
+            return  # Déjà tenu par la requête courante
+        
+        with self._garde:
+            entree = self._verrous.setdefault(session_id, [threading.Lock(), 0])
+            entree[1] += 1
+        
+        if not entree[0].acquire(blocking=False):
+            debut = time.perf_counter()
+            obtenu = entree[0].acquire(timeout=self.timeout_seconds)
+            attente_ms = (time.perf_counter() - debut) * 1000
+            with self._garde:
+                self.stats['contentions'] += 1
+                self.stats['attente_totale_ms'] += attente_ms
+                self.stats['attente_max_ms'] = max(self.stats['attente_max_ms'], attente_ms)
+                if not obtenu:
+                    self.stats['timeouts'] += 1
+                    self._oublier(session_id)
+            if not obtenu:
+                raise SessionConcurrenteError(session_id)
+        
+        with self._garde:
+            self.stats['acquisitions'] += 1
+        tenus.add(session_id)
+    
+    def release(self, session_id):
+        tenus = self._tenus()
+        if session_id not in tenus:
+            return
+        tenus.discard(session_id)
+        with self._garde:
+            self._verrous[session_id][0].release()
+            self._oublier(session_id)
+    
+    def release_all(self):
+        for session_id in list(self._tenus()):
+            self.release(session_id)
+    
+    def _oublier(self, session_id):
+        # Appelé sous _garde : supprimer le verrou quand plus personne ne l'utilise
+        entree = self._verrous[session_id]
+        entree[1] -= 1
+        if entree[1] == 0:
+            del self._verrous[session_id]
+    
+    def occupees(self) -> set:
+        """Sessions tenues ou attendues par une requête en cours"""
+        with self._garde:
+            return set(self._verrous)
+    
+    def get_stats(self) -> Dict:
+        with self._garde:
+            stats = dict(self.stats)
+            stats['attente_moyenne_ms'] = (stats['attente_totale_ms'] / stats['contentions']
+                                           if stats['contentions'] else 0.0)
+            stats['verrous_actifs'] = len(self._verrous)
+        return stats
+
+
+class MemorySessionStore:
+    """Sessions en mémoire, bornées en nombre, évincées par LRU et après inactivité
+    
+    Les sessions évincées peuvent être écrites sur disque (spill_dir) puis
+    rechargées de façon transparente à la requête suivante.
+    """
+    
+    name = "memory"
+    
+    def __init__(self, max_sessions=1000, ttl_seconds=2 * 3600, spill_dir=None,
+                 spill_ttl_seconds=7 * 24 * 3600, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = spill_dir
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self.clock = clock
+        
+        self._sessions = OrderedDict()  # session_id -> (game_session, dernier accès), du plus ancien au plus récent
+        self._lock = threading.RLock()
+        self.locks = SessionLocks()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'spills': 0, 'rehydrations': 0}
+        
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+    
+    # --- Interface de type dict (compatibilité avec l'ancien game_sessions) ---
+    
+    def __contains__(self, session_id) -> bool:
+        return self.get(session_id) is not None
+    
+    def __getitem__(self, session_id) -> GameSession:
+        game_session = self.get(session_id)
+        if game_session is None:
+            raise KeyError(session_id)
+        return game_session
+    
+    def __setitem__(self, session_id, game_session: GameSession):
+        self.put(session_id, game_session)
+    
+    def __delitem__(self, session_id):
+        self.delete(session_id)
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    # --- Opérations ---
+    
+    def get(self, session_id) -> Optional[GameSession]:
+        """Récupérer une session, verrouillée jusqu'à la fin de la requête"""
+        if not session_id_valide(session_id):
+            return None
+        
+        self.locks.acquire(session_id)
+        game_session = self._get(session_id)
+        if game_session is None:
+            self.locks.release(session_id)
+        return game_session
+    
+    def _get(self, session_id) -> Optional[GameSession]:
+        with self._lock:
+            maintenant = self.clock()
+            self._evict_expired(maintenant, session_id)
+            
+            entree = self._sessions.get(session_id)
+            if entree is not None:
+                self._sessions[session_id] = (entree[0], maintenant)
+                self._sessions.move_to_end(session_id)
+                self.stats['hits'] += 1
+                return entree[0]
+            
+            game_session = self._rehydrate(session_id)
+            if game_session is None:
+                self.stats['misses'] += 1
+                return None
+            
+            self.stats['rehydrations'] += 1
+            self._insert(session_id, game_session, maintenant)
+            return game_session
+    
+    def put(self, session_id, game_session: GameSession):
+        """Ajouter ou remplacer une session"""
+        if not session_id_valide(session_id):
+            raise ValueError(f"Identifiant de session invalide : {session_id}")
+        
+        self.locks.acquire(session_id)
+        with self._lock:
+            maintenant = self.clock()
+            self._evict_expired(maintenant, session_id)
+            self._insert(session_id, game_session, maintenant)
+    
+    def delete(self, session_id):
+        """Supprimer définitivement une session (mémoire et disque)"""
+        if not session_id_valide(session_id):
+            return
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            if self.spill_dir:
+                try:
+                    os.remove(self._spill_path(session_id))
+                except FileNotFoundError:
+                    pass
+    
+    def commit(self):
+        """Fin de requête : les sessions modifiées sont déjà en mémoire, rendre les verrous"""
+        self.locks.release_all()
+        self._evict_reportees()
+    
+    def discard(self):
+        self.locks.release_all()
+        self._evict_reportees()
+    
+    def _evict_reportees(self):
+        # Évictions laissées de côté tant qu'une requête tenait la session
+        with self._lock:
+            if len(self._sessions) > self.max_sessions:
+                self._evict_lru()
+    
+    def _insert(self, session_id, game_session: GameSession, maintenant: float):
+        self._sessions[session_id] = (game_session, maintenant)
+        self._sessions.move_to_end(session_id)
+        if len(self._sessions) > self.max_sessions:
+            self._evict_lru()
+    
+    def _evict_lru(self):
+        # Plafond mémoire : évincer les moins récemment utilisées. Une session tenue par
+        # une requête en cours est encore modifiée : l'écrire sur disque perdrait la suite,
+        # son éviction attend la fin de la requête
+        occupees = self.locks.occupees()
+        victimes = []
+        for ancien_id in self._sessions:
+            if len(self._sessions) - len(victimes) <= self.max_sessions:
+                break
+            if ancien_id not in occupees:
+                victimes.append(ancien_id)
+        for ancien_id in victimes:
+            ancienne_session, _ = self._sessions.pop(ancien_id)
+            self.stats['evictions'] += 1
+            self._spill(ancien_id, ancienne_session)
+    
+    def _evict_expired(self, maintenant: float, session_id=None):
+        # L'ordre LRU est aussi l'ordre du dernier accès : les sessions expirées sont en tête.
+        # Seule la session demandée (verrouillée par l'appelant) peut expirer sous un verrou
+        occupees = None
+        victimes = []
+        for ancien_id, (_, dernier_acces) in self._sessions.items():
+            if maintenant - dernier_acces <= self.ttl_seconds:
+                break
+            if occupees is None:
+                occupees = self.locks.occupees() - {session_id}
+            if ancien_id not in occupees:
+                victimes.append(ancien_id)
+        for ancien_id in victimes:
+            ancienne_session, _ = self._sessions.pop(ancien_id)
+            self.stats['expirations'] += 1
+            self._spill(ancien_id, ancienne_session)
+    
+    # --- Débordement sur disque ---
+    
+    def _spill_path(self, session_id) -> str:
+        return os.path.join(self.spill_dir, f"{session_id}.json")
+    
+    def _spill(self, session_id, game_session: GameSession):
+        if not self.spill_dir:
+            return
+        chemin = self._spill_path(session_id)
+        with open(chemin + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(serialiser_session(game_session))
+        os.replace(chemin + ".tmp", chemin)
+        self.stats['spills'] += 1
+    
+    def _rehydrate(self, session_id) -> Optional[GameSession]:
+        if not self.spill_dir:
+            return None
+        chemin = self._spill_path(session_id)
+        try:
+            if time.time() - os.path.getmtime(chemin) > self.spill_ttl_seconds:
+                os.remove(chemin)
+                return None
+            with open(chemin, 'r', encoding='utf-8') as f:
+                game_session = deserialiser_session(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.remove(chemin)  # La session redevient vivante en mémoire
+        return game_session
+    
+    def purge_spill(self) -> int:
+        """Supprimer les sessions débordées plus anciennes que spill_ttl_seconds"""
+        if not self.spill_dir:
+            return 0
+        supprimees = 0
+        limite = time.time() - self.spill_ttl_seconds
+        for nom_fichier in os.listdir(self.spill_dir):
+            chemin = os.path.join(self.spill_dir, nom_fichier)
+            try:
+                if os.path.getmtime(chemin) < limite:
+                    os.remove(chemin)
+                    supprimees += 1
+            except FileNotFoundError:
+                pass
+        return supprimees
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = {**self.stats, 'sessions_en_memoire': len(self._sessions), 'max_sessions': self.max_sessions}
+        stats['verrous'] = self.locks.get_stats()
+        return stats
+
+
+class SQLiteSessionStore:
+    """Sessions partagées entre processus dans une base SQLite (WAL)
+    
+    Chaque requête désérialise la session, et commit() réécrit en fin de
+    requête celles qui ont changé : plusieurs workers peuvent servir la même partie.
+    Dans un processus, un verrou par session sérialise les actions ; entre
+    processus, un numéro de version refuse l'écriture d'une session modifiée entre-temps.
+    """
+    
+    name = "sqlite"
+    
+    PURGE_INTERVAL = 100  # Écritures entre deux purges des sessions expirées
+    
+    def __init__(self, db_path=os.path.join("data", "sessions.sqlite3"), ttl_seconds=2 * 3600,
+                 clock=time.time):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._local = threading.local()
+        self._ecritures = 0
+        self.locks = SessionLocks()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'expirations': 0, 'conflits': 0}
+        
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_access ON sessions(last_access)")
+            colonnes = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+            if "version" not in colonnes:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    
+    def connect(self) -> sqlite3.Connection:
+        """Connexion SQLite propre au thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _chargees(self) -> Dict:
+        # Sessions lues pendant la requête courante :
+        # session_id -> (game_session, données lues, dernier accès, version lue)
+        if not hasattr(self._local, 'chargees'):
+            self._local.chargees = {}
+        return self._local.chargees
+    
+    # --- Interface de type dict ---
+    
+    def __contains__(self, session_id) -> bool:
+        return self.get(session_id) is not None
+    
+    def __getitem__(self, session_id) -> GameSession:
+        game_session = self.get(session_id)
+        if game_session is None:
+            raise KeyError(session_id)
+        return game_session
+    
+    def __setitem__(self, session_id, game_session: GameSession):
+        self.put(session_id, game_session)
+    
+    def __delitem__(self, session_id):
+        self.delete(session_id)
+    
+    def __len__(self) -> int:
+        limite = self.clock() - self.ttl_seconds
+        return self.connect().execute(
+            "SELECT COUNT(*) FROM sessions WHERE last_access >= ?", (limite,)
+        ).fetchone()[0]
+    
+    # --- Opérations ---
+    
+    def get(self, session_id) -> Optional[GameSession]:
+        if not session_id_valide(session_id):
+            return None
+        
+        chargees = self._chargees()
+        if session_id in chargees:
+            return chargees[session_id][0]
+        
+        self.locks.acquire(session_id)
+        maintenant = self.clock()
+        row = self.connect().execute(
+            "SELECT data, last_access, version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or maintenant - row[1] > self.ttl_seconds:
+            self.locks.release(session_id)
+            self.stats['misses'] += 1
+            return None
+        
+        self.stats['hits'] += 1
+        game_session = deserialiser_session(row[0])
+        chargees[session_id] = (game_session, row[0], row[1], row[2])
+        return game_session
+    
+    def put(self, session_id, game_session: GameSession):
+        if not session_id_valide(session_id):
+            raise ValueError(f"Identifiant de session invalide : {session_id}")
+        self.locks.acquire(session_id)
+        donnees = serialiser_session(game_session)
+        maintenant = self.clock()
+        with self.connect() as conn:
+            conn.execute(
+                """INSERT INTO sessions (session_id, data, last_access) VALUES (?, ?, ?)
+                   ON CONFLICT(session_id) DO UPDATE SET
+                       data = excluded.data, last_access = excluded.last_access, version = version + 1""",
+                (session_id, donnees, maintenant)
+            )
+            version = conn.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+        self._ecrite()
+        self._chargees()[session_id] = (game_session, donnees, maintenant, version)
+    
+    def delete(self, session_id):
+        if not session_id_valide(session_id):
+            return
+        self._chargees().pop(session_id, None)
+        with self.connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self.locks.release(session_id)
+    
+    def commit(self):
+        """Fin de requête : réécrire les sessions modifiées pendant la requête
+        
+        Lève SessionConcurrenteError si un autre processus a écrit la session entre-temps.
+        """
+        chargees = self._chargees()
+        maintenant = self.clock()
+        conflits = []
+        try:
+            for session_id, (game_session, donnees_lues, dernier_acces, version) in chargees.items():
+                donnees = serialiser_session(game_session)
+                if donnees != donnees_lues:
+                    with self.connect() as conn:
+                        ecrite = conn.execute(
+                            """UPDATE sessions SET data = ?, last_access = ?, version = version + 1
+                               WHERE session_id = ? AND version = ?""",
+                            (donnees, maintenant, session_id, version)
+                        ).rowcount
+                    if ecrite:
+                        self._ecrite()
+                    else:
+                        self.stats['conflits'] += 1
+                        conflits.append(session_id)
+                elif maintenant - dernier_acces > self.ttl_seconds / 10:
+                    # Session seulement consultée : prolonger sa durée de vie sans tout réécrire
+                    with self.connect() as conn:
+                        conn.execute("UPDATE sessions SET last_access = ? WHERE session_id = ?",
+                                     (maintenant, session_id))
+        finally:
+            chargees.clear()
+            self.locks.release_all()
+        if conflits:
+            raise SessionConcurrenteError(conflits[0])
+    
+    def discard(self):
+        """Fin de requête en erreur : oublier les modifications non écrites"""
+        self._chargees().clear()
+        self.locks.release_all()
+    
+    def _ecrite(self):
+        self.stats['writes'] += 1
+        self._ecritures += 1
+        if self._ecritures % self.PURGE_INTERVAL == 0:
+            self.purge_expired()
+    
+    def purge_expired(self) -> int:
+        """Supprimer les sessions inactives depuis plus de ttl_seconds"""
+        with self.connect() as conn:
+            supprimees = conn.execute(
+                "DELETE FROM sessions WHERE last_access < ?", (self.clock() - self.ttl_seconds,)
+            ).rowcount
+        self.stats['expirations'] += supprimees
+        return supprimees
+    
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'sessions_actives': len(self), 'verrous': self.locks.get_stats()}
+
+
+SESSION_STORES = {
+    MemorySessionStore.name: MemorySessionStore,
+    SQLiteSessionStore.name: SQLiteSessionStore,
+}
+
+
+def create_session_store():
+    """Construire le stockage des sessions depuis les variables d'environnement"""
+    backend = os.environ.get("MERGE_TACTICS_SESSION_STORE", "memory")
+    if backend not in SESSION_STORES:
+        raise ValueError(f"Stockage de sessions inconnu : {backend}")
+    ttl_seconds = float(os.environ.get("MERGE_TACTICS_SESSION_TTL", 2 * 3600))
+    
+    if backend == SQLiteSessionStore.name:
+        store = SQLiteSessionStore(
+            db_path=os.environ.get("MERGE_TACTICS_SESSION_DB", os.path.join("data", "sessions.sqlite3")),
+            ttl_seconds=ttl_seconds
+        )
+        store.purge_expired()
+        return store
+    
+    store = MemorySessionStore(
+        max_sessions=int(os.environ.get("MERGE_TACTICS_MAX_SESSIONS", 1000)),
+        ttl_seconds=ttl_seconds,
+        spill_dir=os.environ.get("MERGE_TACTICS_SESSION_SPILL_DIR") or None
+    )
+    store.purge_spill()
+    return store
@@ -0,0 +1,108 @@
+"""
+Modèle du pool partagé et simulation Monte Carlo des prochaines boutiques
+
+Chaque nom de carte a un nombre d'exemplaires dans le pool selon son coût ;
+l'historique de la partie (cartes déjà prises) les retire. Ces hypothèses sont
+partagées par les tables exactes de probabilites_pool.py, que lit le score de
+recommandation, et par le tournoi.
+
+La simulation n'est plus appelée par les recommandations : les tables la
+remplacent. Elle reste le modèle de référence hors ligne (achats adverses
+compris), vérifié contre les tables et mesuré par benchmarks/bench_simulation.py.
+À chaque tour simulé, les adversaires prennent des cartes au hasard (pondéré par
+les exemplaires restants) puis la boutique du joueur en montre quelques-unes.
+Les tirages sont découpés en lots de graines fixes : le résultat ne dépend
+pas du nombre de processus.
+"""
+
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Dict, Optional, Sequence, Tuple
+
+# Hypothèses sur le pool partagé (exemplaires par nom selon le coût) et le rythme des adversaires
+EXEMPLAIRES_PAR_COUT = {2: 12, 3: 10, 4: 8, 5: 6}
+EXEMPLAIRES_DEFAUT = 8
+ACHATS_ADVERSES_PAR_TOUR = 3
+HORIZON_TOURS = 3
+CHOIX_PAR_TOUR = 3
+TAILLE_LOT = 250
+
+
+@dataclass
+class EstimationBoutique:
+    apparitions: Dict[str, float]  # nombre moyen d'apparitions dans la boutique sur l'horizon
+    proba_apparition: Dict[str, float]  # probabilité d'apparaître au moins une fois
+    proba_fusion: Dict[str, float]  # probabilité de voir assez d'exemplaires pour fusionner (noms de `besoins`)
+    rollouts: int
+    secondes: float = 0.0
+
+
+def exemplaires_restants(couts: Sequence[Tuple[str, int]], historique: Dict[str, int]) -> Dict[str, int]:
+    return {nom: max(0, EXEMPLAIRES_PAR_COUT.get(cout, EXEMPLAIRES_DEFAUT) - historique.get(nom, 0))
+            for nom, cout in couts}
+
+
+def _simuler_lot(noms: Tuple[str, ...], restants_initiaux: Tuple[int, ...], besoins: Tuple[int, ...],
+                 rollouts: int, horizon: int, choix: int, achats_adverses: int, graine: int):
+    """Un lot de tirages : sommes des apparitions, des noms vus et des fusions possibles"""
+    rng = random.Random(graine)
+    indices = range(len(noms))
+    apparitions = [0] * len(noms)
+    vus = [0] * len(noms)
+    fusions = [0] * len(noms)
+    for _ in range(rollouts):
+        restants = list(restants_initiaux)
+        vus_tirage = [0] * len(noms)
+        for _ in range(horizon):
+            if not any(restants):
+                break
+            for i in rng.choices(indices, cum_weights=list(accumulate(restants)), k=achats_adverses):
+                if restants[i]:
+                    restants[i] -= 1
+            if not any(restants):
+                break
+            for i in rng.choices(indices, cum_weights=list(accumulate(restants)), k=choix):
+                vus_tirage[i] += 1
+        for i, nombre in enumerate(vus_tirage):
+            if nombre:
+                apparitions[i] += nombre
+                vus[i] += 1
+            if besoins[i] and nombre >= besoins[i]:
+                fusions[i] += 1
+    return apparitions, vus, fusions
+
+
+def simuler(couts: Sequence[Tuple[str, int]], historique: Dict[str, int],
+            besoins: Optional[Dict[str, int]] = None, rollouts: int = 2000, horizon: int = HORIZON_TOURS,
+            choix: int = CHOIX_PAR_TOUR, achats_adverses: int = ACHATS_ADVERSES_PAR_TOUR, graine: int = 0,
+            processus: int = 1) -> EstimationBoutique:
+    """Estime les prochaines boutiques par `rollouts` tirages, répartis sur `processus` processus"""
+    debut = time.perf_counter()
+    besoins = besoins or {}
+    restants = exemplaires_restants(couts, historique)
+    noms = tuple(restants)
+    args = []
+    for lot, depart in enumerate(range(0, rollouts, TAILLE_LOT)):
+        args.append((noms, tuple(restants.values()), tuple(besoins.get(nom, 0) for nom in noms),
+                     min(TAILLE_LOT, rollouts - depart), horizon, choix, achats_adverses, graine * 1000003 + lot))
+    
+    if processus > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=processus) as executor:
+            resultats = list(executor.map(_simuler_lot, *zip(*args)))
+    else:
+        resultats = [_simuler_lot(*a) for a in args]
+    
+    apparitions = [sum(r[0][i] for r in resultats) for i in range(len(noms))]
+    vus = [sum(r[1][i] for r in resultats) for i in range(len(noms))]
+    fusions = [sum(r[2][i] for r in resultats) for i in range(len(noms))]
+    total = max(rollouts, 1)
+    return EstimationBoutique(
+        apparitions={nom: apparitions[i] / total for i, nom in enumerate(noms)},
+        proba_apparition={nom: vus[i] / total for i, nom in enumerate(noms)},
+        proba_fusion={nom: fusions[i] / total for i, nom in enumerate(noms) if besoins.get(nom)},
+        rollouts=rollouts,
+        secondes=time.perf_counter() - debut,
+    )
@@ -1352,7 +1352,8 @@ async function getRecommendations() {
                 choix: gameState.currentChoices.map(choice => ({
                     carte: choice.carte,
                     niveau: choice.niveau
-                }))
+                })),
+                deadline_ms: RECOMMENDATIONS_DEADLINE_MS
             })
         });
         
@@ -1369,6 +1370,9 @@ async function getRecommendations() {
     }
 }
 
+// Délai laissé au serveur pour approfondir les recommandations (planification multi-tours)
+const RECOMMENDATIONS_DEADLINE_MS = 500;
+
 // Afficher les recommandations
 function displayRecommendations(data) {
     const container = document.getElementById('recommendations');
@@ -1383,6 +1387,11 @@ function displayRecommendations(data) {
     // Afficher l'élixir actuel
     html += `<div class="elixir-info"><i class="fas fa-bolt"></i> Élixir disponible: ${data.elixir_actuel}</div>`;
     
+    // Plan sur plusieurs tours, si le délai a permis de l'explorer
+    if (data.plan && data.profondeur_atteinte > 0) {
+        html += `<div class="elixir-info"><i class="fas fa-route"></i> Plan sur ${data.profondeur_atteinte} tour(s): ${data.plan.join(' → ')}</div>`;
+    }
+    
     // Séparer les cartes abordables et chères
     if (data.cartes_abordables && data.cartes_abordables.length > 0) {
         html += `<h4 class="recommandations-section"><i class="fas fa-shopping-cart"></i> Cartes abordables maintenant</h4>`;
@@ -1411,7 +1420,7 @@ function displayRecommendations(data) {
 // Créer le HTML pour une recommandation
 function createRecommendationHtml(rec, index, type) {
     const typeClass = type === 'abordable' ? 'recommendation-affordable' : 'recommendation-expensive';
-    const icon = type === 'abordable' ? '✅' : '⏳';
+    const icon = rec.plan_recommande ? '📅' : (type === 'abordable' ? '✅' : '⏳');
     
     return `
         <div class="recommendation-item ${typeClass}">
@@ -0,0 +1,171 @@
+"""
+Table précalculée des bonus de familles pour toutes les compositions de plateau
+
+Les paliers de familles ne dépendent que de l'ensemble des noms distincts sur
+le plateau : 20 cartes et au plus 7 noms, soit 137 980 sous-ensembles. Chaque
+sous-ensemble (masque de bits des noms, voir BITS_NOMS) a une entrée de 32 bits :
+  - bits 0 à 21 : palier de chaque famille sur 2 bits (0 = aucun, puis 2, 3, 4)
+  - bits 22 à 31 : score de synergie × 2
+
+La table est générée une fois (`python table_familles.py build`) puis projetée
+en mémoire (mmap) au chargement ; si le fichier manque ou ne correspond plus
+au catalogue, elle est recalculée et réécrite pour les démarrages suivants.
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+import zlib
+from itertools import combinations
+from math import comb
+from typing import Dict, Optional
+
+from main import (BIBLIOTHEQUE_CARTES, FAMILLES, INDICES_MASQUE, NB_FAMILLES, SCORE_SYNERGIE,
+                  SEUILS_FAMILLES, palier_famille)
+
+NOMS_TABLE = tuple(BIBLIOTHEQUE_CARTES)
+NB_NOMS = len(NOMS_TABLE)
+MAX_NOMS_TABLE = 7
+
+# Rang d'un sous-ensemble : par taille, puis dans l'ordre colexicographique
+DEBUT_TAILLE = [sum(comb(NB_NOMS, j) for j in range(k)) for k in range(MAX_NOMS_TABLE + 2)]
+NB_ENTREES = DEBUT_TAILLE[MAX_NOMS_TABLE + 1]
+BINOMES = [[comb(n, k) for k in range(MAX_NOMS_TABLE + 1)] for n in range(NB_NOMS)]
+
+PALIERS_CODES = (0, 2, 3, 4)  # code sur 2 bits -> palier
+DECALAGE_SCORE = 2 * NB_FAMILLES
+
+ENTETE = struct.Struct("<4sIII")  # magie, version, signature du catalogue, nombre d'entrées
+MAGIE = b"MTFT"
+VERSION = 1
+CHEMIN_TABLE = os.path.join("data", "table_familles.bin")
+
+
+def signature_catalogue() -> int:
+    """Empreinte des données dont dépend la table (cartes, seuils, scores)"""
+    donnees = (NOMS_TABLE, [BIBLIOTHEQUE_CARTES[nom].traits for nom in NOMS_TABLE],
+               SEUILS_FAMILLES, SCORE_SYNERGIE, MAX_NOMS_TABLE)
+    return zlib.crc32(repr(donnees).encode("utf-8"))
+
+
+def rang(masque_noms: int) -> int:
+    """Position d'un masque de noms (au plus MAX_NOMS_TABLE bits) dans la table"""
+    r = DEBUT_TAILLE[masque_noms.bit_count()]
+    i = 1
+    while masque_noms:
+        r += BINOMES[(masque_noms & -masque_noms).bit_length() - 1][i]
+        masque_noms &= masque_noms - 1
+        i += 1
+    return r
+
+
+def construire_table() -> array.array:
+    """Calcule toutes les entrées (une à deux secondes)"""
+    masques = [BIBLIOTHEQUE_CARTES[nom].masque for nom in NOMS_TABLE]
+    entrees = array.array("I", bytes(4 * NB_ENTREES))
+    for taille in range(MAX_NOMS_TABLE + 1):
+        for noms in combinations(range(NB_NOMS), taille):
+            nombres = [0] * NB_FAMILLES
+            masque_noms = 0
+            for n in noms:
+                masque_noms |= 1 << n
+                for i in INDICES_MASQUE[masques[n]]:
+                    nombres[i] += 1
+            
+            entree = 0
+            score = 0.0
+            for i, nombre in enumerate(nombres):
+                entree |= PALIERS_CODES.index(palier_famille(FAMILLES[i], nombre)) << 2 * i
+                score += SCORE_SYNERGIE[i][min(nombre, 5)]
+            entrees[rang(masque_noms)] = entree | round(score * 2) << DECALAGE_SCORE
+    return entrees
+
+
+def ecrire_table(chemin: str = CHEMIN_TABLE, entrees: Optional[array.array] = None) -> int:
+    """Écrire la table (calculée si `entrees` n'est pas fourni) ; remplacement atomique du fichier"""
+    entrees = array.array("I", entrees) if entrees is not None else construire_table()
+    if sys.byteorder != "little":
+        entrees.byteswap()
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    temporaire = f"{chemin}.{os.getpid()}.tmp"  # Un fichier par processus : démarrages simultanés
+    with open(temporaire, "wb") as f:
+        f.write(ENTETE.pack(MAGIE, VERSION, signature_catalogue(), NB_ENTREES))
+        entrees.tofile(f)
+    os.replace(temporaire, chemin)
+    return NB_ENTREES
+
+
+class TableFamilles:
+    """Accès aux entrées de la table (tableau en mémoire ou fichier projeté)"""
+    
+    def __init__(self, entrees, projection: Optional[mmap.mmap] = None):
+        self._entrees = entrees
+        self._projection = projection  # Garde le mmap ouvert tant que la table est utilisée
+    
+    @classmethod
+    def charger(cls, chemin: str = CHEMIN_TABLE) -> "TableFamilles":
+        """Projeter le fichier en mémoire, ou recalculer la table s'il est absent ou périmé
+        
+        Une table recalculée est écrite dans `chemin` : les démarrages suivants la projettent.
+        """
+        try:
+            with open(chemin, "rb") as f:
+                projection = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            projection = None
+        
+        if projection is not None:
+            if (len(projection) == ENTETE.size + 4 * NB_ENTREES and sys.byteorder == "little"
+                    and ENTETE.unpack_from(projection) == (MAGIE, VERSION, signature_catalogue(), NB_ENTREES)):
+                return cls(memoryview(projection)[ENTETE.size:].cast("I"), projection)
+            projection.close()
+        
+        entrees = construire_table()
+        try:
+            ecrire_table(chemin, entrees)
+        except OSError:
+            pass  # Dossier en lecture seule : la table reste en mémoire pour ce processus
+        return cls(entrees)
+    
+    def entree(self, masque_noms: int) -> Optional[int]:
+        if masque_noms.bit_count() > MAX_NOMS_TABLE:
+            return None
+        return self._entrees[rang(masque_noms)]
+    
+    def paliers(self, masque_noms: int) -> Optional[Dict[str, int]]:
+        """Paliers actifs (famille -> 2, 3 ou 4), None si le plateau dépasse la table"""
+        entree = self.entree(masque_noms)
+        if entree is None:
+            return None
+        return {FAMILLES[i]: PALIERS_CODES[entree >> 2 * i & 3]
+                for i in range(NB_FAMILLES) if entree >> 2 * i & 3}
+    
+    def score(self, masque_noms: int) -> Optional[float]:
+        """Score de synergie du plateau, None si le plateau dépasse la table"""
+        entree = self.entree(masque_noms)
+        if entree is None:
+            return None
+        return (entree >> DECALAGE_SCORE) / 2
+
+
+_table = None
+
+
+def table_partagee() -> TableFamilles:
+    """Table chargée une fois par processus (MERGE_TACTICS_FAMILY_TABLE pour changer le chemin)"""
+    global _table
+    if _table is None:
+        _table = TableFamilles.charger(os.environ.get("MERGE_TACTICS_FAMILY_TABLE", CHEMIN_TABLE))
+    return _table
+
+
+if __name__ == "__main__":
+    # Utilisation : python table_familles.py build [chemin]
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        chemin = sys.argv[2] if len(sys.argv) > 2 else CHEMIN_TABLE
+        nb_entrees = ecrire_table(chemin)
+        print(f"✅ Table des familles écrite dans {chemin} ({nb_entrees} compositions)")
+    else:
+        print("Utilisation : python table_familles.py build [chemin]")
@@ -0,0 +1,71 @@
+"""
+Tests du choix de composition du plateau : même optimum qu'une énumération exhaustive
+"""
+
+import itertools
+import random
+
+from main import BIBLIOTHEQUE_CARTES, BITS_NOMS, Carte
+from composition_plateau import composition_optimale
+from table_familles import table_partagee
+
+def carte_aleatoire(rng: random.Random) -> Carte:
+    base = BIBLIOTHEQUE_CARTES[rng.choice(list(BIBLIOTHEQUE_CARTES))]
+    return Carte(base.nom, base.cout, base.traits, rng.randint(1, 3))
+
+def optimum_exhaustif(cartes, taille_max, poids_familles, poids_niveau):
+    table = table_partagee()
+    paires = sorted({(c.nom, c.niveau) for c in cartes})
+    meilleur = float('-inf')
+    for taille in range(min(taille_max, len(paires)) + 1):
+        for choix in itertools.combinations(paires, taille):
+            masque = 0
+            for nom, _ in choix:
+                masque |= BITS_NOMS[nom]
+            meilleur = max(meilleur, poids_familles * table.score(masque) + poids_niveau * sum(n for _, n in choix))
+    return meilleur
+
+def test_optimum_exact():
+    rng = random.Random(17)
+    for _ in range(300):
+        plateau = list({(c.nom, c.niveau): c for c in (carte_aleatoire(rng) for _ in range(rng.randint(0, 6)))}.values())
+        banc = [carte_aleatoire(rng) for _ in range(rng.randint(0, 7))]
+        taille_max = rng.randint(1, 7)
+        poids_familles, poids_niveau = rng.choice((0.5, 1.0, 2.0)), rng.choice((0.5, 1.0, 3.0))
+        composition = composition_optimale(plateau, banc, taille_max, poids_familles, poids_niveau)
+        
+        attendu = optimum_exhaustif(plateau + banc, taille_max, poids_familles, poids_niveau)
+        assert abs(composition.score - attendu) < 1e-9
+        assert len(composition.plateau) <= taille_max
+        assert len({(c.nom, c.niveau) for c in composition.plateau}) == len(composition.plateau)
+        # Les cartes sont seulement réparties : aucune créée ni perdue
+        assert sorted(map(id, composition.plateau + composition.banc)) == sorted(map(id, plateau + banc))
+
+def test_plateau_actuel_conserve():
+    """Un plateau déjà optimal n'est pas déplacé"""
+    rng = random.Random(18)
+    for _ in range(100):
+        plateau = list({(c.nom, c.niveau): c for c in (carte_aleatoire(rng) for _ in range(4))}.values())
+        banc = [carte_aleatoire(rng) for _ in range(5)]
+        composition = composition_optimale(plateau, banc, 7)
+        relance = composition_optimale(composition.plateau, composition.banc, 7)
+        assert not relance.changements
+        assert relance.plateau == composition.plateau
+
+def test_poids_niveau_invalide():
+    """/api/optimal_board refuse un poids non fini plutôt que de renvoyer un score NaN"""
+    import app as serveur
+    
+    client = serveur.app.test_client()
+    session_id = client.post('/api/start_game').get_json()['session_id']
+    for invalide in ("abc", "nan", "inf", "-inf", [1]):
+        reponse = client.post('/api/optimal_board', json={'session_id': session_id, 'poids_niveau': invalide})
+        assert reponse.get_json() == {'success': False, 'error': 'poids_niveau invalide'}
+    reponse = client.post('/api/optimal_board', json={'session_id': session_id, 'poids_niveau': "0.5"}).get_json()
+    assert reponse['success'] and reponse['score'] == 0
+
+if __name__ == "__main__":
+    test_optimum_exact()
+    test_plateau_actuel_conserve()
+    test_poids_niveau_invalide()
+    print("✅ Composition du plateau optimale")
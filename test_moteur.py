@@ -0,0 +1,105 @@
+"""
+Tests du moteur de jeu : step(session, action) -> (session, événements), sans entrées/sorties
+"""
+
+from main import (GameSession, ActionInvalide, Acheter, DebutTour, Deplacer, FinTour, Fusionner, Vendre,
+                  effets_compiles, step)
+
+def nouvelle_session(leader=None, elixir=20) -> GameSession:
+    game_session = GameSession()
+    if leader:
+        game_session.leader_choisi = game_session.leaders_disponibles[leader]
+    game_session.etat.elixir = elixir
+    return game_session
+
+def test_achat_et_fusions():
+    """Trois cartes identiques sur le banc fusionnent : +1 élixir par fusion et bonus du leader"""
+    game_session = nouvelle_session("Impératrice")
+    for _ in range(2):
+        step(game_session, Acheter("Chevalier"))
+    _, evenements = step(game_session, Acheter("Chevalier"))
+    
+    assert [e.type for e in evenements] == ["achat", "fusion"]
+    assert evenements[1].details["elixir_gagne"] == 2
+    assert game_session.etat.elixir == 20 - 3 * 2 + 2
+    assert game_session.etat.bench.comptes() == {("Chevalier", 2): 1}
+    assert game_session.etat.historique_pool == {"Chevalier": 3}
+
+def test_action_refusee_sans_effet():
+    game_session = nouvelle_session(elixir=1)
+    empreinte = game_session.empreinte()
+    for action in (Acheter("Chevalier"), Acheter("Inconnue"), Vendre("Chevalier"),
+                   Deplacer("Chevalier", 1, "main"), Fusionner("Chevalier")):
+        try:
+            step(game_session, action)
+        except ActionInvalide:
+            pass
+        else:
+            raise AssertionError(f"{action} aurait dû être refusée")
+        assert game_session.empreinte() == empreinte
+    
+    # Plateau plein : la carte reste sur le banc
+    game_session.etat.elixir = 20
+    for nom in ("Chevalier", "Archères", "Gobelins"):
+        step(game_session, Acheter(nom))
+    step(game_session, Deplacer("Chevalier", 1, "main"))
+    step(game_session, Deplacer("Archères", 1, "main"))
+    try:
+        step(game_session, Deplacer("Gobelins", 1, "main"))
+    except ActionInvalide:
+        pass
+    assert len(game_session.etat.main) == 2 and len(game_session.etat.bench) == 1
+
+def test_fin_de_tour():
+    """Défaite (bonus du Roi Royal), intérêts, puis élixir du tour suivant"""
+    game_session = nouvelle_session("Roi Royal", elixir=6)
+    game_session.modificateurs_actifs = ["de_plus_en_plus_riche"]
+    _, evenements = step(game_session, FinTour(victoire=False, troupes_adverses_restantes=2))
+    
+    assert game_session.etat.hp == 7
+    assert game_session.tour == 2
+    # 6 + 4 (défaite, leader) + 4 (tour) + 5 (intérêts sur 10)
+    assert game_session.etat.elixir == 19
+    assert evenements[-1].details["interets_stockes"] == 5
+    
+    _, evenements = step(game_session, FinTour(victoire=False, troupes_adverses_restantes=10))
+    assert game_session.etat.hp == 0
+    assert game_session.tour == 2
+    assert "game_over" in [e.type for e in evenements]
+
+def test_premier_achat_du_tour():
+    game_session = nouvelle_session(elixir=10)
+    game_session.modificateurs_actifs = ["cadeau_de_la_maison"]
+    step(game_session, Acheter("Reine"))
+    step(game_session, Acheter("Chevalier"))
+    assert game_session.etat.elixir == 8
+    
+    step(game_session, FinTour())
+    step(game_session, Acheter("Reine"))
+    assert game_session.etat.elixir == 12  # Premier achat du nouveau tour gratuit
+
+def test_effets_des_modificateurs_actifs():
+    """Seuls les effets des modificateurs actifs sont compilés ; les ventes du moteur comptent pour Bonne affaire"""
+    game_session = nouvelle_session(elixir=10)
+    game_session.modificateurs_actifs = ["bonne_affaire", "clairvoyance"]
+    effets = effets_compiles(("bonne_affaire", "clairvoyance"))
+    assert [len(effets[etape]) for etape in ("debut_tour", "fin_tour", "vente", "achat")] == [1, 1, 1, 0]
+    
+    step(game_session, DebutTour())
+    assert game_session.etat.elixir == 12  # Clairvoyance : banc vide
+    step(game_session, Acheter("Chevalier"))
+    step(game_session, Vendre("Chevalier"))
+    assert game_session.bonus_ventes == 1
+    elixir = game_session.etat.elixir
+    _, evenements = step(game_session, FinTour(ventes=2))  # Ventes déclarées hors du moteur
+    assert evenements[-1].details["bonus_ventes"] == 3
+    assert game_session.etat.elixir == elixir + 4 + 3
+    assert game_session.bonus_ventes == 0
+
+if __name__ == "__main__":
+    test_achat_et_fusions()
+    test_action_refusee_sans_effet()
+    test_fin_de_tour()
+    test_premier_achat_du_tour()
+    test_effets_des_modificateurs_actifs()
+    print("✅ Moteur de jeu conforme aux règles")
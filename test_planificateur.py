@@ -0,0 +1,89 @@
+"""
+Tests du planificateur multi-tours : règles simulées, délai et choix du meilleur premier tour
+"""
+
+import time
+
+from main import BIBLIOTHEQUE_CARTES, Carte, FinTour, GameSession, step
+from planificateur import (EtatPlan, Planificateur, ReglesPlan, acheter, coups_du_tour, fin_de_tour,
+                           planifier_session, valeur_etat)
+
+NOMS = list(BIBLIOTHEQUE_CARTES)
+
+def carte(nom: str, niveau: int = 1) -> Carte:
+    base = BIBLIOTHEQUE_CARTES[nom]
+    return Carte(base.nom, base.cout, base.traits, niveau)
+
+def session_exemple() -> GameSession:
+    game_session = GameSession()
+    game_session.leader_choisi = game_session.leaders_disponibles["Impératrice"]
+    game_session.modificateurs_actifs = ["de_plus_en_plus_riche"]
+    game_session.etat.main = [carte(NOMS[0]), carte(NOMS[1])]
+    game_session.etat.bench = [carte(NOMS[2]), carte(NOMS[2])]
+    game_session.etat.elixir = 7
+    game_session.tour = 3
+    return game_session
+
+def test_regles_simulees():
+    """Fusion du banc : +1 élixir et bonus du leader ; intérêts ajoutés au tour suivant"""
+    regles = ReglesPlan(elixir_par_tour=4, bonus_merge=1, interets=True)
+    etat = EtatPlan((), (carte(NOMS[2]), carte(NOMS[2])), 7, 3)
+    apres = acheter(etat, carte(NOMS[2]), regles)
+    assert [(c.nom, c.niveau) for c in apres.banc] == [(NOMS[2], 2)]
+    assert apres.elixir == 7 - carte(NOMS[2]).cout + 1 + 1
+    
+    suivant = fin_de_tour(apres, defaite=False, regles=regles)
+    assert suivant.tour == 4
+    assert suivant.elixir == apres.elixir + 4 + apres.elixir // 2
+    
+    # Défaite : le bonus du leader compte dans l'élixir qui rapporte des intérêts, comme dans le moteur
+    regles = ReglesPlan(elixir_par_tour=4, bonus_defeat=3, interets=True)
+    assert fin_de_tour(apres, defaite=True, regles=regles).elixir == apres.elixir + 3 + 4 + (apres.elixir + 3) // 2
+    for elixir in range(6):
+        game_session = GameSession()
+        game_session.leader_choisi = game_session.leaders_disponibles["Roi Royal"]
+        game_session.modificateurs_actifs = ["de_plus_en_plus_riche"]
+        game_session.etat.elixir = elixir
+        prevu = fin_de_tour(EtatPlan((), (), elixir, 1), defaite=True, regles=ReglesPlan.depuis_session(game_session))
+        step(game_session, FinTour(victoire=False))
+        assert prevu.elixir == game_session.etat.elixir
+
+def test_premier_tour_optimal():
+    """À profondeur 1, le plan retient le coup dont la valeur moyenne après le tour est maximale"""
+    game_session = session_exemple()
+    boutique = [carte(NOMS[2]), carte(NOMS[5]), carte(NOMS[8])]
+    regles = ReglesPlan.depuis_session(game_session)
+    planificateur = Planificateur(regles, tours=1, scenarios=4, graine=3)
+    etat = EtatPlan(tuple(game_session.etat.main), tuple(game_session.etat.bench), 7, 3)
+    plan = planificateur.planifier(etat, boutique)
+    
+    attendu = max(
+        sum(valeur_etat(fin_de_tour(suivant, s.defaites[0], regles), regles) for s in planificateur.scenarios) / 4
+        for suivant, _ in coups_du_tour(etat, boutique, regles))
+    assert plan.profondeur == 1 and not plan.interrompu
+    assert abs(plan.valeur - attendu) < 1e-9
+    assert plan.actions[-1] == ("passer",)
+
+def test_delai_respecte():
+    """Le délai coupe l'approfondissement : on garde la dernière profondeur terminée"""
+    game_session = session_exemple()
+    boutique = [carte(NOMS[2]), carte(NOMS[5]), carte(NOMS[8])]
+    planifier_session(game_session, boutique, tours=1)  # Chargement de la table des familles
+    debut = time.perf_counter()
+    plan = planifier_session(game_session, boutique, tours=6, delai_ms=50)
+    assert time.perf_counter() - debut < 0.5
+    assert plan.interrompu and plan.profondeur < 6
+    assert plan.actions
+
+def test_deterministe():
+    game_session = session_exemple()
+    boutique = [carte(NOMS[3]), carte(NOMS[6]), carte(NOMS[9])]
+    plans = [planifier_session(game_session, boutique, tours=2, delai_ms=None, graine=7) for _ in range(2)]
+    assert plans[0].actions == plans[1].actions and plans[0].profondeur == 2
+
+if __name__ == "__main__":
+    test_regles_simulees()
+    test_premier_tour_optimal()
+    test_delai_respecte()
+    test_deterministe()
+    print("✅ Planificateur multi-tours")
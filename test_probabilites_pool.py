@@ -0,0 +1,53 @@
+"""
+Tests des tables de probabilités du pool : loi hypergéométrique exacte, épuisement, accord avec la simulation
+"""
+
+from math import comb
+
+from main import BIBLIOTHEQUE_CARTES, COUTS_CARTES, EtatJeu, proba_fusion_pool
+from probabilites_pool import DISPONIBILITE_NEUTRE, disponibilites_table, table_pool
+from simulation_boutique import EXEMPLAIRES_PAR_COUT, simuler
+
+def test_une_boutique_hypergeometrique():
+    table = table_pool(COUTS_CARTES)
+    pool = sum(EXEMPLAIRES_PAR_COUT[cout] for _, cout in COUTS_CARTES)
+    # Nom à 2 élixir dont 5 exemplaires sont pris : 7 restants dans un pool de pool - 5
+    restants, reste_pool = EXEMPLAIRES_PAR_COUT[2] - 5, pool - 5
+    aucun = comb(reste_pool - restants, 3) / comb(reste_pool, 3)
+    assert abs(table.proba(2, 5, 1, boutiques=1) - (1 - aucun)) < 1e-12
+    assert table.proba(2, 5, 0, boutiques=1) == 1.0
+    assert table.proba(2, 5, 4, boutiques=1) == 0.0  # Au plus 3 cartes par boutique
+
+def test_epuisement_et_horizon():
+    """Plus d'exemplaires pris, moins de chances ; plus de boutiques, plus de chances"""
+    table = table_pool(COUTS_CARTES)
+    for cout in (2, 3, 4, 5):
+        chances = [table.proba(cout, pris, 2) for pris in range(EXEMPLAIRES_PAR_COUT[cout] + 1)]
+        assert chances == sorted(chances, reverse=True)
+        assert chances[-1] == 0.0
+        assert table.proba(cout, 0, 1, boutiques=1) < table.proba(cout, 0, 1, boutiques=5)
+    
+    disponibilites = disponibilites_table(COUTS_CARTES, {})
+    assert abs(sum(disponibilites.values()) / len(disponibilites) - DISPONIBILITE_NEUTRE) < 1e-9
+    assert disponibilites_table(COUTS_CARTES, {"Chevalier": 8})["Chevalier"] < disponibilites["Chevalier"]
+
+def test_accord_avec_la_simulation():
+    """Sans achats adverses, la simulation des boutiques retrouve les valeurs des tables"""
+    historique = {"Chevalier": 6, "Archères": 2}
+    estimation = simuler(COUTS_CARTES, historique, besoins={"Chevalier": 2, "Archères": 2},
+                         rollouts=6000, achats_adverses=0)
+    table = table_pool(COUTS_CARTES)
+    for nom in ("Chevalier", "Archères"):
+        assert abs(estimation.proba_apparition[nom] - table.proba_nom(nom, historique, 1)) < 0.03
+        assert abs(estimation.proba_fusion[nom] - table.proba_nom(nom, historique, 2)) < 0.03
+    
+    etat = EtatJeu(elixir=10, main=[BIBLIOTHEQUE_CARTES["Chevalier"]], bench=[], historique_pool=historique,
+                   max_cartes_plateau=2, hp=10)
+    assert proba_fusion_pool(BIBLIOTHEQUE_CARTES["Chevalier"], etat) == 1.0
+    assert 0 < proba_fusion_pool(BIBLIOTHEQUE_CARTES["Archères"], etat) < 1
+
+if __name__ == "__main__":
+    test_une_boutique_hypergeometrique()
+    test_epuisement_et_horizon()
+    test_accord_avec_la_simulation()
+    print("✅ Tables du pool conformes à la loi hypergéométrique")
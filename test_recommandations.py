@@ -0,0 +1,67 @@
+"""
+Tests de /api/recommendations avec délai : temps de réponse, profondeur atteinte, plan et validation du délai
+"""
+
+import app as serveur
+
+CHOIX = [{'carte': "Chevalier", 'niveau': 1}, {'carte': "Prince", 'niveau': 1}, {'carte': "Archères", 'niveau': 1}]
+# Construction de la réponse et imprécision des horloges au-delà de la marge gardée par la route
+TOLERANCE_MS = 25
+
+def recommandations(client, session_id, **options):
+    return client.post('/api/recommendations', json={'session_id': session_id, 'choix': CHOIX, **options}).get_json()
+
+def test_delai_respecte():
+    client = serveur.app.test_client()
+    session_id = client.post('/api/start_game').get_json()['session_id']
+    recommandations(client, session_id)  # Tables et scoreur chargés hors mesure
+    
+    for deadline_ms in (0, 30, 60):
+        reponse = recommandations(client, session_id, deadline_ms=deadline_ms)
+        assert reponse['success']
+        assert reponse['deadline_ms'] == deadline_ms
+        assert reponse['temps_ms'] <= deadline_ms + serveur.MARGE_DELAI_MS + TOLERANCE_MS
+        assert isinstance(reponse['profondeur_atteinte'], int)
+        assert 0 <= reponse['profondeur_atteinte'] <= serveur.TOURS_PLANIFICATION
+        assert reponse['plan'] and all(isinstance(etape, str) for etape in reponse['plan'])
+        assert reponse['plan_interrompu'] == (reponse['profondeur_atteinte'] < serveur.TOURS_PLANIFICATION)
+        assert sum(r['plan_recommande'] for r in reponse['recommendations']) <= 1
+    
+    # Sans délai : réponse gloutonne, sans plan
+    reponse = recommandations(client, session_id)
+    assert reponse['profondeur_atteinte'] == 0
+    assert 'plan' not in reponse and 'plan_interrompu' not in reponse
+
+def test_plan_interrompu_jamais_en_cache():
+    """Seules les réponses complètes sont rejouées depuis le cache"""
+    client = serveur.app.test_client()
+    session_id = client.post('/api/start_game').get_json()['session_id']
+    serveur.recommendation_cache.clear()
+    for _ in range(2):
+        assert recommandations(client, session_id, deadline_ms=0)['plan_interrompu']
+    assert len(serveur.recommendation_cache) == 0
+    
+    premiere = recommandations(client, session_id, deadline_ms=serveur.DELAI_RECOMMANDATIONS_MAX_MS)
+    assert not premiere['plan_interrompu'] and len(serveur.recommendation_cache) == 1
+    hits = serveur.recommendation_cache.stats['hits']
+    seconde = recommandations(client, session_id, deadline_ms=serveur.DELAI_RECOMMANDATIONS_MAX_MS)
+    assert serveur.recommendation_cache.stats['hits'] == hits + 1
+    assert seconde['plan'] == premiere['plan']
+
+def test_delai_invalide_ou_borne():
+    client = serveur.app.test_client()
+    session_id = client.post('/api/start_game').get_json()['session_id']
+    for invalide in ("abc", "nan", [50], {'ms': 50}):
+        assert recommandations(client, session_id, deadline_ms=invalide) == {
+            'success': False, 'error': 'deadline_ms invalide'}
+    
+    assert recommandations(client, session_id, deadline_ms=-20)['deadline_ms'] == 0
+    reponse = recommandations(client, session_id, deadline_ms=10 ** 9)
+    assert reponse['success'] and reponse['deadline_ms'] == serveur.DELAI_RECOMMANDATIONS_MAX_MS
+    assert reponse['temps_ms'] <= serveur.DELAI_RECOMMANDATIONS_MAX_MS + TOLERANCE_MS
+
+if __name__ == "__main__":
+    test_delai_respecte()
+    test_plan_interrompu_jamais_en_cache()
+    test_delai_invalide_ou_borne()
+    print("✅ Recommandations progressives bornées par le délai")
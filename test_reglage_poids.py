@@ -0,0 +1,106 @@
+"""
+Tests du réglage des poids : cache des évaluations, profils versionnés et chargement au démarrage
+"""
+
+import json
+import os
+import tempfile
+
+import main
+from main import GameSession, POIDS_PAR_DEFAUT, charger_profil_poids, chemin_profil_poids
+from reglage_poids import (ConfigReglage, Evaluateur, configurations_rejouees, parties_enregistrees,
+                           reglage_complet)
+
+def test_parties_rejouees():
+    """Les leaders et modificateurs des parties enregistrées sont rejoués, les entrées inconnues ignorées"""
+    with tempfile.TemporaryDirectory() as dossier:
+        with open(os.path.join(dossier, "game_stats.json"), "w", encoding="utf-8") as f:
+            json.dump({"alice": [{"leader_utilise": "Roi Royal", "modificateur_utilise": "promotion", "tour_final": 9},
+                                 {"leader_utilise": "Inconnu", "modificateur_utilise": "promotion"}]}, f)
+        with open(os.path.join(dossier, "game_stats.jsonl"), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"username": "bob", "stats": {"leader_utilise": "Roi Royal",
+                                                               "modificateur_utilise": "heritage"}}) + "\n")
+        enregistrees = parties_enregistrees(dossier)
+        assert len(enregistrees) == 3
+        parties = configurations_rejouees(enregistrees, 20, graine=0)
+        assert {(l, m) for l, m, _ in parties} == {("Roi Royal", "promotion"), ("Roi Royal", "heritage")}
+        assert parties == configurations_rejouees(enregistrees, 20, graine=0)
+
+def test_evaluations_en_cache():
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin_cache = os.path.join(dossier, "evaluations.json")
+        parties = configurations_rejouees([], 12, graine=3)
+        evaluateur = Evaluateur(parties, chemin_cache=chemin_cache)
+        premieres = evaluateur.evaluer([(2, 2, 3, 1, 1), (2.001, 2, 3, 1, 1), (5, 1, 1, 1, 1)])
+        assert premieres[0] == premieres[1]  # Même vecteur une fois arrondi
+        assert evaluateur.simulations == 2 * 12
+        
+        # Nouveau processus : les évaluations sont relues depuis le fichier
+        relu = Evaluateur(parties, chemin_cache=chemin_cache)
+        assert relu.evaluer([(5, 1, 1, 1, 1)]) == premieres[2:]
+        assert relu.simulations == 0
+
+def test_profil_versionne_charge_au_demarrage():
+    with tempfile.TemporaryDirectory() as dossier:
+        config = ConfigReglage(generations=1, candidats=2, parties=10, parties_validation=10)
+        options = dict(dossier_stats=dossier, dossier_profils=dossier, chemin_cache=os.path.join(dossier, "c.json"))
+        chemin = reglage_complet(config, **options)
+        assert chemin.endswith("profil_v1.json")
+        assert reglage_complet(config, **options) == chemin  # Rien n'a changé : pas de nouvelle version
+        assert reglage_complet(ConfigReglage(generations=1, candidats=2, parties=10, parties_validation=10,
+                                             graine=1), **options).endswith("profil_v2.json")
+        
+        with open(chemin, encoding="utf-8") as f:
+            profil = json.load(f)
+        profil["weights"]["traits"] = 7.5
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(profil, f)
+        try:
+            assert charger_profil_poids(chemin)["version"] == 1
+            assert GameSession().weights == {**POIDS_PAR_DEFAUT, **profil["weights"]}
+            assert GameSession().weights["traits"] == 7.5
+            
+            profil["format"] = 99
+            with open(chemin, "w", encoding="utf-8") as f:
+                json.dump(profil, f)
+            assert charger_profil_poids(chemin) is None
+            assert GameSession().weights == POIDS_PAR_DEFAUT
+        finally:
+            main._poids_session = dict(POIDS_PAR_DEFAUT)
+
+def test_profil_rejete_saute_au_chargement():
+    """Un réglage qui ne bat pas les poids par défaut en validation est écrit, mais jamais chargé"""
+    with tempfile.TemporaryDirectory() as dossier:
+        config = ConfigReglage(generations=1, candidats=2, parties=10, parties_validation=10)
+        chemin = reglage_complet(config, dossier_stats=dossier, dossier_profils=dossier,
+                                 chemin_cache=os.path.join(dossier, "c.json"))
+        with open(chemin, encoding="utf-8") as f:
+            profil = json.load(f)
+        assert profil["accepte"] == ((profil["validation"]["tour_moyen"], profil["validation"]["taux_victoire"]) >
+                                     (profil["validation_poids_par_defaut"]["tour_moyen"],
+                                      profil["validation_poids_par_defaut"]["taux_victoire"]))
+        
+        def ecrire(version, traits, accepte):
+            with open(chemin_profil_poids(version, dossier), "w", encoding="utf-8") as f:
+                json.dump({**profil, "version": version, "weights": {**profil["weights"], "traits": traits},
+                           "accepte": accepte}, f)
+        try:
+            ecrire(1, 6.5, True)
+            ecrire(2, 9.0, False)
+            assert charger_profil_poids(dossier=dossier)["version"] == 1
+            assert GameSession().weights["traits"] == 6.5
+            
+            ecrire(1, 6.5, False)
+            assert charger_profil_poids(dossier=dossier) is None
+            assert GameSession().weights == POIDS_PAR_DEFAUT
+            # Fichier choisi explicitement : chargé même rejeté
+            assert charger_profil_poids(chemin_profil_poids(2, dossier))["version"] == 2
+        finally:
+            main._poids_session = dict(POIDS_PAR_DEFAUT)
+
+if __name__ == "__main__":
+    test_parties_rejouees()
+    test_evaluations_en_cache()
+    test_profil_versionne_charge_au_demarrage()
+    test_profil_rejete_saute_au_chargement()
+    print("✅ Réglage des poids en cache et profils chargés")
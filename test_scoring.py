@@ -0,0 +1,107 @@
+"""
+Tests du scoreur vectorisé : mêmes composantes que les fonctions scalaires
+"""
+
+import random
+
+from recommendation_cache import RecommendationCache, cle_recommandations
+
+from main import (BIBLIOTHEQUE_CARTES, COMPOSANTES_SCORE, Carte, GameSession, detail_score, detail_scores,
+                  meilleur_choix, pipeline_score, scoreur_catalogue)
+
+def carte_aleatoire(rng: random.Random) -> Carte:
+    base = BIBLIOTHEQUE_CARTES[rng.choice(list(BIBLIOTHEQUE_CARTES))]
+    return Carte(base.nom, base.cout, base.traits, rng.randint(1, 5))
+
+def session_aleatoire(rng: random.Random) -> GameSession:
+    game_session = GameSession()
+    game_session.etat.elixir = rng.randint(0, 10)
+    game_session.etat.main = [carte_aleatoire(rng) for _ in range(rng.randint(0, 8))]
+    game_session.etat.bench = [carte_aleatoire(rng) for _ in range(rng.randint(0, 5))]
+    game_session.etat.historique_pool = {nom: rng.randint(1, 6) for nom in rng.sample(list(BIBLIOTHEQUE_CARTES), 6)}
+    return game_session
+
+def test_equivalence_scalaire():
+    """Chaque composante vectorisée égale la fonction scalaire, pour tout le catalogue"""
+    rng = random.Random(13)
+    scoreur = scoreur_catalogue()
+    for _ in range(200):
+        game_session = session_aleatoire(rng)
+        scores = game_session.evaluer_etat().matrice()
+        for k, carte in enumerate(scoreur.candidats):
+            attendu = detail_score(carte, game_session.etat, game_session.weights)
+            for j, composante in enumerate(COMPOSANTES_SCORE):
+                assert abs(scores[k, j] - attendu[composante]) < 1e-9, (carte.nom, carte.niveau, composante)
+
+def test_cartes_hors_catalogue():
+    """Une carte modifiée ou de niveau > 5 retombe sur le calcul scalaire"""
+    rng = random.Random(14)
+    game_session = session_aleatoire(rng)
+    options = [Carte("Chevalier", 7, ["Noble"], 2), Carte("Archères", 2, ["Clan"], 6)]
+    for carte, detail in zip(options, detail_scores(options, game_session.etat, game_session.weights)):
+        assert detail == detail_score(carte, game_session.etat, game_session.weights)
+
+def test_poids_configurables():
+    """Les poids du pipeline s'appliquent à chaque composante, une pondération nulle l'annule"""
+    rng = random.Random(16)
+    game_session = session_aleatoire(rng)
+    carte = carte_aleatoire(rng)
+    base = detail_scores([carte], game_session.etat, game_session.weights)[0]
+    poids = dict(game_session.weights, familles=0.0, traits=4.0)
+    detail = pipeline_score(poids).evaluer(game_session.etat).detail(carte)
+    assert detail["familles"] == 0
+    assert abs(detail["traits"] - 2 * base["traits"]) < 1e-9
+    assert pipeline_score(poids) is pipeline_score(dict(poids))
+
+def test_meilleur_choix():
+    """Même recommandation qu'une boucle sur les scores scalaires"""
+    rng = random.Random(15)
+    for _ in range(200):
+        game_session = session_aleatoire(rng)
+        options = [carte_aleatoire(rng) for _ in range(3)]
+        attendu, meilleur_score = None, float('-inf')
+        for carte in options:
+            if carte.cout > game_session.etat.elixir:
+                continue
+            score = detail_score(carte, game_session.etat, game_session.weights)["total"]
+            if score > meilleur_score + 1e-9:
+                attendu, meilleur_score = carte, score
+        assert game_session.meilleur_choix_avec_familles(options) is attendu
+        assert meilleur_choix([], game_session.etat, game_session.weights) is None
+
+def test_empreinte_canonique():
+    """L'empreinte ne dépend pas de l'ordre des cartes, et la clé de cache est partagée entre sessions"""
+    rng = random.Random(17)
+    for _ in range(50):
+        game_session = session_aleatoire(rng)
+        copie = GameSession.from_dict(game_session.to_dict())
+        copie.etat.main = list(reversed(copie.etat.main))
+        copie.etat.bench = rng.sample(list(copie.etat.bench), len(copie.etat.bench))
+        copie.etat.historique_pool = dict(reversed(list(copie.etat.historique_pool.items())))
+        assert copie.empreinte() == game_session.empreinte()
+        options = [carte_aleatoire(rng) for _ in range(3)]
+        assert cle_recommandations(copie, options) == cle_recommandations(game_session, options)
+        
+        copie.etat.elixir += 1
+        assert copie.empreinte() != game_session.empreinte()
+
+def test_cache_lru():
+    """Cache borné : la clé la moins récemment utilisée est évincée, hits et misses sont comptés"""
+    cache = RecommendationCache(max_entrees=2)
+    cache.put("a", {"score": 1})
+    cache.put("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    cache.put("c", {"score": 3})
+    assert cache.get("b") is None
+    assert cache.get("c") == {"score": 3}
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entrees']) == (2, 1, 1, 2)
+
+if __name__ == "__main__":
+    test_equivalence_scalaire()
+    test_cartes_hors_catalogue()
+    test_poids_configurables()
+    test_meilleur_choix()
+    test_empreinte_canonique()
+    test_cache_lru()
+    print("✅ Scoreur vectorisé équivalent au calcul scalaire")
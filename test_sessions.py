@@ -0,0 +1,240 @@
+"""
+Tests du stockage des sessions : LRU, expiration, débordement sur disque, versions SQLite et verrous par session
+"""
+
+import os
+import tempfile
+import threading
+import uuid
+
+from main import Acheter, GameSession, step
+from session_store import MemorySessionStore, SQLiteSessionStore, SessionConcurrenteError, SessionLocks
+
+class Horloge:
+    """Horloge factice avancée à la main"""
+    
+    def __init__(self):
+        self.maintenant = 1000.0
+    
+    def __call__(self) -> float:
+        return self.maintenant
+
+def nouvel_id() -> str:
+    return str(uuid.uuid4())
+
+def session_jouee(elixir: int = 20) -> GameSession:
+    game_session = GameSession()
+    game_session.leader_choisi = game_session.leaders_disponibles["Roi Royal"]
+    game_session.etat.elixir = elixir
+    step(game_session, Acheter("Chevalier"))
+    return game_session
+
+def requete(store, session_id):
+    """Cycle d'une requête : lire la session puis rendre le verrou"""
+    try:
+        return store.get(session_id)
+    finally:
+        store.commit()
+
+def ajouter(store, session_id, game_session: GameSession):
+    store[session_id] = game_session
+    store.commit()
+
+def test_lru_et_expiration():
+    horloge = Horloge()
+    store = MemorySessionStore(max_sessions=2, ttl_seconds=60, clock=horloge)
+    a, b, c = nouvel_id(), nouvel_id(), nouvel_id()
+    ajouter(store, a, GameSession())
+    ajouter(store, b, GameSession())
+    horloge.maintenant += 10
+    assert requete(store, a) is not None  # a redevient la plus récente
+    
+    ajouter(store, c, GameSession())
+    assert len(store) == 2 and store.stats['evictions'] == 1
+    assert requete(store, b) is None
+    assert requete(store, a) is not None and requete(store, c) is not None
+    
+    # Inactivité : chaque accès repousse l'expiration, au-delà du TTL la session disparaît
+    horloge.maintenant += 50
+    assert requete(store, c) is not None
+    horloge.maintenant += 30
+    assert requete(store, a) is None
+    assert requete(store, c) is not None
+    assert store.stats['expirations'] == 1 and len(store) == 1
+    assert store.locks.get_stats()['verrous_actifs'] == 0
+
+def test_debordement_et_rechargement():
+    """Une session évincée ou expirée est écrite sur disque puis rechargée telle quelle"""
+    horloge = Horloge()
+    with tempfile.TemporaryDirectory() as dossier:
+        store = MemorySessionStore(max_sessions=1, ttl_seconds=60, spill_dir=dossier, clock=horloge)
+        a, b = nouvel_id(), nouvel_id()
+        ajouter(store, a, session_jouee())
+        empreinte = requete(store, a).empreinte()
+        
+        ajouter(store, b, GameSession())
+        assert os.listdir(dossier) == [f"{a}.json"]
+        rechargee = requete(store, a)
+        assert rechargee.empreinte() == empreinte
+        assert rechargee.etat.bench.comptes() == {("Chevalier", 1): 1}
+        assert os.listdir(dossier) == [f"{b}.json"]
+        assert store.stats['spills'] == 2 and store.stats['rehydrations'] == 1
+        
+        horloge.maintenant += 61
+        assert requete(store, b) is not None  # Expirée en mémoire, mais rechargée depuis le disque
+        assert store.stats['expirations'] == 1
+        
+        # Fichiers plus vieux que spill_ttl_seconds : ni rechargés, ni conservés
+        store.delete(b)
+        ajouter(store, b, GameSession())
+        ajouter(store, a, GameSession())
+        os.utime(os.path.join(dossier, f"{b}.json"), (0, 0))
+        assert store.purge_spill() == 1
+        assert requete(store, b) is None
+
+def test_session_tenue_jamais_evincee():
+    """Une session tenue par une requête en cours n'est ni évincée ni expirée avant la fin de cette requête"""
+    horloge = Horloge()
+    with tempfile.TemporaryDirectory() as dossier:
+        store = MemorySessionStore(max_sessions=1, ttl_seconds=60, spill_dir=dossier, clock=horloge)
+        a, b = nouvel_id(), nouvel_id()
+        ajouter(store, a, GameSession())
+        
+        lue, evincee = threading.Event(), threading.Event()
+        def autre_requete():
+            game_session = store.get(a)
+            lue.set()
+            evincee.wait()
+            game_session.etat.elixir = 13  # Modification après les tentatives d'éviction
+            store.commit()
+        thread = threading.Thread(target=autre_requete)
+        thread.start()
+        lue.wait()
+        try:
+            ajouter(store, b, GameSession())  # Plafond dépassé : b est évincée à la place de a
+            horloge.maintenant += 120
+            assert requete(store, b) is not None  # a a expiré, mais reste en mémoire
+            assert os.listdir(dossier) == [f"{b}.json"]
+        finally:
+            evincee.set()
+            thread.join()
+        
+        assert requete(store, a).etat.elixir == 13
+        assert len(store) == 1 and store.locks.get_stats()['verrous_actifs'] == 0
+
+def test_version_concurrente_sqlite():
+    """Deux processus (deux stockages sur la même base) : l'écriture de la version périmée est refusée"""
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "sessions.sqlite3")
+        premier, second = SQLiteSessionStore(chemin), SQLiteSessionStore(chemin)
+        session_id = nouvel_id()
+        ajouter(premier, session_id, GameSession())
+        
+        session_premier = premier.get(session_id)
+        session_second = second.get(session_id)
+        session_premier.etat.elixir = 11
+        session_second.etat.elixir = 3
+        premier.commit()
+        try:
+            second.commit()
+        except SessionConcurrenteError as erreur:
+            assert erreur.args == (session_id,)
+        else:
+            raise AssertionError("L'écriture périmée aurait dû être refusée")
+        assert second.stats['conflits'] == 1
+        assert second.locks.get_stats()['verrous_actifs'] == 0
+        assert requete(second, session_id).etat.elixir == 11
+        
+        # Une session seulement lue ne provoque pas de conflit
+        premier.get(session_id)
+        requete(second, session_id)
+        premier.commit()
+
+def test_verrous_par_session():
+    verrous = SessionLocks(timeout_seconds=0.05)
+    # Réentrant dans la même requête, rendu en une fois
+    verrous.acquire("a")
+    verrous.acquire("a")
+    assert verrous.get_stats()['verrous_actifs'] == 1
+    
+    erreurs = []
+    def autre_requete():
+        try:
+            verrous.acquire("a")
+        except SessionConcurrenteError:
+            erreurs.append("a")
+        verrous.acquire("b")  # Sans rapport : jamais bloqué
+        verrous.release_all()
+    thread = threading.Thread(target=autre_requete)
+    thread.start()
+    thread.join()
+    assert erreurs == ["a"]
+    stats = verrous.get_stats()
+    assert stats['timeouts'] == 1 and stats['contentions'] == 1 and stats['attente_max_ms'] >= 40
+    
+    verrous.release("a")
+    assert verrous.get_stats()['verrous_actifs'] == 0
+    thread = threading.Thread(target=autre_requete)
+    thread.start()
+    thread.join()
+    assert erreurs == ["a"] and verrous.get_stats()['verrous_actifs'] == 0
+
+def test_verrous_rendus_en_fin_de_requete():
+    """after_request rend les verrous ; une écriture périmée devient une réponse 409"""
+    import app as serveur
+    
+    client = serveur.app.test_client()
+    session_id = client.post('/api/start_game').get_json()['session_id']
+    assert client.post('/api/buy_card', json={'session_id': session_id, 'carte': "Chevalier"}).get_json()['success']
+    assert client.get(f'/api/game_state/{session_id}').get_json()['success']
+    assert serveur.game_sessions.locks.get_stats()['verrous_actifs'] == 0
+    
+    # Session tenue par une autre requête au-delà du délai d'attente
+    tenue, rendue = threading.Event(), threading.Event()
+    def autre_requete():
+        serveur.game_sessions.get(session_id)
+        tenue.set()
+        rendue.wait()
+        serveur.game_sessions.commit()
+    thread = threading.Thread(target=autre_requete)
+    thread.start()
+    tenue.wait()
+    delai = serveur.game_sessions.locks.timeout_seconds
+    serveur.game_sessions.locks.timeout_seconds = 0.05
+    try:
+        reponse = client.post('/api/buy_card', json={'session_id': session_id, 'carte': "Chevalier"})
+    finally:
+        serveur.game_sessions.locks.timeout_seconds = delai
+        rendue.set()
+        thread.join()
+    assert reponse.status_code == 409 and not reponse.get_json()['success']
+    assert serveur.game_sessions.locks.get_stats()['verrous_actifs'] == 0
+    
+    # Backend SQLite : la session a changé depuis sa lecture dans ce thread
+    with tempfile.TemporaryDirectory() as dossier:
+        stockage_memoire = serveur.game_sessions
+        chemin = os.path.join(dossier, "sessions.sqlite3")
+        serveur.game_sessions = SQLiteSessionStore(chemin)
+        try:
+            session_id = client.post('/api/start_game').get_json()['session_id']
+            serveur.game_sessions.get(session_id)
+            autre_processus = SQLiteSessionStore(chemin)
+            autre_processus.get(session_id).etat.elixir = 9
+            autre_processus.commit()
+            
+            reponse = client.post('/api/buy_card', json={'session_id': session_id, 'carte': "Chevalier"})
+            assert reponse.status_code == 409
+            assert requete(autre_processus, session_id).etat.elixir == 9
+            assert client.post('/api/buy_card', json={'session_id': session_id, 'carte': "Chevalier"}).status_code == 200
+            assert serveur.game_sessions.locks.get_stats()['verrous_actifs'] == 0
+        finally:
+            serveur.game_sessions = stockage_memoire
+
+if __name__ == "__main__":
+    test_lru_et_expiration()
+    test_debordement_et_rechargement()
+    test_session_tenue_jamais_evincee()
+    test_version_concurrente_sqlite()
+    test_verrous_par_session()
+    test_verrous_rendus_en_fin_de_requete()
+    print("✅ Sessions bornées, rechargées et protégées des écritures concurrentes")
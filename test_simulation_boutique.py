@@ -0,0 +1,33 @@
+"""
+Tests de la simulation des boutiques : reproductibilité et effet de l'épuisement du pool
+"""
+
+from main import BIBLIOTHEQUE_CARTES, COUTS_CARTES, GameSession, score_disruption
+from simulation_boutique import simuler
+
+def test_independant_du_nombre_de_processus():
+    historique = {"Chevalier": 4, "Archères": 2}
+    sequentiel = simuler(COUTS_CARTES, historique, besoins={"Archères": 2}, rollouts=600, graine=3)
+    parallele = simuler(COUTS_CARTES, historique, besoins={"Archères": 2}, rollouts=600, graine=3, processus=2)
+    assert sequentiel.apparitions == parallele.apparitions
+    assert sequentiel.proba_fusion == parallele.proba_fusion
+    assert 0 < sequentiel.proba_fusion["Archères"] < 1
+
+def test_pool_epuise():
+    """Une carte dont tous les exemplaires sont pris n'apparaît plus"""
+    estimation = simuler(COUTS_CARTES, {"Chevalier": 99}, rollouts=300)
+    assert estimation.apparitions["Chevalier"] == 0
+
+def test_score_disruption():
+    """Le score suit la disponibilité estimée : plus une carte est rare, plus la prendre gêne les autres"""
+    game_session = GameSession()
+    chevalier = BIBLIOTHEQUE_CARTES["Chevalier"]
+    avant = score_disruption(chevalier, {}, game_session.weights)
+    apres = score_disruption(chevalier, {"Chevalier": 8}, game_session.weights)
+    assert apres > avant
+
+if __name__ == "__main__":
+    test_independant_du_nombre_de_processus()
+    test_pool_epuise()
+    test_score_disruption()
+    print("✅ Simulation des boutiques reproductible")
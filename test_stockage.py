@@ -0,0 +1,255 @@
+"""
+Tests du stockage des comptes et statistiques : journal des parties, compaction, reprise après arrêt,
+agrégats et pagination des sauvegardes, sur les deux backends
+"""
+
+import os
+import random
+import tempfile
+from dataclasses import asdict
+
+from models import (DatabaseManager, GameStats, JsonStorage, SQLiteStorage, SavedGame, StatsAggregate)
+
+SEUIL_COMPACTION = 5
+
+def stockages(dossier):
+    """Un backend de chaque sorte, dans des dossiers séparés"""
+    return [JsonStorage(os.path.join(dossier, "json"), compaction_threshold=SEUIL_COMPACTION),
+            SQLiteStorage(os.path.join(dossier, "sqlite"))]
+
+def reouvrir(stockage):
+    """Nouvelle instance sur les mêmes fichiers (autre processus ou redémarrage)"""
+    if isinstance(stockage, JsonStorage):
+        return JsonStorage(stockage.data_dir, compaction_threshold=SEUIL_COMPACTION)
+    return SQLiteStorage(stockage.data_dir)
+
+def partie(rng: random.Random, numero: int) -> dict:
+    stats = GameStats(
+        tour_final=rng.randint(1, 15),
+        elixir_total_gagne=rng.randint(0, 60),
+        cartes_achetees=rng.randint(0, 20),
+        fusions_effectuees=rng.randint(0, 6),
+        cartes_vendues=rng.randint(0, 4),
+        bonus_familles_utilises=[],
+        leader_utilise=rng.choice(["Roi Royal", "Impératrice", "Reine Archère"]),
+        modificateur_utilise=rng.choice(["promotion", "heritage", ""]),
+        victoire=rng.random() < 0.3
+    )
+    return {**asdict(stats), 'date': f"2024-01-01T00:{numero // 60:02d}:{numero % 60:02d}"}
+
+def creer_compte(db: DatabaseManager, username: str):
+    assert db.create_account(username, f"{username}@exemple.fr", "secret")
+
+def totaux(stockage, username: str) -> tuple:
+    compte = stockage.get_account(username)
+    agregat = stockage.get_aggregate(username)
+    return (len(stockage.get_stats(username)), compte['total_games'], agregat.total_games if agregat else 0)
+
+def test_journal_sans_double_comptage():
+    """Les parties passent par le journal et les compactions sans être comptées deux fois"""
+    with tempfile.TemporaryDirectory() as dossier:
+        for stockage in stockages(dossier):
+            db = DatabaseManager(stockage.data_dir, backend=stockage)
+            creer_compte(db, "alice")
+            rng = random.Random(1)
+            for numero in range(2 * SEUIL_COMPACTION + 2):
+                stockage.record_game("alice", partie(rng, numero))
+                assert totaux(stockage, "alice") == (numero + 1,) * 3, stockage.name
+            
+            if isinstance(stockage, JsonStorage):
+                # Deux compactions, il reste deux parties dans le journal
+                assert len(stockage.load_json(stockage.stats_file)["alice"]) == 2 * SEUIL_COMPACTION
+                assert len(stockage.pending_stats("alice")) == 2
+                
+                # Mise à jour du compte : le journal est compacté avant l'écriture
+                db.update_account_stats("alice", GameStats(**{k: v for k, v in partie(rng, 99).items()
+                                                             if k != 'date'}))
+                assert stockage.get_account("alice")['total_games'] == 2 * SEUIL_COMPACTION + 3
+                assert stockage.compact() == 0
+                assert len(stockage.get_stats("alice")) == 2 * SEUIL_COMPACTION + 2
+            
+            # Une seconde instance voit les mêmes totaux
+            attendus = totaux(stockage, "alice")
+            assert totaux(reouvrir(stockage), "alice") == attendus, stockage.name
+
+def test_seconde_instance_suit_le_journal():
+    """Deux instances JSON sur le même dossier : chacune relit ce que l'autre a ajouté ou compacté"""
+    with tempfile.TemporaryDirectory() as dossier:
+        premiere = JsonStorage(dossier, compaction_threshold=SEUIL_COMPACTION)
+        creer_compte(DatabaseManager(dossier, backend=premiere), "bob")
+        seconde = reouvrir(premiere)
+        rng = random.Random(2)
+        for numero in range(SEUIL_COMPACTION + 3):
+            (premiere if numero % 2 else seconde).record_game("bob", partie(rng, numero))
+            assert totaux(premiere, "bob") == totaux(seconde, "bob") == (numero + 1,) * 3
+        
+        # La première compacte puis remplit le nouveau journal jusqu'à la position de lecture de la seconde
+        for numero in range(SEUIL_COMPACTION + 3, 2 * SEUIL_COMPACTION + 3):
+            premiere.record_game("bob", partie(rng, numero))
+        assert len(premiere.pending_stats("bob")) == 3
+        assert totaux(seconde, "bob") == (2 * SEUIL_COMPACTION + 3,) * 3
+
+def interrompre_compaction(stockage: JsonStorage, etape: str):
+    """Simuler un arrêt brutal pendant compact() à l'étape donnée"""
+    journal = stockage.journal_file
+    if etape == "renommage":
+        os.replace(journal, journal + ".compacting")
+    elif etape == "temporaires":
+        os.replace(journal, journal + ".compacting")
+        for chemin in (stockage.stats_file, stockage.accounts_file):
+            with open(chemin + ".tmp", "w", encoding="utf-8") as f:
+                f.write('{"tronqu')
+    elif etape == "validation":
+        def remplacement_partiel():
+            os.replace(stockage.stats_file + ".tmp", stockage.stats_file)
+            raise KeyboardInterrupt
+        stockage._finish_compaction = remplacement_partiel
+        try:
+            stockage.compact()
+        except KeyboardInterrupt:
+            pass
+        else:
+            raise AssertionError("La compaction aurait dû être interrompue")
+
+def test_reprise_apres_compaction_interrompue():
+    for etape in ("renommage", "temporaires", "validation"):
+        with tempfile.TemporaryDirectory() as dossier:
+            stockage = JsonStorage(dossier, compaction_threshold=100)
+            creer_compte(DatabaseManager(dossier, backend=stockage), "carole")
+            rng = random.Random(3)
+            for numero in range(7):
+                stockage.record_game("carole", partie(rng, numero))
+            resume = StatsAggregate.build(stockage.get_stats("carole")).summary()
+            
+            interrompre_compaction(stockage, etape)
+            
+            reprise = reouvrir(stockage)
+            assert totaux(reprise, "carole") == (7, 7, 7), etape
+            assert reprise.get_aggregate("carole").summary() == resume, etape
+            assert sorted(os.listdir(dossier)) == sorted(
+                ["accounts.json", "email_index.json", "game_stats.json", "saved_games.json",
+                 "saves_index.json", "stats_aggregates.json"]), etape
+            
+            # Les parties suivantes s'ajoutent normalement
+            reprise.record_game("carole", partie(rng, 7))
+            assert totaux(reouvrir(reprise), "carole") == (8, 8, 8), etape
+
+def test_agregats_egaux_a_la_reconstruction():
+    """Les agrégats tenus à jour partie par partie valent ceux de rebuild-stats"""
+    with tempfile.TemporaryDirectory() as dossier:
+        for stockage in stockages(dossier):
+            db = DatabaseManager(stockage.data_dir, backend=stockage)
+            rng = random.Random(4)
+            joueurs = ["alice", "bob", "carole"]
+            for username in joueurs:
+                creer_compte(db, username)
+            for numero in range(40):
+                stockage.record_game(rng.choice(joueurs), partie(rng, numero))
+            
+            incrementaux = {username: db.get_user_stats(username) for username in joueurs}
+            assert sum(s['total_games'] for s in incrementaux.values()) == 40
+            assert db.rebuild_stats_aggregates() == len(joueurs)
+            assert {username: db.get_user_stats(username) for username in joueurs} == incrementaux, stockage.name
+            assert {username: reouvrir(stockage).get_aggregate(username).summary()
+                    for username in joueurs} == incrementaux, stockage.name
+
+def test_index_des_emails():
+    """Index réparé au démarrage seulement ; les doublons hérités ne le font pas reconstruire à chaque inscription"""
+    with tempfile.TemporaryDirectory() as dossier:
+        stockage = JsonStorage(dossier)
+        creer_compte(DatabaseManager(dossier, backend=stockage), "alice")
+        comptes = stockage.load_json(stockage.accounts_file)
+        comptes["alice2"] = {**comptes["alice"], 'username': "alice2"}  # Même email (données héritées)
+        comptes["bob"] = {**comptes["alice"], 'username': "bob", 'email': "bob@exemple.fr"}  # Absent de l'index
+        stockage.save_json(stockage.accounts_file, comptes)
+        
+        reprise = JsonStorage(dossier)
+        assert reprise.email_index() == {"alice@exemple.fr": "alice2", "bob@exemple.fr": "bob"}
+        reconstructions = []
+        reprise.rebuild_email_index = lambda: reconstructions.append(1)
+        db = DatabaseManager(dossier, backend=reprise)
+        for username in ("carole", "david", "eve"):
+            creer_compte(db, username)
+        assert not db.create_account("bob2", "bob@exemple.fr", "secret")
+        assert not db.create_account("alice3", "alice@exemple.fr", "secret")
+        assert reconstructions == []
+        assert JsonStorage(dossier).email_index()["eve@exemple.fr"] == "eve"
+
+def test_inscription_en_une_operation():
+    """Nom et email vérifiés par insert_account seul, sans relire le compte avant"""
+    with tempfile.TemporaryDirectory() as dossier:
+        for stockage in stockages(dossier):
+            db = DatabaseManager(stockage.data_dir, backend=stockage)
+            lectures = []
+            stockage.get_account = lambda username: lectures.append(username)
+            creer_compte(db, "alice")
+            assert not db.create_account("alice", "autre@exemple.fr", "secret"), stockage.name
+            assert not db.create_account("alice2", "alice@exemple.fr", "secret"), stockage.name
+            assert lectures == [], stockage.name
+            assert reouvrir(stockage).get_account("alice")['email'] == "alice@exemple.fr"
+            assert reouvrir(stockage).get_account("alice2") is None
+
+def sauvegarde(save_id: str, last_modified: str) -> dict:
+    return SavedGame(save_id=save_id, username="alice", game_state={}, created_at=last_modified,
+                     last_modified=last_modified, game_name=save_id, tour=1, elixir=4, hp=10).to_dict()
+
+def test_pagination_sans_trou_ni_doublon():
+    """Pages successives par curseur, y compris quand plusieurs sauvegardes ont la même date"""
+    with tempfile.TemporaryDirectory() as dossier:
+        for stockage in stockages(dossier):
+            db = DatabaseManager(stockage.data_dir, backend=stockage)
+            rng = random.Random(5)
+            dates = ["2024-03-01T10:00:00"] * 7 + ["2024-03-02T10:00:00"] * 4 + ["2024-02-28T09:00:00"] * 2
+            ids = [f"save-{rng.getrandbits(32):08x}" for _ in dates]
+            for save_id, date in zip(ids, dates):
+                stockage.put_save(sauvegarde(save_id, date))
+            stockage.put_save({**sauvegarde("autre", dates[0]), 'username': "bob"})
+            
+            for limite in (1, 3, 5, 13, 20):
+                vus, curseur = [], None
+                while True:
+                    page, curseur = db.list_save_summaries("alice", limit=limite, cursor=curseur)
+                    assert len(page) <= limite
+                    vus.extend(page)
+                    if curseur is None:
+                        break
+                cles = [(s['last_modified'], s['save_id']) for s in vus]
+                assert len(set(cles)) == len(cles) == len(ids), (stockage.name, limite)
+                assert cles == sorted(zip(dates, ids), reverse=True), (stockage.name, limite)
+                assert all('game_state' not in s for s in vus)
+
+def test_index_des_sauvegardes_repare_au_demarrage():
+    """Arrêt entre l'écriture de saved_games.json et celle de l'index : reconstruit au démarrage suivant"""
+    with tempfile.TemporaryDirectory() as dossier:
+        stockage = JsonStorage(dossier)
+        stockage.put_save(sauvegarde("a", "2024-03-01T10:00:00"))
+        stockage.put_save(sauvegarde("b", "2024-03-01T11:00:00"))
+        stockage.delete_save("a")
+        stockage.put_save({**sauvegarde("c", "2024-03-01T12:00:00"), 'username': "bob"})
+        stockage.delete_save("c")
+        assert JsonStorage(dossier).saves_index_complete()
+        
+        ecriture_index = stockage.save_json_cached
+        for modification in (sauvegarde("d", "2024-03-02T10:00:00"),  # Nouvelle sauvegarde
+                             {**sauvegarde("b", "2024-03-03T10:00:00"), 'game_name': "renommée"}):  # Mise à jour
+            stockage.save_json_cached = lambda chemin, donnees: None  # Arrêt avant l'écriture de l'index
+            stockage.put_save(modification)
+            stockage.save_json_cached = ecriture_index
+            assert not stockage.saves_index_complete()
+            
+            reprise = JsonStorage(dossier)
+            assert reprise.saves_index_complete()
+            page, _ = DatabaseManager(dossier, backend=reprise).list_save_summaries("alice")
+            assert page[0]['save_id'] == modification['save_id']
+            assert page[0]['game_name'] == modification['game_name']
+
+if __name__ == "__main__":
+    test_journal_sans_double_comptage()
+    test_seconde_instance_suit_le_journal()
+    test_reprise_apres_compaction_interrompue()
+    test_agregats_egaux_a_la_reconstruction()
+    test_index_des_emails()
+    test_inscription_en_une_operation()
+    test_pagination_sans_trou_ni_doublon()
+    test_index_des_sauvegardes_repare_au_demarrage()
+    print("✅ Journal, compaction, agrégats et pagination cohérents sur les deux backends")
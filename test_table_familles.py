@@ -0,0 +1,135 @@
+"""
+Tests de la table précalculée des familles : mêmes paliers et scores que les compteurs du plateau
+"""
+
+import array
+import os
+import random
+import tempfile
+
+from main import BIBLIOTHEQUE_CARTES, BITS_NOMS, COMPOSANTES, Carte, GameSession, ZoneCartes, pipeline_score
+import table_familles
+from table_familles import (DECALAGE_SCORE, MAX_NOMS_TABLE, NB_ENTREES, TableFamilles, construire_table, ecrire_table,
+                            rang, table_partagee)
+
+def test_rangs_distincts():
+    """Chaque composition de 0 à 7 noms a sa propre entrée"""
+    rng = random.Random(16)
+    vus = {}
+    for _ in range(20000):
+        masque = 0
+        for nom in rng.sample(list(BITS_NOMS), rng.randint(0, MAX_NOMS_TABLE)):
+            masque |= BITS_NOMS[nom]
+        r = rang(masque)
+        assert 0 <= r < NB_ENTREES
+        assert vus.setdefault(r, masque) == masque
+
+def test_table_equivalente_aux_compteurs():
+    """Paliers et score de synergie de la table = compteurs incrémentaux de ZoneCartes"""
+    rng = random.Random(17)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "table_familles.bin")
+        ecrire_table(chemin)
+        table = TableFamilles.charger(chemin)
+        assert table._projection is not None  # Fichier projeté, pas recalculé
+        for _ in range(2000):
+            noms = rng.sample(list(BIBLIOTHEQUE_CARTES), rng.randint(0, MAX_NOMS_TABLE))
+            zone = ZoneCartes(Carte(nom, BIBLIOTHEQUE_CARTES[nom].cout, BIBLIOTHEQUE_CARTES[nom].traits,
+                                    rng.randint(1, 3)) for nom in noms)
+            assert table.paliers(zone.masque_noms()) == zone.paliers_familles()
+            assert table.score(zone.masque_noms()) == zone.score_synergie()
+        table._entrees.release()
+        table._projection.close()
+
+def test_score_familles_session():
+    """GameSession.score_familles donne le même score avec ou sans la table"""
+    rng = random.Random(18)
+    for _ in range(500):
+        game_session = GameSession()
+        for nom in rng.sample(list(BIBLIOTHEQUE_CARTES), rng.randint(0, 8)):
+            base = BIBLIOTHEQUE_CARTES[nom]
+            for _ in range(rng.choice((1, 1, 2))):
+                game_session.etat.main.append(Carte(nom, base.cout, base.traits, rng.randint(1, 3)))
+        base = BIBLIOTHEQUE_CARTES[rng.choice(list(BIBLIOTHEQUE_CARTES))]
+        carte = Carte(base.nom, base.cout, base.traits, 1)
+        assert game_session.score_familles(carte) == game_session.etat.main.score_synergie(carte.masque)
+        game_session.calculer_bonus_familles()
+        assert game_session.bonus_familles_actifs == game_session.etat.main.paliers_familles()
+
+def test_composante_familles():
+    """La composante "familles" du pipeline lit la table, et vaut le calcul vectorisé"""
+    rng = random.Random(19)
+    familles = COMPOSANTES["familles"]
+    for _ in range(200):
+        game_session = GameSession()
+        for nom in rng.sample(list(BIBLIOTHEQUE_CARTES), rng.randint(0, 6)):
+            base = BIBLIOTHEQUE_CARTES[nom]
+            game_session.etat.main.append(Carte(nom, base.cout, base.traits, rng.randint(1, 3)))
+        evaluation = pipeline_score({}, ("familles",)).evaluer(game_session.etat)
+        contexte = evaluation.contextes[familles.preparer]
+        masque_noms = game_session.etat.main.masque_noms()
+        for nom, base in BIBLIOTHEQUE_CARTES.items():
+            carte = Carte(nom, base.cout, base.traits, 1)
+            score = familles.evaluer(contexte, carte)
+            if not masque_noms & BITS_NOMS[nom]:
+                assert score == table_partagee().score(masque_noms | BITS_NOMS[nom])
+            assert abs(evaluation.detail(carte)["familles"] - score) < 1e-9  # Passe vectorisée (NumPy)
+
+def test_composantes_lisent_la_table():
+    """Avec une table décalée d'un demi-point, les deux passes suivent la table, pas les compteurs"""
+    decalee = TableFamilles(array.array("I", (entree + (1 << DECALAGE_SCORE) for entree in construire_table())))
+    originale = table_familles._table
+    table_familles._table = decalee
+    try:
+        game_session = GameSession()
+        for nom in ("Chevalier", "Archères", "Prince"):
+            base = BIBLIOTHEQUE_CARTES[nom]
+            game_session.etat.main.append(Carte(nom, base.cout, base.traits, 1))
+        evaluation = pipeline_score({}, ("familles",)).evaluer(game_session.etat)
+        contexte = evaluation.contextes[COMPOSANTES["familles"].preparer]
+        for nom, base in BIBLIOTHEQUE_CARTES.items():
+            carte = Carte(nom, base.cout, base.traits, 2)
+            compteurs = game_session.etat.main.score_synergie(carte.masque)
+            attendu = compteurs if nom in ("Chevalier", "Archères", "Prince") else compteurs + 0.5
+            assert COMPOSANTES["familles"].evaluer(contexte, carte) == attendu
+            assert abs(evaluation.detail(carte)["familles"] - attendu) < 1e-9
+    finally:
+        table_familles._table = originale
+
+def test_fichier_perime():
+    """Un fichier d'une autre version du catalogue est ignoré"""
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "table_familles.bin")
+        with open(chemin, "wb") as f:
+            f.write(b"MTFT" + bytes(100))
+        table = TableFamilles.charger(chemin)
+        assert table._projection is None
+        assert len(table._entrees) == NB_ENTREES
+        
+        # La table recalculée a remplacé le fichier : le chargement suivant le projette
+        rechargee = TableFamilles.charger(chemin)
+        assert rechargee._projection is not None
+        assert list(rechargee._entrees) == list(table._entrees)
+        assert os.listdir(dossier) == ["table_familles.bin"]
+        rechargee._entrees.release()
+        rechargee._projection.close()
+
+def test_fichier_absent_ecrit():
+    """Premier démarrage sans fichier : la table est recalculée une fois puis écrite"""
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "data", "table_familles.bin")
+        assert TableFamilles.charger(chemin)._projection is None
+        table = TableFamilles.charger(chemin)
+        assert table._projection is not None
+        table._entrees.release()
+        table._projection.close()
+
+if __name__ == "__main__":
+    test_rangs_distincts()
+    test_table_equivalente_aux_compteurs()
+    test_score_familles_session()
+    test_composante_familles()
+    test_composantes_lisent_la_table()
+    test_fichier_perime()
+    test_fichier_absent_ecrit()
+    print("✅ Table des familles équivalente aux compteurs du plateau")
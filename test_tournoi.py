@@ -0,0 +1,62 @@
+"""
+Tests du tournoi en auto-jeu : parties reproductibles et reprise des lots déjà joués
+"""
+
+import os
+import tempfile
+
+import tournoi
+from tournoi import ConfigTournoi, agreger, jouer_partie, lancer_tournoi
+
+def petite_config(**options) -> ConfigTournoi:
+    return ConfigTournoi(leaders=["Impératrice", "Roi Royal"], modificateurs=["cadeau_de_la_maison", "promotion"],
+                         politiques=["score", "aleatoire"], parties=12, **options)
+
+def test_partie_reproductible():
+    for politique in tournoi.POLITIQUES:
+        premiere = jouer_partie("Roi Royal", "banc_de_pandore", politique, graine=7)
+        assert premiere == jouer_partie("Roi Royal", "banc_de_pandore", politique, graine=7)
+        assert 1 <= premiere.tour <= tournoi.TOURS_MAX
+        assert premiere.victoires <= premiere.batailles
+
+def test_resultats_independants_des_processus():
+    with tempfile.TemporaryDirectory() as dossier:
+        config = petite_config()
+        sequentiel = lancer_tournoi(config, chemin=os.path.join(dossier, "a.json"))
+        parallele = lancer_tournoi(config, processus=2, chemin=os.path.join(dossier, "b.json"))
+        assert sequentiel == parallele
+        assert len(sequentiel) == len(config.lots()) == 2 * 2 * 2 * 2
+        resume = agreger(sequentiel, (0,))
+        assert sum(r["parties"] for r in resume.values()) == 2 * 2 * 2 * 12
+
+def test_reprise():
+    """Une relance ne rejoue que les lots absents du fichier ; une autre configuration repart de zéro"""
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "tournoi.json")
+        config = petite_config()
+        complet = lancer_tournoi(config, chemin=chemin)
+        
+        joues = []
+        jouer_lot = tournoi.jouer_lot
+        tournoi.jouer_lot = lambda *args: joues.append(args) or jouer_lot(*args)
+        try:
+            assert lancer_tournoi(config, chemin=chemin) == complet
+            assert joues == []
+            
+            # Fichier interrompu : seuls les lots manquants sont rejoués
+            incomplet = dict(list(complet.items())[:5])
+            tournoi.ecrire_resultats(chemin, config, incomplet)
+            assert lancer_tournoi(config, chemin=chemin) == complet
+            assert len(joues) == len(complet) - 5
+            
+            joues.clear()
+            lancer_tournoi(petite_config(graine=1), chemin=chemin)
+            assert len(joues) == len(complet)
+        finally:
+            tournoi.jouer_lot = jouer_lot
+
+if __name__ == "__main__":
+    test_partie_reproductible()
+    test_resultats_independants_des_processus()
+    test_reprise()
+    print("✅ Tournoi reproductible et repris depuis le fichier de résultats")
@@ -0,0 +1,167 @@
+"""
+Tests des zones de cartes indexées et de la cascade de fusions : équivalence avec une simple liste recomptée
+"""
+
+import random
+from collections import Counter
+
+from main import (BIBLIOTHEQUE_CARTES, FAMILLES, INDICES_MASQUE, NB_FAMILLES, SCORE_SYNERGIE, TAILLE_FUSION_BANC,
+                  TAILLE_FUSION_PLATEAU, Acheter, Carte, DebutTour, GameSession, ZoneCartes, palier_famille,
+                  resoudre_fusions, step)
+
+NOMS = list(BIBLIOTHEQUE_CARTES)[:8]  # Peu de noms : doublons et paliers fréquents
+
+def carte(nom: str, niveau: int = 1) -> Carte:
+    if nom == "Mannequin":
+        return Carte("Mannequin", 0, ["Noble", "Ace"], niveau)  # Hors catalogue
+    base = BIBLIOTHEQUE_CARTES[nom]
+    return Carte(base.nom, base.cout, base.traits, niveau)
+
+def carte_au_hasard(rng: random.Random) -> Carte:
+    return carte(rng.choice(NOMS + ["Mannequin"]), rng.randint(1, 3))
+
+def verifier(zone: ZoneCartes, modele: list):
+    """Index, familles et synergie de la zone égaux à un recomptage de la liste"""
+    assert list(zone) == modele and len(zone) == len(modele)
+    comptes = Counter((c.nom, c.niveau) for c in modele)
+    assert zone.comptes() == comptes
+    for (nom, niveau) in comptes:
+        identiques = [c for c in modele if (c.nom, c.niveau) == (nom, niveau)]
+        assert zone.trouver(nom, niveau) == identiques[0]
+        assert zone.trouver(nom, niveau, depuis_droite=True) == identiques[-1]
+    
+    masques = {}
+    for c in modele:
+        masques.setdefault(c.nom, c.masque)
+    distinctes = [sum(1 for masque in masques.values() if masque >> i & 1) for i in range(NB_FAMILLES)]
+    cartes_familles = [sum(1 for c in modele if c.masque >> i & 1) for i in range(NB_FAMILLES)]
+    assert zone.compteurs_familles() == distinctes
+    assert zone.compteurs_familles(distinctes=False) == cartes_familles
+    assert zone.familles() == {FAMILLES[i]: n for i, n in enumerate(distinctes) if n}
+    assert zone.paliers_familles() == {FAMILLES[i]: palier_famille(FAMILLES[i], n)
+                                       for i, n in enumerate(distinctes) if palier_famille(FAMILLES[i], n)}
+    for masque in (0, carte("Chevalier").masque, carte("Archères").masque, (1 << NB_FAMILLES) - 1):
+        ajout = INDICES_MASQUE[masque]
+        attendu = sum(SCORE_SYNERGIE[i][min(cartes_familles[i] + (i in ajout), 5)] for i in range(NB_FAMILLES))
+        assert abs(zone.score_synergie(masque) - attendu) < 1e-9
+    assert zone.noms_distincts() == (len(masques) == len(modele))
+    assert (zone.masque_noms() is None) == ("Mannequin" in masques)
+
+def operation_au_hasard(rng: random.Random, zone: ZoneCartes, modele: list):
+    """Même opération sur la zone et sur la liste modèle"""
+    choix = rng.choice(["append", "append", "append", "retirer", "setitem", "delitem", "pop", "insert",
+                        "slice", "del_slice", "remove", "extend", "clear"])
+    if choix == "append":
+        nouvelle = carte_au_hasard(rng)
+        zone.append(nouvelle)
+        modele.append(nouvelle)
+    elif choix == "extend":
+        nouvelles = [carte_au_hasard(rng) for _ in range(rng.randint(0, 3))]
+        zone.extend(nouvelles)
+        modele.extend(nouvelles)
+    elif choix == "clear" and rng.random() < 0.2:
+        zone.clear()
+        modele.clear()
+    elif not modele:
+        return
+    elif choix == "retirer":
+        cible = rng.choice(modele)
+        depuis_droite = rng.random() < 0.5
+        positions = [i for i, c in enumerate(modele) if (c.nom, c.niveau) == (cible.nom, cible.niveau)]
+        attendue = modele.pop(positions[-1] if depuis_droite else positions[0])
+        assert zone.retirer(cible.nom, cible.niveau, depuis_droite) is attendue
+    elif choix == "setitem":
+        position, nouvelle = rng.randrange(-len(modele), len(modele)), carte_au_hasard(rng)
+        zone[position] = nouvelle
+        modele[position] = nouvelle
+    elif choix == "delitem":
+        position = rng.randrange(-len(modele), len(modele))
+        del zone[position]
+        del modele[position]
+    elif choix == "pop":
+        position = rng.randrange(len(modele))
+        assert zone.pop(position) is modele.pop(position)
+    elif choix == "insert":
+        position, nouvelle = rng.randint(0, len(modele) + 1), carte_au_hasard(rng)
+        zone.insert(position, nouvelle)
+        modele.insert(position, nouvelle)
+    elif choix == "slice":
+        debut = rng.randint(0, len(modele))
+        fin = rng.randint(debut, len(modele))
+        nouvelles = [carte_au_hasard(rng) for _ in range(rng.randint(0, 3))]
+        zone[debut:fin] = nouvelles
+        modele[debut:fin] = nouvelles
+        assert zone[debut:] == modele[debut:]
+    elif choix == "del_slice":
+        debut = rng.randint(0, len(modele))
+        fin = debut + rng.randint(0, 2)
+        del zone[debut:fin]
+        del modele[debut:fin]
+    elif choix == "remove":
+        cible = rng.choice(modele)
+        zone.remove(cible)
+        modele.remove(cible)
+
+def test_zone_equivalente_a_une_liste():
+    for graine in range(30):
+        rng = random.Random(graine)
+        zone, modele = ZoneCartes(), []
+        for _ in range(150):
+            operation_au_hasard(rng, zone, modele)
+            verifier(zone, modele)
+
+def test_cascade_de_fusions():
+    """3×L1 -> L2 -> L3 sur le banc, 2 par niveau sur le plateau ; la carte fusionnée passe à droite"""
+    banc = ZoneCartes([carte("Chevalier"), carte("Chevalier"), carte("Archères"),
+                       carte("Chevalier", 2), carte("Chevalier", 2), carte("Chevalier")])
+    assert resoudre_fusions(banc, TAILLE_FUSION_BANC) == [("Chevalier", 2), ("Chevalier", 3)]
+    verifier(banc, [carte("Archères"), carte("Chevalier", 3)])
+    
+    plateau = ZoneCartes([carte("Prince", 2), carte("Prince"), carte("Valkyrie"), carte("Prince")])
+    assert resoudre_fusions(plateau, TAILLE_FUSION_PLATEAU) == [("Prince", 2), ("Prince", 3)]
+    verifier(plateau, [carte("Valkyrie"), carte("Prince", 3)])
+    
+    # Neuf L1 : trois L2 puis une L3, au plus un niveau sous NIVEAU_MAX
+    banc = ZoneCartes([carte("Gobelins")] * 9)
+    assert resoudre_fusions(banc) == [("Gobelins", 2)] * 3 + [("Gobelins", 3)]
+    verifier(banc, [carte("Gobelins", 3)])
+    assert resoudre_fusions(ZoneCartes([carte("Gobelins", 5)] * 3)) == []
+
+def test_cascade_identique_sur_liste_et_zone():
+    """Même résultat, dans le même ordre, que la cascade sur une simple liste ; plus rien à fusionner"""
+    for graine in range(200):
+        rng = random.Random(graine)
+        cartes = [carte(rng.choice(NOMS[:3]), rng.randint(1, 3)) for _ in range(rng.randint(0, 14))]
+        for taille_fusion in (TAILLE_FUSION_BANC, TAILLE_FUSION_PLATEAU):
+            liste, zone = list(cartes), ZoneCartes(cartes)
+            assert resoudre_fusions(zone, taille_fusion) == resoudre_fusions(liste, taille_fusion)
+            assert [(c.nom, c.niveau) for c in zone] == [(c.nom, c.niveau) for c in liste]
+            verifier(zone, list(zone))
+            assert all(n < taille_fusion for (_, niveau), n in zone.comptes().items() if niveau < 5)
+
+def test_carte_la_plus_a_droite():
+    """Miroir magique et promotion visent la dernière carte du banc, y compris juste après une fusion"""
+    game_session = GameSession()
+    game_session.leader_choisi = game_session.leaders_disponibles["Roi Royal"]
+    game_session.modificateurs_actifs = ["miroir_magique"]
+    game_session.etat.elixir = 20
+    for nom in ("Chevalier", "Chevalier", "Archères", "Chevalier"):
+        step(game_session, Acheter(nom))
+    assert [(c.nom, c.niveau) for c in game_session.etat.bench] == [("Archères", 1), ("Chevalier", 2)]
+    step(game_session, DebutTour())
+    assert [(c.nom, c.niveau) for c in game_session.etat.bench] == [("Archères", 1), ("Chevalier", 2),
+                                                                    ("Chevalier", 1)]
+    
+    game_session.modificateurs_actifs = ["promotion"]
+    game_session.etat.bench[1] = carte("Prince")  # Remplacement sur place : l'ordre ne change pas
+    step(game_session, DebutTour(promotion="Princesse"))
+    assert [(c.nom, c.niveau) for c in game_session.etat.bench] == [("Archères", 1), ("Prince", 1),
+                                                                    ("Princesse", 1)]
+    assert game_session.etat.bench.comptes() == {("Archères", 1): 1, ("Prince", 1): 1, ("Princesse", 1): 1}
+
+if __name__ == "__main__":
+    test_zone_equivalente_a_une_liste()
+    test_cascade_de_fusions()
+    test_cascade_identique_sur_liste_et_zone()
+    test_carte_la_plus_a_droite()
+    print("✅ Zones indexées et cascade de fusions équivalentes à une liste recomptée")
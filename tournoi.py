@@ -0,0 +1,315 @@
+"""
+Tournoi en auto-jeu : quel leader, quel modificateur et quelle politique d'achat gagnent le plus
+
+Chaque combinaison (leader, modificateur, politique) joue des parties simulées
+avec le moteur (main.step) : boutiques tirées dans le pool, achats choisis par
+la politique, cartes posées sur le plateau, puis bataille contre un adversaire
+dont la force augmente à chaque tour. Les parties sont regroupées en lots de
+graines fixes, répartis sur un pool de processus ; chaque lot terminé est
+enregistré dans le fichier de résultats, qu'une relance avec la même
+configuration reprend (les lots déjà joués ne sont pas rejoués).
+
+Utilisation : python tournoi.py [parties par combinaison] [processus] [fichier]
+"""
+
+import json
+import math
+import os
+import random
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from main import (BIBLIOTHEQUE_CARTES, COMPOSANTES_SCORE, COUTS_CARTES, COUT_CARTE_ETOILE,
+                  MODIFICATEURS_PARTIE, Acheter, Carte, DebutTour, Deplacer, FinTour, GameSession, Recevoir,
+                  Vendre, pipeline_score, step)
+from simulation_boutique import exemplaires_restants
+
+VERSION = 1
+TOURS_MAX = 15
+TAILLE_BANC = 5
+PARTIES_PAR_LOT = 10
+
+# Force de l'adversaire au tour t, et écart de force pour lequel une victoire devient ~73 % probable
+FORCE_ADVERSE_BASE = 2.0
+FORCE_ADVERSE_PAR_TOUR = 5.0
+ECHELLE_BATAILLE = 4.0
+
+# La disruption mesure la gêne causée aux autres joueurs, absents des parties simulées
+COMPOSANTES_TOURNOI = tuple(nom for nom in COMPOSANTES_SCORE if nom != "disruption")
+CHEMIN_RESULTATS = os.path.join("data", "tournois")
+
+
+@dataclass
+class ConfigTournoi:
+    leaders: List[str] = field(default_factory=lambda: list(GameSession().leaders_disponibles))
+    modificateurs: List[str] = field(default_factory=lambda: list(MODIFICATEURS_PARTIE))
+    politiques: List[str] = field(default_factory=lambda: list(POLITIQUES))
+    parties: int = 20  # par combinaison
+    graine: int = 0
+    weights: Dict[str, float] = field(default_factory=lambda: dict(GameSession().weights))
+    
+    def signature(self) -> str:
+        """Empreinte de tout ce qui change les résultats (config, règles simulées, catalogue)"""
+        donnees = (asdict(self), VERSION, TOURS_MAX, TAILLE_BANC, PARTIES_PAR_LOT, FORCE_ADVERSE_BASE,
+                   FORCE_ADVERSE_PAR_TOUR, ECHELLE_BATAILLE, COMPOSANTES_TOURNOI, COUTS_CARTES)
+        return f"{zlib.crc32(json.dumps(donnees, sort_keys=True, ensure_ascii=False).encode('utf-8')):08x}"
+    
+    def lots(self) -> List[Tuple[str, str, str, int]]:
+        nb_lots = math.ceil(self.parties / PARTIES_PAR_LOT)
+        return [(leader, modificateur, politique, lot) for leader in self.leaders
+                for modificateur in self.modificateurs for politique in self.politiques for lot in range(nb_lots)]
+
+
+@dataclass
+class ResultatPartie:
+    batailles: int = 0
+    victoires: int = 0
+    tour: int = 1  # tour atteint (élimination ou fin de la simulation)
+    survie: bool = False
+
+
+# --- Politiques d'achat : prochaine carte à acheter dans la boutique (None pour arrêter) ---
+
+def politique_score(game_session: GameSession, boutique: List[Carte], rng: random.Random,
+                    weights: Dict[str, float]) -> Optional[Carte]:
+    return pipeline_score(weights, COMPOSANTES_TOURNOI).evaluer(game_session.etat).meilleur(boutique)
+
+
+def politique_moins_chere(game_session: GameSession, boutique: List[Carte], rng: random.Random,
+                          weights: Dict[str, float]) -> Optional[Carte]:
+    abordables = [c for c in boutique if c.cout <= game_session.etat.elixir]
+    return min(abordables, key=lambda c: c.cout) if abordables else None
+
+
+def politique_aleatoire(game_session: GameSession, boutique: List[Carte], rng: random.Random,
+                        weights: Dict[str, float]) -> Optional[Carte]:
+    abordables = [c for c in boutique if c.cout <= game_session.etat.elixir]
+    return rng.choice(abordables) if abordables else None
+
+
+POLITIQUES: Dict[str, Callable] = {
+    "score": politique_score,
+    "moins_chere": politique_moins_chere,
+    "aleatoire": politique_aleatoire,
+}
+
+
+# --- Partie simulée ---
+
+def puissance(carte: Carte) -> int:
+    return carte.cout * 2 ** (carte.niveau - 1)
+
+
+def force_plateau(game_session: GameSession) -> float:
+    plateau = game_session.etat.main
+    return sum(puissance(c) for c in plateau) + plateau.score_synergie()
+
+
+def tirer_boutique(game_session: GameSession, rng: random.Random) -> List[Carte]:
+    """Cartes proposées, tirées selon les exemplaires restants du pool"""
+    restants = exemplaires_restants(COUTS_CARTES, game_session.etat.historique_pool)
+    noms = [nom for nom, nombre in restants.items() if nombre]
+    if not noms:
+        return []
+    tires = rng.choices(noms, weights=[restants[nom] for nom in noms], k=game_session.choix_par_tour)
+    return [BIBLIOTHEQUE_CARTES[nom] for nom in tires]
+
+
+def carte_de_cout(rng: random.Random, cout: int, famille: Optional[str] = None) -> Optional[str]:
+    noms = [nom for nom, c in BIBLIOTHEQUE_CARTES.items() if c.cout == cout and (famille is None or famille in c.traits)]
+    return rng.choice(noms) if noms else None
+
+
+def organiser(game_session: GameSession):
+    """Poser les cartes les plus puissantes du banc, vendre le surplus"""
+    etat = game_session.etat
+    while etat.bench and len(etat.main) < game_session.calculer_max_cartes_plateau():
+        carte = max(etat.bench, key=puissance)
+        step(game_session, Deplacer(carte.nom, carte.niveau, "main"))
+    while len(etat.bench) > TAILLE_BANC:
+        carte = min(etat.bench, key=puissance)
+        step(game_session, Vendre(carte.nom, carte.niveau))
+
+
+def jouer_partie(leader: str, modificateur: str, politique: str, graine: int,
+                 weights: Optional[Dict[str, float]] = None) -> ResultatPartie:
+    rng = random.Random(graine)
+    choisir = POLITIQUES[politique]
+    game_session = GameSession()
+    weights = weights or game_session.weights
+    game_session.leader_choisi = game_session.leaders_disponibles[leader]
+    game_session.modificateurs_actifs = [modificateur]
+    game_session.appliquer_modificateurs()
+    if modificateur in COUT_CARTE_ETOILE:
+        step(game_session, Recevoir(carte_de_cout(rng, COUT_CARTE_ETOILE[modificateur]), 2, "main"))
+    else:
+        step(game_session, Recevoir(carte_de_cout(rng, 2), 1, "main"))
+    
+    resultat = ResultatPartie()
+    while game_session.tour <= TOURS_MAX:
+        banc = game_session.etat.bench
+        step(game_session, DebutTour(
+            remplacement_pandore=carte_de_cout(rng, banc[0].cout) if banc else None,
+            promotion=carte_de_cout(rng, min(banc[-1].cout + 1, 5)) if banc else None,
+            troupe_cheatee=carte_de_cout(rng, rng.randint(2, 5))))
+        
+        boutique = tirer_boutique(game_session, rng)
+        while boutique:
+            carte = choisir(game_session, boutique, rng, weights)
+            if carte is None:
+                break
+            boutique.remove(carte)
+            step(game_session, Acheter(carte.nom))
+        organiser(game_session)
+        
+        # Bataille : probabilité de victoire logistique selon l'écart de force
+        ecart = force_plateau(game_session) - (FORCE_ADVERSE_BASE + FORCE_ADVERSE_PAR_TOUR * (game_session.tour - 1))
+        victoire = rng.random() < 1 / (1 + math.exp(-ecart / ECHELLE_BATAILLE))
+        resultat.batailles += 1
+        resultat.victoires += victoire
+        step(game_session, FinTour(
+            victoire=victoire,
+            troupes_adverses_restantes=0 if victoire else min(3, max(0, int(-ecart // ECHELLE_BATAILLE))),
+            leader_adverse_mort=rng.random() < 0.15,
+            copie_ennemie=carte_de_cout(rng, rng.randint(2, 5)),
+            mannequin_survivant=rng.random() < 0.5,
+            gobelin_bonus=carte_de_cout(rng, rng.choice((2, 3, 4)), "Gobelin"),
+            vendre_extracteur=game_session.extracteur_stock >= 6))
+        if game_session.etat.hp <= 0:
+            break
+    
+    resultat.tour = min(game_session.tour, TOURS_MAX)
+    resultat.survie = game_session.etat.hp > 0
+    return resultat
+
+
+def graine_lot(config: ConfigTournoi, leader: str, modificateur: str, politique: str, lot: int) -> int:
+    """Graine stable d'un lot (indépendante du processus et de l'ordre d'exécution)"""
+    return zlib.crc32(f"{config.graine}|{leader}|{modificateur}|{politique}|{lot}".encode("utf-8"))
+
+
+def jouer_lot(config: ConfigTournoi, leader: str, modificateur: str, politique: str, lot: int) -> List[int]:
+    """Statistiques d'un lot : [parties, batailles, victoires, somme des tours atteints, survies]"""
+    graine = graine_lot(config, leader, modificateur, politique, lot)
+    parties = min(PARTIES_PAR_LOT, config.parties - lot * PARTIES_PAR_LOT)
+    stats = [0, 0, 0, 0, 0]
+    for i in range(parties):
+        resultat = jouer_partie(leader, modificateur, politique, graine + i, config.weights)
+        stats[0] += 1
+        stats[1] += resultat.batailles
+        stats[2] += resultat.victoires
+        stats[3] += resultat.tour
+        stats[4] += resultat.survie
+    return stats
+
+
+# --- Fichier de résultats (reprise) ---
+
+def cle_lot(leader: str, modificateur: str, politique: str, lot: int) -> str:
+    return f"{leader}|{modificateur}|{politique}|{lot}"
+
+
+def charger_resultats(chemin: str, config: ConfigTournoi) -> Dict[str, List[int]]:
+    """Lots déjà joués avec cette configuration (vide si le fichier manque ou ne correspond pas)"""
+    try:
+        with open(chemin, encoding="utf-8") as f:
+            donnees = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if donnees.get("signature") != config.signature():
+        return {}
+    return donnees.get("lots", {})
+
+
+def ecrire_resultats(chemin: str, config: ConfigTournoi, lots: Dict[str, List[int]]):
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    temporaire = chemin + ".tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump({"signature": config.signature(), "config": asdict(config), "lots": lots},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporaire, chemin)
+
+
+def chemin_par_defaut(config: ConfigTournoi) -> str:
+    return os.path.join(CHEMIN_RESULTATS, f"tournoi_{config.signature()}.json")
+
+
+def lancer_tournoi(config: ConfigTournoi, processus: int = 1, chemin: Optional[str] = None,
+                   progression: Optional[Callable[[int, int], None]] = None) -> Dict[str, List[int]]:
+    """Joue les lots manquants (en parallèle si processus > 1) et renvoie tous les lots"""
+    chemin = chemin or chemin_par_defaut(config)
+    lots = charger_resultats(chemin, config)
+    restants = [lot for lot in config.lots() if cle_lot(*lot) not in lots]
+    total = len(config.lots())
+    
+    def enregistrer(lot, stats):
+        lots[cle_lot(*lot)] = stats
+        ecrire_resultats(chemin, config, lots)
+        if progression:
+            progression(len(lots), total)
+    
+    if processus > 1 and len(restants) > 1:
+        with ProcessPoolExecutor(max_workers=processus) as executor:
+            futures = {executor.submit(jouer_lot, config, *lot): lot for lot in restants}
+            for future in as_completed(futures):
+                enregistrer(futures[future], future.result())
+    else:
+        for lot in restants:
+            enregistrer(lot, jouer_lot(config, *lot))
+    return lots
+
+
+def agreger(lots: Dict[str, List[int]], axes: Tuple[int, ...]) -> Dict[Tuple[str, ...], Dict[str, float]]:
+    """Taux de victoire et tour moyen par valeur des axes (0 = leader, 1 = modificateur, 2 = politique)"""
+    sommes = {}
+    for cle, stats in lots.items():
+        parties = cle.split("|")
+        groupe = tuple(parties[i] for i in axes)
+        cumul = sommes.setdefault(groupe, [0, 0, 0, 0, 0])
+        for i, valeur in enumerate(stats):
+            cumul[i] += valeur
+    return {groupe: {
+        "parties": s[0],
+        "taux_victoire": s[2] / s[1] if s[1] else 0.0,
+        "tour_moyen": s[3] / s[0] if s[0] else 0.0,
+        "taux_survie": s[4] / s[0] if s[0] else 0.0,
+    } for groupe, s in sommes.items()}
+
+
+def afficher_tableaux(lots: Dict[str, List[int]], config: ConfigTournoi):
+    print(f"\n=== LEADERS × POLITIQUES ({config.parties} parties par modificateur) ===")
+    print(f"{'Leader':<14}{'Politique':<14}{'victoires':>10}{'tour moyen':>12}{'survie':>8}")
+    for (leader, politique), r in sorted(agreger(lots, (0, 2)).items(), key=lambda x: -x[1]["taux_victoire"]):
+        print(f"{leader:<14}{politique:<14}{r['taux_victoire']:>9.1%}{r['tour_moyen']:>12.2f}{r['taux_survie']:>8.0%}")
+    
+    politique = "score" if "score" in config.politiques else config.politiques[0]
+    print(f"\n=== MODIFICATEURS (politique {politique}) ===")
+    par_modificateur = agreger({c: s for c, s in lots.items() if c.split("|")[2] == politique}, (1, 0))
+    entete = "".join(f"{leader[:12]:>26}" for leader in config.leaders)
+    print(f"{'Modificateur':<24}{entete}")
+    lignes = []
+    for modificateur in config.modificateurs:
+        resultats = [par_modificateur.get((modificateur, leader)) for leader in config.leaders]
+        moyenne = sum(r["taux_victoire"] for r in resultats if r) / max(1, sum(1 for r in resultats if r))
+        lignes.append((moyenne, modificateur, resultats))
+    for _, modificateur, resultats in sorted(lignes, reverse=True):
+        cellules = "".join(f"{r['taux_victoire']:>17.1%} / {r['tour_moyen']:>5.2f}t" if r else f"{'-':>26}"
+                           for r in resultats)
+        print(f"{modificateur:<24}{cellules}")
+
+
+if __name__ == "__main__":
+    # Utilisation : python tournoi.py [parties par combinaison] [processus] [fichier]
+    config = ConfigTournoi(parties=int(sys.argv[1]) if len(sys.argv) > 1 else 20)
+    processus = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    chemin = sys.argv[3] if len(sys.argv) > 3 else chemin_par_defaut(config)
+    
+    def afficher_progression(faits, total):
+        print(f"\r{faits}/{total} lots", end="", flush=True)
+    
+    lots = lancer_tournoi(config, processus=processus, chemin=chemin, progression=afficher_progression)
+    print(f"\n✅ Résultats dans {chemin}")
+    afficher_tableaux(lots, config)